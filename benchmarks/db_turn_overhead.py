@@ -0,0 +1,128 @@
+"""JARVIS - Microbenchmark for per-turn database overhead.
+
+Replays the database calls one chat turn makes (facts lookup, history
+fetch, user/assistant/tool message inserts) against a scratch database,
+once with the legacy connect-per-call `get_connection()` and once with
+the pooled connections, and finally with the whole turn written as one
+batch (`add_messages`), as run_agent does.
+
+Usage:
+    python benchmarks/db_turn_overhead.py
+    python benchmarks/db_turn_overhead.py --turns 500 --tool-messages 3
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from jarvis import database  # noqa: E402
+
+
+@contextmanager
+def _legacy_get_connection():
+    """The pre-pool implementation: open and close a connection per call."""
+    conn = sqlite3.connect(database.get_db_path())
+    conn.row_factory = sqlite3.Row
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def _run_turn(conv_id: str, turn: int, tool_messages: int):
+    """Issue the same database calls as one run_agent turn."""
+    database.get_user_facts()
+    database.get_recent_messages(conv_id, limit=30)
+    database.add_message(conv_id, "user", f"question {turn}")
+    if turn == 0:
+        database.update_conversation_title(conv_id, "benchmark")
+    database.add_message(conv_id, "assistant", f"answer {turn}")
+    for i in range(tool_messages):
+        database.add_message(
+            conv_id, "tool", f"result {turn}.{i}",
+            tool_name="calculator", tool_call_id=f"call-{turn}-{i}",
+        )
+
+
+def _run_turn_batched(conv_id: str, turn: int, tool_messages: int):
+    """Issue the same calls with the turn persisted in one transaction."""
+    database.get_user_facts()
+    database.get_recent_messages(conv_id, limit=30)
+    messages = [
+        {"role": "user", "content": f"question {turn}"},
+        {"role": "assistant", "content": f"answer {turn}"},
+    ]
+    messages.extend(
+        {
+            "role": "tool",
+            "content": f"result {turn}.{i}",
+            "tool_name": "calculator",
+            "tool_call_id": f"call-{turn}-{i}",
+        }
+        for i in range(tool_messages)
+    )
+    database.add_messages(conv_id, messages, title="benchmark" if turn == 0 else None)
+
+
+def _bench(label: str, db_path: Path, turns: int, tool_messages: int, run_turn=_run_turn) -> dict:
+    """Time `turns` turns against a fresh database and conversation."""
+    database.DB_PATH = db_path
+    database.init_db()
+    conv_id = database.create_conversation()
+
+    timings = []
+    for turn in range(turns):
+        start = time.perf_counter()
+        run_turn(conv_id, turn, tool_messages)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    return {
+        "mode": label,
+        "turns": turns,
+        "mean_ms": round(sum(timings) / len(timings), 3),
+        "p50_ms": round(timings[len(timings) // 2], 3),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=200, help="Turns per mode")
+    parser.add_argument("--tool-messages", type=int, default=2, help="Tool messages per turn")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Separate files: WAL mode persists in the file once the pool sets it
+        pooled_get_connection = database.get_connection
+        database.get_connection = _legacy_get_connection
+        try:
+            before = _bench("connect-per-call", Path(tmp) / "legacy.db", args.turns, args.tool_messages)
+        finally:
+            database.get_connection = pooled_get_connection
+
+        after = _bench("pooled", Path(tmp) / "pooled.db", args.turns, args.tool_messages)
+        batched = _bench(
+            "pooled+batched", Path(tmp) / "batched.db", args.turns, args.tool_messages,
+            run_turn=_run_turn_batched,
+        )
+        database.close_connections()
+
+    print(json.dumps({
+        "before": before,
+        "after": after,
+        "batched": batched,
+        "speedup": round(before["mean_ms"] / after["mean_ms"], 2),
+        "speedup_batched": round(before["mean_ms"] / batched["mean_ms"], 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
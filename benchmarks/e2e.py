@@ -0,0 +1,358 @@
+"""JARVIS - End-to-end latency benchmark against a fake Ollama.
+
+Starts the deterministic fake Ollama server (benchmarks/fake_ollama.py),
+points the agent at it through OLLAMA_HOST, and drives the full stack at
+rising concurrency:
+
+- run_agent     the sync agent entry point, one thread per client
+- chat          POST /api/v1/chat on a local uvicorn server
+- ws            the /api/v1/ws WebSocket (also reports time to first token)
+
+Each client keeps its own conversation, so history loading and context
+windowing are part of every turn; every `--tool-every`-th message
+triggers a scripted calculator call (LLM -> tool -> LLM; the intent
+router, which would answer it without the LLM, is turned off). For each target and concurrency
+level the report has p50/p95/p99 latency, throughput, rejected (busy)
+requests, LLM calls and database writes (statements and commits), as
+JSON for regression tracking. Runs use a scratch database.
+
+Usage:
+    python benchmarks/e2e.py
+    python benchmarks/e2e.py --concurrency 1,4,16 --requests 10 --output bench.json
+    python benchmarks/e2e.py --targets ws --tokens-per-second 100 --parallel 2
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fake_ollama import FakeOllama, FakeOllamaConfig  # noqa: E402
+from jarvis import database  # noqa: E402
+from jarvis.config import get_config  # noqa: E402
+
+TARGETS = ("run_agent", "chat", "ws")
+
+
+class WriteCounter:
+    """Count write statements and commits on pooled database connections.
+
+    Installed by wrapping database._open_connection, so every connection
+    the pool opens afterwards reports its statements here.
+    """
+
+    WRITE_KINDS = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+
+    def __init__(self):
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def install(self):
+        open_connection = database._open_connection
+
+        def traced_open(path):
+            conn = open_connection(path)
+            conn.set_trace_callback(self._trace)
+            return conn
+
+        database._open_connection = traced_open
+
+    def _trace(self, sql: str):
+        kind = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else ""
+        if kind in self.WRITE_KINDS or kind == "COMMIT":
+            with self._lock:
+                self._counts[kind] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "write_statements": sum(self._counts[k] for k in self.WRITE_KINDS),
+                "commits": self._counts["COMMIT"],
+            }
+
+
+def _percentile(values: list[float], p: float) -> float:
+    """Nearest-rank percentile of a sorted list (0 if empty)."""
+    if not values:
+        return 0.0
+    rank = max(1, math.ceil(p * len(values)))
+    return round(values[rank - 1], 1)
+
+
+def _prompt(i: int, tool_every: int) -> str:
+    if tool_every and (i + 1) % tool_every == 0:
+        return "calculate 17 * 23"
+    return f"tell me something interesting, message {i}"
+
+
+class Run:
+    """Measurements of one (target, concurrency) level."""
+
+    def __init__(self, target: str, concurrency: int, ollama: FakeOllama, writes: WriteCounter):
+        self.target = target
+        self.concurrency = concurrency
+        self.latencies: list[float] = []
+        self.first_token: list[float] = []
+        self.errors = 0
+        self.rejected = 0
+        self._ollama = ollama
+        self._writes = writes
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "Run":
+        self._llm_before = dict(self._ollama.stats)
+        self._db_before = self._writes.snapshot()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall = time.perf_counter() - self._start
+
+    def record(self, latency_ms: Optional[float] = None, first_token_ms: Optional[float] = None,
+               error: bool = False, rejected: bool = False):
+        with self._lock:
+            if latency_ms is not None:
+                self.latencies.append(latency_ms)
+            if first_token_ms is not None:
+                self.first_token.append(first_token_ms)
+            self.errors += error
+            self.rejected += rejected
+
+    def report(self) -> dict:
+        latencies = sorted(self.latencies)
+        db_after = self._writes.snapshot()
+        result = {
+            "target": self.target,
+            "concurrency": self.concurrency,
+            "completed": len(latencies),
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "wall_s": round(self.wall, 3),
+            "throughput_rps": round(len(latencies) / self.wall, 2) if self.wall else 0.0,
+            "latency_ms": {
+                "p50": _percentile(latencies, 0.50),
+                "p95": _percentile(latencies, 0.95),
+                "p99": _percentile(latencies, 0.99),
+                "mean": round(sum(latencies) / len(latencies), 1) if latencies else 0.0,
+            },
+            "llm_calls": self._ollama.stats["chat_requests"] - self._llm_before["chat_requests"],
+            "db": {key: db_after[key] - self._db_before[key] for key in db_after},
+        }
+        if self.first_token:
+            first_token = sorted(self.first_token)
+            result["first_token_ms"] = {
+                "p50": _percentile(first_token, 0.50),
+                "p95": _percentile(first_token, 0.95),
+                "p99": _percentile(first_token, 0.99),
+            }
+        return result
+
+
+def bench_run_agent(run: Run, requests: int, tool_every: int):
+    """Drive the sync run_agent from one thread per client."""
+    from jarvis.agent import create_agent, run_agent
+    from jarvis.memory import SessionMemory
+
+    agent = create_agent()
+
+    def client(_):
+        session = SessionMemory()
+        for i in range(requests):
+            start = time.perf_counter()
+            try:
+                run_agent(_prompt(i, tool_every), agent, session=session)
+            except Exception as e:
+                print(f"[bench] run_agent failed: {e}", file=sys.stderr)
+                run.record(error=True)
+                continue
+            run.record((time.perf_counter() - start) * 1000)
+
+    with ThreadPoolExecutor(max_workers=run.concurrency) as executor:
+        list(executor.map(client, range(run.concurrency)))
+
+
+async def bench_chat(run: Run, address: str, requests: int, tool_every: int):
+    """Drive POST /api/v1/chat with one sequential client per slot."""
+    import httpx
+
+    async def client(http):
+        conversation_id = None
+        for i in range(requests):
+            start = time.perf_counter()
+            response = await http.post(
+                "/api/v1/chat",
+                json={"message": _prompt(i, tool_every), "conversation_id": conversation_id},
+            )
+            if response.status_code == 429:
+                run.record(rejected=True)
+            elif response.status_code != 200:
+                run.record(error=True)
+            else:
+                conversation_id = response.json()["conversation_id"]
+                run.record((time.perf_counter() - start) * 1000)
+
+    async with httpx.AsyncClient(base_url=f"http://{address}", headers=_auth_headers(), timeout=None) as http:
+        await asyncio.gather(*(client(http) for _ in range(run.concurrency)))
+
+
+async def bench_ws(run: Run, address: str, requests: int, tool_every: int):
+    """Drive the /api/v1/ws WebSocket with one connection per client."""
+    from websockets.asyncio.client import connect
+
+    async def client():
+        async with connect(f"ws://{address}/api/v1/ws", additional_headers=_auth_headers()) as ws:
+            json.loads(await ws.recv())  # connected
+            conversation_id = None
+            for i in range(requests):
+                start = time.perf_counter()
+                first_token = None
+                await ws.send(json.dumps({
+                    "action": "send_message",
+                    "text": _prompt(i, tool_every),
+                    "conversation_id": conversation_id,
+                }))
+                while True:
+                    event = json.loads(await ws.recv())
+                    if event["type"] == "response_delta" and first_token is None:
+                        first_token = (time.perf_counter() - start) * 1000
+                    elif event["type"] == "response_end":
+                        conversation_id = event["conversation_id"]
+                        run.record((time.perf_counter() - start) * 1000, first_token)
+                        break
+                    elif event["type"] == "error":
+                        run.record(rejected=event.get("code") == "BUSY", error=event.get("code") != "BUSY")
+                        break
+
+    await asyncio.gather(*(client() for _ in range(run.concurrency)))
+
+
+def _auth_headers() -> dict:
+    secret = os.getenv("JARVIS_API_SECRET")
+    return {"Authorization": f"Bearer {secret}"} if secret else {}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def api_server() -> Iterator[str]:
+    """Run the JARVIS API on a local port in a background thread."""
+    import uvicorn
+    from jarvis.api.main import app
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="jarvis-api", daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("API server failed to start")
+        time.sleep(0.05)
+    try:
+        yield f"127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--targets", default=",".join(TARGETS), help="Comma-separated: run_agent,chat,ws")
+    parser.add_argument("--concurrency", default="1,2,4,8", help="Comma-separated client counts")
+    parser.add_argument("--requests", type=int, default=5, help="Requests per client")
+    parser.add_argument("--tool-every", type=int, default=3, help="Every Nth message triggers a tool call (0: never)")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--prefill-ms", type=float, default=100.0)
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=50.0)
+    parser.add_argument("--reply-tokens", type=int, default=24)
+    parser.add_argument("--parallel", type=int, default=1, help="Requests the fake model generates at once")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+    unknown = set(targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(sorted(unknown))}")
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    ollama_config = FakeOllamaConfig(
+        tokens_per_second=args.tokens_per_second,
+        prefill_ms=args.prefill_ms,
+        prefill_ms_per_1k_tokens=args.prefill_ms_per_1k,
+        reply_tokens=args.reply_tokens,
+        parallel=args.parallel,
+    )
+
+    # Tool turns measure the LLM -> tool -> LLM path, not the fast path
+    get_config().router.enabled = False
+
+    results = []
+    writes = WriteCounter()
+    writes.install()
+
+    with tempfile.TemporaryDirectory() as tmp, FakeOllama(ollama_config) as ollama:
+        os.environ["OLLAMA_HOST"] = ollama.url
+        database.DB_PATH = Path(tmp) / "bench.db"
+        database.init_db()
+
+        def measure(target: str, bench):
+            for concurrency in levels:
+                print(f"[bench] {target} x{concurrency}", file=sys.stderr)
+                with Run(target, concurrency, ollama, writes) as run:
+                    bench(run)
+                results.append(run.report())
+
+        if "run_agent" in targets:
+            measure("run_agent", lambda run: bench_run_agent(run, args.requests, args.tool_every))
+
+        if "chat" in targets or "ws" in targets:
+            with api_server() as address:
+                for target, bench in (("chat", bench_chat), ("ws", bench_ws)):
+                    if target in targets:
+                        measure(target, lambda run, bench=bench: asyncio.run(
+                            bench(run, address, args.requests, args.tool_every)
+                        ))
+
+        database.close_connections()
+
+    report = json.dumps({
+        "config": {
+            "requests_per_client": args.requests,
+            "tool_every": args.tool_every,
+            "fake_ollama": {
+                "tokens_per_second": args.tokens_per_second,
+                "prefill_ms": args.prefill_ms,
+                "prefill_ms_per_1k_tokens": args.prefill_ms_per_1k,
+                "reply_tokens": args.reply_tokens,
+                "parallel": args.parallel,
+            },
+        },
+        "results": results,
+    }, indent=2)
+
+    if args.output:
+        Path(args.output).write_text(report + "\n", encoding="utf-8")
+        print(f"[bench] Report written to {args.output}", file=sys.stderr)
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
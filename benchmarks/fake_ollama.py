@@ -0,0 +1,308 @@
+"""JARVIS - Deterministic stand-in for the Ollama HTTP API.
+
+Serves the subset of the Ollama API the agent uses (`/api/tags`,
+`/api/version`, `/api/chat`, streaming and non-streaming) with scripted
+replies, so the agent, API and database paths can be benchmarked
+without a GPU or a real model:
+
+- Prefill is simulated with a fixed delay plus a delay per 1k prompt
+  tokens (prompt tokens are estimated at ~4 characters each).
+- Like Ollama, each of the `parallel` slots caches its last prompt: a
+  request that starts with the same messages only prefills (and reports
+  in prompt_eval_count) the messages after the shared prefix.
+- Reply tokens are emitted at a fixed rate.
+- A user message containing a trigger word gets a scripted tool call;
+  the message after a tool result answers with that result.
+- `parallel` caps how many requests "generate" at once, like
+  OLLAMA_NUM_PARALLEL on a single GPU; the rest wait their turn.
+
+Usage:
+    python benchmarks/fake_ollama.py --port 11435 --tokens-per-second 40
+    OLLAMA_HOST=http://127.0.0.1:11435 jarvis "calculate 17 * 23"
+"""
+
+import argparse
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+@dataclass
+class ScriptedToolCall:
+    """Tool call returned when the user message contains `trigger`."""
+    trigger: str
+    name: str
+    arguments: dict
+
+
+DEFAULT_TOOL_CALLS = [
+    ScriptedToolCall("calculate", "calculator", {"expression": "17 * 23"}),
+]
+
+
+@dataclass
+class FakeOllamaConfig:
+    """Timing and script of the fake server."""
+    tokens_per_second: float = 50.0
+    prefill_ms: float = 100.0
+    prefill_ms_per_1k_tokens: float = 50.0
+    reply_tokens: int = 24
+    parallel: int = 1
+    prefix_cache: bool = True
+    tool_calls: list[ScriptedToolCall] = field(default_factory=lambda: list(DEFAULT_TOOL_CALLS))
+
+
+class FakeOllama:
+    """Fake Ollama server running on a background thread.
+
+    Example:
+        with FakeOllama(FakeOllamaConfig(tokens_per_second=100)) as ollama:
+            os.environ["OLLAMA_HOST"] = ollama.url
+            ...
+    """
+
+    def __init__(self, config: Optional[FakeOllamaConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or FakeOllamaConfig()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        self._thread: Optional[threading.Thread] = None
+        self._slots = threading.Semaphore(max(1, self.config.parallel))
+        self._lock = threading.Lock()
+        self._prompt_cache: list[list[str]] = []  # Last prompt of each slot, as message parts
+        self.stats = {
+            "chat_requests": 0, "tool_calls": 0, "prompt_tokens": 0, "prefill_tokens": 0, "completion_tokens": 0,
+        }
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeOllama":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeOllama":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _count(self, **deltas: int):
+        with self._lock:
+            for key, value in deltas.items():
+                self.stats[key] += value
+
+    def cached_tokens(self, parts: list[str]) -> int:
+        """Tokens at the start of a prompt already in a slot's cache.
+
+        The prompt then replaces the cache of the slot that matched best
+        (or the oldest one).
+        """
+        if not self.config.prefix_cache:
+            return 0
+        with self._lock:
+            best_slot, best = None, 0
+            for slot, cached in enumerate(self._prompt_cache):
+                shared = 0
+                for a, b in zip(cached, parts):
+                    if a != b:
+                        break
+                    shared += 1
+                if shared > best:
+                    best_slot, best = slot, shared
+            if best_slot is not None:
+                self._prompt_cache[best_slot] = parts
+            else:
+                self._prompt_cache.append(parts)
+                del self._prompt_cache[:-max(1, self.config.parallel)]
+        return sum(_estimate_tokens(part) for part in parts[:best])
+
+    def plan_reply(self, messages: list[dict]) -> tuple[list[str], list[dict]]:
+        """Decide the reply tokens and tool calls for a chat request."""
+        last = messages[-1] if messages else {"role": "user", "content": ""}
+
+        if last.get("role") == "tool":
+            return _words(f"The result is {last.get('content', '')}."), []
+
+        text = str(last.get("content", "")).lower()
+        for scripted in self.config.tool_calls:
+            if scripted.trigger in text:
+                return [], [{"function": {"name": scripted.name, "arguments": scripted.arguments}}]
+
+        return [f"word{i} " for i in range(self.config.reply_tokens)], []
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output clean
+
+    @property
+    def fake(self) -> FakeOllama:
+        return self.server.fake
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json({"models": [{"name": "qwen2.5:7b-instruct", "model": "qwen2.5:7b-instruct"}]})
+        elif self.path == "/api/version":
+            self._send_json({"version": "0.0.0-fake"})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+
+        if self.path != "/api/chat":
+            self._send_json({"error": f"{self.path} is not supported by the fake server"}, status=404)
+            return
+
+        try:
+            self._chat(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client went away (interrupted generation)
+
+    def _chat(self, body: dict):
+        config = self.fake.config
+        messages = body.get("messages", [])
+        # Ollama renders tools right after the system prompt
+        system = [m for m in messages if m.get("role") == "system"]
+        rest = [m for m in messages if m.get("role") != "system"]
+        parts = [json.dumps(m, sort_keys=True) for m in system]
+        parts.append(json.dumps(body.get("tools", []), sort_keys=True))
+        parts.extend(json.dumps(m, sort_keys=True) for m in rest)
+        prompt_tokens = sum(_estimate_tokens(part) for part in parts)
+        tokens, tool_calls = self.fake.plan_reply(messages)
+        model = body.get("model", "fake")
+        stream = body.get("stream", True)
+
+        with self.fake._slots:
+            prefill_tokens = prompt_tokens - self.fake.cached_tokens(parts)
+            start = time.perf_counter()
+            time.sleep((config.prefill_ms + config.prefill_ms_per_1k_tokens * prefill_tokens / 1000) / 1000)
+            prefill_ns = int((time.perf_counter() - start) * 1e9)
+
+            if stream:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+            delay = 1 / config.tokens_per_second if config.tokens_per_second > 0 else 0
+            eval_start = time.perf_counter()
+            for token in tokens:
+                time.sleep(delay)
+                if stream:
+                    self._send_chunk(_chunk(model, {"role": "assistant", "content": token}))
+            if tool_calls and stream:
+                self._send_chunk(_chunk(model, {"role": "assistant", "content": "", "tool_calls": tool_calls}))
+            eval_ns = int((time.perf_counter() - eval_start) * 1e9)
+
+        self.fake._count(
+            chat_requests=1,
+            tool_calls=len(tool_calls),
+            prompt_tokens=prompt_tokens,
+            prefill_tokens=prefill_tokens,
+            completion_tokens=len(tokens),
+        )
+
+        final = _chunk(model, {"role": "assistant", "content": "" if stream else "".join(tokens)}, done=True)
+        if tool_calls and not stream:
+            final["message"]["tool_calls"] = tool_calls
+        final.update({
+            "done_reason": "stop",
+            "total_duration": prefill_ns + eval_ns,
+            "load_duration": 0,
+            "prompt_eval_count": prefill_tokens,
+            "prompt_eval_duration": prefill_ns,
+            "eval_count": len(tokens),
+            "eval_duration": eval_ns,
+        })
+
+        if stream:
+            self._send_chunk(final)
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        else:
+            self._send_json(final)
+
+    def _send_chunk(self, data: dict):
+        line = (json.dumps(data) + "\n").encode()
+        self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, data: dict, status: int = 200):
+        payload = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def _chunk(model: str, message: dict, done: bool = False) -> dict:
+    return {
+        "model": model,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "message": message,
+        "done": done,
+    }
+
+
+def _words(text: str) -> list[str]:
+    return [word + " " for word in text.split()]
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--prefill-ms", type=float, default=100.0)
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=50.0, help="Extra prefill per 1k prompt tokens")
+    parser.add_argument("--reply-tokens", type=int, default=24)
+    parser.add_argument("--parallel", type=int, default=1, help="Requests generated at once")
+    parser.add_argument("--no-prefix-cache", action="store_true", help="Prefill the whole prompt every time")
+    args = parser.parse_args()
+
+    config = FakeOllamaConfig(
+        tokens_per_second=args.tokens_per_second,
+        prefill_ms=args.prefill_ms,
+        prefill_ms_per_1k_tokens=args.prefill_ms_per_1k,
+        reply_tokens=args.reply_tokens,
+        parallel=args.parallel,
+        prefix_cache=not args.no_prefix_cache,
+    )
+    server = FakeOllama(config, host=args.host, port=args.port)
+    print(f"Fake Ollama listening on {server.url} (Ctrl+C to stop)")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 """JARVIS Agent module."""
 
-from .graph import create_agent, run_agent, create_agent_async, run_agent_async
+from .graph import create_agent, run_agent, create_agent_async, run_agent_async, run_agent_stream
 from .tools import (
     calculator,
     reminder_set,
@@ -18,6 +18,7 @@ __all__ = [
     "run_agent",
     "create_agent_async",
     "run_agent_async",
+    "run_agent_stream",
     "load_mcp_tools",
     "calculator",
     "reminder_set",
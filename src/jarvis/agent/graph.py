@@ -2,16 +2,27 @@
 
 import asyncio
 import json
-from typing import Optional
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager, nullcontext
+from typing import AsyncIterator, Optional
 
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_ollama import ChatOllama
 from langgraph.prebuilt import create_react_agent
 
+from ..async_database import run_read, run_write
+from ..config import get_config
+from ..memory import TurnWriter
+from .instrumentation import get_prefill_meter, instrument_tools
+from .router import get_intent_router
+from .tool_index import ToolSelector
 from .tools import ALL_TOOLS, init_tools
 from .mcp_loader import load_mcp_tools
 
-# Base system prompt (user facts injected at runtime)
+# Base system prompt. It is the frozen start of every prompt, so Ollama
+# can reuse its cache for it; user facts and the summary follow it in a
+# separate message (_build_context_prompt)
 BASE_SYSTEM_PROMPT = """You are JARVIS, a voice assistant. Rules:
 - ALWAYS respond in English only (even if user speaks Hindi/Hinglish)
 - Answer in 1-2 sentences max
@@ -37,21 +48,127 @@ If unsure, ask one clarifying question."""
 # Legacy prompt for backwards compatibility
 SYSTEM_PROMPT = BASE_SYSTEM_PROMPT
 
+# Stored as the result of a tool call that was cancelled before returning
+INTERRUPTED_TOOL_RESULT = "Interrupted by the user before the tool returned."
+
+
+def _chat_model(model: str) -> ChatOllama:
+    """Ollama chat model that stays loaded between turns (model.keep_alive)."""
+    return ChatOllama(model=model, keep_alive=get_config().model.keep_alive)
+
+
+# Conversations whose last tool set a ToolSelectingAgent remembers
+TOOL_SET_CONVERSATIONS = 256
+
+
+class ToolSelectingAgent:
+    """Agent that binds only the tools relevant to each turn.
+
+    Picks the tools for the last user message (see tool_index.py) and runs
+    the agent graph built for that subset; graphs are kept per subset, up
+    to tool_selection.cached_agents. When a conversation's previous tools
+    cover the new selection they are kept, since every change of tool set
+    makes Ollama evaluate the prompt after the system prompt again. The
+    conversation comes from config["configurable"]["conversation_id"]
+    (see _run_config); without one, every turn gets its plain selection.
+    Used like the graph itself through invoke(), ainvoke() and astream().
+    """
+
+    def __init__(self, llm, tools: list, selector: ToolSelector, cache_size: int):
+        self.llm = llm
+        self.tools = tools
+        self.selector = selector
+        self.cache_size = max(1, cache_size)
+        self._agents: OrderedDict[tuple[str, ...], object] = OrderedDict()
+        # Conversation ID -> tools of its previous turn
+        self._last: OrderedDict[str, tuple[str, ...]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def select_tools(self, messages: list) -> list:
+        """Tools for a turn, from its input messages."""
+        query, used = "", set()
+        for msg in messages:
+            if isinstance(msg, tuple):
+                role, content = msg
+                if role in ("user", "human"):
+                    query = content
+                continue
+            if msg.type == "human":
+                query = _message_text(msg.content)
+            elif msg.type == "tool" and getattr(msg, "name", None):
+                used.add(msg.name)
+            elif msg.type == "ai":
+                used.update(tc.get("name", "") for tc in (getattr(msg, "tool_calls", None) or []))
+        return self.selector.select(query, used)
+
+    def agent_for(self, messages: list, conversation_id: Optional[str] = None):
+        """Agent graph bound to the tools selected for these messages."""
+        tools = self.select_tools(messages)
+        key = tuple(tool.name for tool in tools)
+        with self._lock:
+            if conversation_id is not None:
+                last = self._last.get(conversation_id, ())
+                if set(key) <= set(last):
+                    key = last
+                    tools = [tool for tool in self.tools if tool.name in key]
+                self._last[conversation_id] = key
+                self._last.move_to_end(conversation_id)
+                if len(self._last) > TOOL_SET_CONVERSATIONS:
+                    self._last.popitem(last=False)
+
+            agent = self._agents.get(key)
+            if agent is not None:
+                self._agents.move_to_end(key)
+                return agent
+            agent = create_react_agent(self.llm, tools, prompt=SYSTEM_PROMPT)
+            self._agents[key] = agent
+            if len(self._agents) > self.cache_size:
+                self._agents.popitem(last=False)
+            return agent
+
+    def _agent_for_run(self, input: dict, config: Optional[dict]):
+        conversation_id = ((config or {}).get("configurable") or {}).get("conversation_id")
+        return self.agent_for(input["messages"], conversation_id)
+
+    def invoke(self, input: dict, config: Optional[dict] = None, **kwargs):
+        return self._agent_for_run(input, config).invoke(input, config, **kwargs)
+
+    async def ainvoke(self, input: dict, config: Optional[dict] = None, **kwargs):
+        return await self._agent_for_run(input, config).ainvoke(input, config, **kwargs)
+
+    def astream(self, input: dict, config: Optional[dict] = None, **kwargs):
+        return self._agent_for_run(input, config).astream(input, config, **kwargs)
+
 
 async def create_agent_async(model: str = "qwen2.5:7b-instruct"):
-    """Create and return the JARVIS agent with MCP tools (async version)."""
+    """Create and return the JARVIS agent with MCP tools (async version).
+
+    With more than tool_selection.min_tools tools, returns a
+    ToolSelectingAgent that binds only the tools each turn needs.
+    """
     # Initialize background processes
     init_tools()
 
     # Load MCP tools from config
     mcp_tools = await load_mcp_tools()
 
-    # Combine built-in + MCP tools
-    all_tools = list(ALL_TOOLS) + list(mcp_tools)
+    # Combine built-in + MCP tools, timed for /api/v1/stats/tools
+    all_tools = instrument_tools(list(ALL_TOOLS) + list(mcp_tools))
 
     print(f"[Agent] Loaded {len(ALL_TOOLS)} built-in + {len(mcp_tools)} MCP tools")
 
-    llm = ChatOllama(model=model)
+    llm = _chat_model(model)
+
+    selection = get_config().tool_selection
+    if selection.enabled and len(all_tools) > selection.min_tools:
+        pinned = [tool.name for tool in ALL_TOOLS] if selection.pin_builtin else []
+        print(f"[Agent] Binding {len(pinned)} pinned + up to {selection.top_k} matching tools per turn")
+        return ToolSelectingAgent(
+            llm,
+            all_tools,
+            ToolSelector(all_tools, pinned=pinned, top_k=selection.top_k),
+            selection.cached_agents,
+        )
 
     agent = create_react_agent(
         llm,
@@ -66,21 +183,24 @@ def create_agent(model: str = "qwen2.5:7b-instruct"):
     # Initialize background processes
     init_tools()
 
-    llm = ChatOllama(model=model)
+    llm = _chat_model(model)
 
     agent = create_react_agent(
         llm,
-        ALL_TOOLS,
+        instrument_tools(list(ALL_TOOLS)),
         prompt=SYSTEM_PROMPT,
     )
     return agent
 
 
-def _build_system_prompt(user_facts: str = "") -> str:
-    """Build system prompt with user facts if available."""
+def _build_context_prompt(user_facts: str = "", summary: str = "") -> str:
+    """Build the context message (user facts, conversation summary) after the system prompt."""
+    sections = []
     if user_facts:
-        return f"{BASE_SYSTEM_PROMPT}\n\nUSER CONTEXT:\n{user_facts}"
-    return BASE_SYSTEM_PROMPT
+        sections.append(f"USER CONTEXT:\n{user_facts}")
+    if summary:
+        sections.append(f"EARLIER IN THIS CONVERSATION:\n{summary}")
+    return "\n\n".join(sections)
 
 
 def _extract_response_and_tool_calls(result: dict) -> tuple[str, list]:
@@ -107,6 +227,157 @@ def _extract_response_and_tool_calls(result: dict) -> tuple[str, list]:
     return response, tool_calls
 
 
+def _build_input_messages(query: str, session=None) -> list:
+    """Build the agent input: context + history + new query.
+
+    The agent prepends the frozen system prompt. What follows is laid out
+    so consecutive turns share their prompt prefix: the context message
+    only changes when the facts change or the window moves (together with
+    the summary), and the history window is append-only between moves
+    (see SessionMemory).
+    """
+    if not session:
+        # No session - simple single-turn
+        return [("user", query)]
+
+    # History first: moving the window releases the pinned summary
+    history_messages = session.get_context_messages()
+    context = _build_context_prompt(session.get_user_facts_formatted(), session.get_summary())
+
+    input_messages = [SystemMessage(content=context)] if context else []
+    input_messages.extend(history_messages)
+    input_messages.append(HumanMessage(content=query))
+    return input_messages
+
+
+async def _aroute(query: str) -> Optional[list]:
+    """Fast-path answer for a simple tool command (see router.py), or None."""
+    router = get_intent_router()
+    return await router.aroute(query) if router else None
+
+
+def _run_config(session=None) -> Optional[dict]:
+    """Run config naming the conversation (for ToolSelectingAgent), if any."""
+    if not session:
+        return None
+    return {"configurable": {"conversation_id": session.conversation_id}}
+
+
+def _turn_writer(session=None):
+    """Return the session's turn writer context, or a no-op without a session."""
+    if session:
+        return session.turn()
+    return nullcontext()
+
+
+@asynccontextmanager
+async def _async_turn_writer(session=None):
+    """Async counterpart of _turn_writer(): flushes on the DB writer thread."""
+    if not session:
+        yield None
+        return
+
+    writer = TurnWriter(session)
+    try:
+        yield writer
+    finally:
+        # Shielded so a cancelled turn still saves what it produced
+        await asyncio.shield(run_write(writer.flush))
+
+
+def _message_text(content) -> str:
+    """Normalize message content to a string for storage."""
+    # MCP tools may return content as list, convert to string
+    if isinstance(content, list):
+        return "\n".join(str(item) for item in content)
+    if not isinstance(content, str):
+        return str(content)
+    return content
+
+
+def _record_turn(turn, new_messages: list) -> str:
+    """Queue the messages produced by this turn on the turn writer.
+
+    Args:
+        turn: TurnWriter, or None without a session
+        new_messages: Messages the agent added after the input (the input
+            history and prompt are already stored)
+
+    Returns:
+        The final response text
+    """
+    # Extract response
+    response, _ = _extract_response_and_tool_calls({"messages": new_messages})
+
+    if turn is None:
+        return response
+
+    if not _record_messages(turn, new_messages):
+        turn.add_assistant_message(response)
+
+    return response
+
+
+def _record_interrupted_turn(turn, new_messages: list, partial: str):
+    """Queue the messages of a cancelled turn on the turn writer.
+
+    Completed messages are kept. Tool calls that never returned get a
+    placeholder result so the stored history stays a valid sequence, and
+    the reply that was being generated is saved with the interrupted flag.
+
+    Args:
+        turn: TurnWriter, or None without a session
+        new_messages: Messages the agent completed before the cancel
+        partial: Text streamed for the unfinished reply
+    """
+    if turn is None:
+        return
+
+    _record_messages(turn, new_messages)
+
+    answered = {getattr(msg, "tool_call_id", "") for msg in new_messages if msg.type == "tool"}
+    for msg in new_messages:
+        if msg.type != "ai":
+            continue
+        for tc in getattr(msg, "tool_calls", None) or []:
+            if tc.get("id", "") not in answered:
+                turn.add_tool_message(
+                    tool_name=tc.get("name", "") or "unknown",
+                    content=INTERRUPTED_TOOL_RESULT,
+                    tool_call_id=tc.get("id", ""),
+                )
+
+    turn.add_assistant_message(partial, interrupted=True)
+
+
+def _record_messages(turn, new_messages: list) -> bool:
+    """Queue AI and tool messages in order; return True if any were AI."""
+    saw_ai_message = False
+
+    # Persist in order: tool-calling AI messages, their tool results, final answer
+    for msg in new_messages:
+        if msg.type == "ai":
+            saw_ai_message = True
+            tool_calls = [
+                {
+                    "id": tc.get("id", ""),
+                    "name": tc.get("name", ""),
+                    "args": tc.get("args", {}),
+                }
+                for tc in (getattr(msg, "tool_calls", None) or [])
+            ]
+            turn.add_assistant_message(_message_text(msg.content), tool_calls or None)
+
+        elif msg.type == "tool":
+            turn.add_tool_message(
+                tool_name=getattr(msg, "name", None) or "unknown",
+                content=_message_text(msg.content),
+                tool_call_id=getattr(msg, "tool_call_id", ""),
+            )
+
+    return saw_ai_message
+
+
 async def run_agent_async(
     query: str,
     agent=None,
@@ -114,60 +385,158 @@ async def run_agent_async(
 ) -> str:
     """Run a query through the agent with optional session memory (async version).
 
+    The messages produced by this turn (user message, tool calls, tool
+    results, response) are persisted in a single transaction when a
+    session is provided. If the task is cancelled, the Ollama request is
+    aborted and an empty assistant message marked as interrupted is saved.
+    Simple tool commands are answered by the intent router without the
+    LLM (see router.py); the agent is only created when needed.
+
     Args:
         query: User's question/command
         agent: Pre-created agent (optional)
         session: SessionMemory instance for conversation context (optional)
     """
+    routed = await _aroute(query)
+    if routed is not None:
+        async with _async_turn_writer(session) as turn:
+            if turn:
+                turn.add_user_message(query)
+            return _record_turn(turn, routed)
+
     if agent is None:
         agent = await create_agent_async()
 
-    # Build input messages
-    if session:
-        # Get user facts for context
-        user_facts = session.get_user_facts_formatted()
-        system_prompt = _build_system_prompt(user_facts)
+    # History and facts are read on a DB thread, not the event loop
+    input_messages = await run_read(_build_input_messages, query, session)
 
-        # Get conversation history
-        history_messages = session.get_context_messages()
+    async with _async_turn_writer(session) as turn:
+        if turn:
+            turn.add_user_message(query)
 
-        # Build full message list: system + history + new query
-        input_messages = [SystemMessage(content=system_prompt)]
-        input_messages.extend(history_messages)
-        input_messages.append(HumanMessage(content=query))
+        try:
+            result = await agent.ainvoke({"messages": input_messages}, _run_config(session))
+        except asyncio.CancelledError:
+            _record_interrupted_turn(turn, [], "")
+            raise
+        new_messages = result.get("messages", [])[len(input_messages):]
+        get_prefill_meter().record(new_messages)
+        return _record_turn(turn, new_messages)
 
-        # Save user message to DB
-        session.add_user_message(query)
-    else:
-        # No session - simple single-turn
-        input_messages = [("user", query)]
 
-    result = await agent.ainvoke({"messages": input_messages})
+async def run_agent_stream(
+    query: str,
+    agent=None,
+    session=None,
+) -> AsyncIterator[dict]:
+    """Run a query through the agent, yielding events as they are produced.
 
-    # Extract response
-    response, tool_calls = _extract_response_and_tool_calls(result)
+    Events:
+        {"type": "token", "delta": "..."}                       LLM output token(s)
+        {"type": "tool_call", "id": ..., "name": ..., "args": ...}  Agent called a tool
+        {"type": "tool_result", "id": ..., "name": ..., "content": ...}  Tool returned
+        {"type": "done", "content": "...", "prefill_tokens": n}  Final response (n: prompt
+                                                                tokens Ollama evaluated, not cached)
 
-    # Save assistant response if session provided
-    if session:
-        session.add_assistant_message(response, tool_calls if tool_calls else None)
-
-        # Save tool messages if any
-        for msg in result.get("messages", []):
-            if msg.type == "tool":
-                # MCP tools may return content as list, convert to string
-                tool_content = msg.content
-                if isinstance(tool_content, list):
-                    tool_content = "\n".join(str(item) for item in tool_content)
-                elif not isinstance(tool_content, str):
-                    tool_content = str(tool_content)
-
-                session.add_tool_message(
-                    tool_name=getattr(msg, "name", "unknown"),
-                    content=tool_content,
-                    tool_call_id=getattr(msg, "tool_call_id", ""),
-                )
+    The turn is persisted like run_agent_async() once the stream finishes.
+    A command answered by the intent router yields its tool events and
+    the whole reply as one token event.
 
-    return response
+    Cancelling the consuming task, or closing the stream with aclose(),
+    interrupts the turn: the Ollama request is aborted, tool calls that
+    have not started are dropped, and the reply streamed so far is saved
+    as an assistant message with {"interrupted": true} metadata.
+
+    Args:
+        query: User's question/command
+        agent: Pre-created agent (optional)
+        session: SessionMemory instance for conversation context (optional)
+    """
+    routed = await _aroute(query)
+    if routed is not None:
+        async with _async_turn_writer(session) as turn:
+            if turn:
+                turn.add_user_message(query)
+            response = _record_turn(turn, routed)
+        for msg in routed:
+            for event in _message_events(msg):
+                yield event
+        yield {"type": "token", "delta": response}
+        yield {"type": "done", "content": response, "prefill_tokens": 0}
+        return
+
+    if agent is None:
+        agent = await create_agent_async()
+
+    # History and facts are read on a DB thread, not the event loop
+    input_messages = await run_read(_build_input_messages, query, session)
+    new_messages = []
+    partial: list[str] = []  # Tokens of the reply currently being generated
+
+    async with _async_turn_writer(session) as turn:
+        if turn:
+            turn.add_user_message(query)
+
+        try:
+            async for mode, chunk in agent.astream(
+                {"messages": input_messages},
+                _run_config(session),
+                stream_mode=["messages", "updates"],
+            ):
+                if mode == "messages":
+                    # Token-level chunks from the LLM node
+                    message, metadata = chunk
+                    if (
+                        metadata.get("langgraph_node") == "agent"
+                        and isinstance(message.content, str)
+                        and message.content
+                    ):
+                        partial.append(message.content)
+                        yield {"type": "token", "delta": message.content}
+                    continue
+
+                # "updates": complete messages added by each graph node
+                for update in chunk.values():
+                    if not isinstance(update, dict):
+                        continue
+                    for msg in update.get("messages", []):
+                        new_messages.append(msg)
+                        if msg.type == "ai":
+                            partial.clear()
+                        for event in _message_events(msg):
+                            yield event
+        except (asyncio.CancelledError, GeneratorExit):
+            _record_interrupted_turn(turn, new_messages, "".join(partial))
+            raise
+
+        response = _record_turn(turn, new_messages)
+
+    prefill = get_prefill_meter().record(new_messages)
+    yield {"type": "done", "content": response, "prefill_tokens": prefill.prefill_tokens}
+
+
+def _message_events(msg) -> list[dict]:
+    """Build tool_call / tool_result stream events for a completed message."""
+    if msg.type == "ai":
+        return [
+            {
+                "type": "tool_call",
+                "id": tc.get("id", ""),
+                "name": tc.get("name", ""),
+                "args": tc.get("args", {}),
+            }
+            for tc in (getattr(msg, "tool_calls", None) or [])
+        ]
+
+    if msg.type == "tool":
+        return [{
+            "type": "tool_result",
+            "id": getattr(msg, "tool_call_id", ""),
+            "name": getattr(msg, "name", None) or "unknown",
+            "content": _message_text(msg.content),
+        }]
+
+    return []
 
 
 def run_agent(
@@ -177,60 +546,37 @@ def run_agent(
 ) -> str:
     """Run a query through the agent with optional session memory (sync version).
 
+    The messages produced by this turn (user message, tool calls, tool
+    results, response) are persisted in a single transaction when a
+    session is provided. Simple tool commands are answered by the intent
+    router without the LLM (see router.py).
+
     Args:
         query: User's question/command
         agent: Pre-created agent (optional)
         session: SessionMemory instance for conversation context (optional)
     """
+    router = get_intent_router()
+    routed = router.route(query) if router else None
+    if routed is not None:
+        with _turn_writer(session) as turn:
+            if turn:
+                turn.add_user_message(query)
+            return _record_turn(turn, routed)
+
     if agent is None:
         agent = create_agent()
 
-    # Build input messages
-    if session:
-        # Get user facts for context
-        user_facts = session.get_user_facts_formatted()
-        system_prompt = _build_system_prompt(user_facts)
-
-        # Get conversation history
-        history_messages = session.get_context_messages()
-
-        # Build full message list: system + history + new query
-        input_messages = [SystemMessage(content=system_prompt)]
-        input_messages.extend(history_messages)
-        input_messages.append(HumanMessage(content=query))
+    input_messages = _build_input_messages(query, session)
 
-        # Save user message to DB
-        session.add_user_message(query)
-    else:
-        # No session - simple single-turn
-        input_messages = [("user", query)]
-
-    result = agent.invoke({"messages": input_messages})
+    with _turn_writer(session) as turn:
+        if turn:
+            turn.add_user_message(query)
 
-    # Extract response
-    response, tool_calls = _extract_response_and_tool_calls(result)
-
-    # Save assistant response if session provided
-    if session:
-        session.add_assistant_message(response, tool_calls if tool_calls else None)
-
-        # Save tool messages if any
-        for msg in result.get("messages", []):
-            if msg.type == "tool":
-                # MCP tools may return content as list, convert to string
-                tool_content = msg.content
-                if isinstance(tool_content, list):
-                    tool_content = "\n".join(str(item) for item in tool_content)
-                elif not isinstance(tool_content, str):
-                    tool_content = str(tool_content)
-
-                session.add_tool_message(
-                    tool_name=getattr(msg, "name", "unknown"),
-                    content=tool_content,
-                    tool_call_id=getattr(msg, "tool_call_id", ""),
-                )
-
-    return response
+        result = agent.invoke({"messages": input_messages}, _run_config(session))
+        new_messages = result.get("messages", [])[len(input_messages):]
+        get_prefill_meter().record(new_messages)
+        return _record_turn(turn, new_messages)
 
 
 def run_agent_with_mcp(query: str, session=None) -> str:
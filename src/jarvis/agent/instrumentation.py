@@ -0,0 +1,172 @@
+"""JARVIS - Agent instrumentation: tool calls and prompt prefill.
+
+Tools are instrumented with a LangChain callback handler rather than by
+replacing their functions, so built-in and MCP tools (sync or async,
+with whatever argument schema) are measured the same way and still
+behave exactly as before. Measurements go to the write-behind queue in
+jarvis.analytics.
+
+PrefillMeter reads the prompt_eval_count Ollama reports for each LLM
+call. Ollama only counts the prompt tokens it had to evaluate, not the
+ones served from its prompt cache, so the sum per turn shows whether the
+prompt prefix is being reused.
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from ..analytics import QUERY_PREVIEW, ToolCallRecord, record_tool_call
+
+
+def _args_text(input_str: str, inputs: Optional[dict]) -> str:
+    if inputs is None:
+        return input_str or ""
+    try:
+        return json.dumps(inputs, ensure_ascii=False, default=str)
+    except (TypeError, ValueError):
+        return input_str or ""
+
+
+class ToolUsageCallback(BaseCallbackHandler):
+    """Times tool runs and queues a ToolCallRecord when each one ends."""
+
+    # Only a dict update and a queue put; no need for a thread hop in async runs
+    run_inline = True
+
+    def __init__(self):
+        self._runs: dict[UUID, tuple[str, float, str]] = {}
+        self._lock = threading.Lock()
+
+    def on_tool_start(
+        self,
+        serialized: dict[str, Any],
+        input_str: str,
+        *,
+        run_id: UUID,
+        inputs: Optional[dict] = None,
+        **kwargs: Any,
+    ):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "unknown"
+        with self._lock:
+            self._runs[run_id] = (name, time.perf_counter(), _args_text(input_str, inputs))
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any):
+        self._finish(run_id, None)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._finish(run_id, error)
+
+    def _finish(self, run_id: UUID, error: Optional[BaseException]):
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        name, started, args = run
+        record_tool_call(ToolCallRecord(
+            tool_name=name,
+            duration_ms=(time.perf_counter() - started) * 1000,
+            success=error is None,
+            args_size=len(args.encode("utf-8")),
+            query=args[:QUERY_PREVIEW] or None,
+            error=type(error).__name__ if error is not None else None,
+        ))
+
+
+_callback = ToolUsageCallback()
+
+
+def instrument_tools(tools: list) -> list:
+    """Attach the usage callback to each tool (idempotent).
+
+    Args:
+        tools: LangChain tools (built-in or from MCP servers)
+
+    Returns:
+        The same tools, for chaining
+    """
+    for tool in tools:
+        callbacks = tool.callbacks
+        if callbacks is None:
+            tool.callbacks = [_callback]
+        elif isinstance(callbacks, list):
+            if _callback not in callbacks:
+                callbacks.append(_callback)
+        elif _callback not in callbacks.handlers:
+            # A callback manager
+            callbacks.add_handler(_callback, inherit=False)
+    return tools
+
+
+# Turns kept for the prefill stats
+PREFILL_HISTORY = 200
+
+
+@dataclass
+class TurnPrefill:
+    llm_calls: int = 0
+    prefill_tokens: int = 0  # Prompt tokens Ollama evaluated (not cached)
+    prefill_ms: float = 0.0
+    output_tokens: int = 0
+
+
+def measure_prefill(new_messages: list) -> TurnPrefill:
+    """Sum Ollama's prompt evaluation counters over a turn's AI messages."""
+    prefill = TurnPrefill()
+    for msg in new_messages:
+        if msg.type != "ai":
+            continue
+        metadata = getattr(msg, "response_metadata", None) or {}
+        usage = getattr(msg, "usage_metadata", None) or {}
+        tokens = metadata.get("prompt_eval_count", usage.get("input_tokens"))
+        if tokens is None:
+            continue
+        prefill.llm_calls += 1
+        prefill.prefill_tokens += tokens
+        prefill.prefill_ms += (metadata.get("prompt_eval_duration") or 0) / 1e6
+        prefill.output_tokens += metadata.get("eval_count", usage.get("output_tokens")) or 0
+    return prefill
+
+
+class PrefillMeter:
+    """Prefill of the most recent turns (in memory)."""
+
+    def __init__(self, history: int = PREFILL_HISTORY):
+        self._turns: deque[TurnPrefill] = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    def record(self, new_messages: list) -> TurnPrefill:
+        """Measure a finished turn and keep it for stats()."""
+        prefill = measure_prefill(new_messages)
+        if prefill.llm_calls:
+            with self._lock:
+                self._turns.append(prefill)
+        return prefill
+
+    def stats(self) -> dict:
+        with self._lock:
+            turns = list(self._turns)
+        if not turns:
+            return {"turns": 0}
+        tokens = sorted(t.prefill_tokens for t in turns)
+        return {
+            "turns": len(turns),
+            "avg_prefill_tokens": sum(tokens) / len(turns),
+            "p50_prefill_tokens": tokens[(len(tokens) - 1) // 2],
+            "max_prefill_tokens": tokens[-1],
+            "avg_prefill_ms": sum(t.prefill_ms for t in turns) / len(turns),
+            "last": asdict(turns[-1]),
+        }
+
+
+_prefill_meter = PrefillMeter()
+
+
+def get_prefill_meter() -> PrefillMeter:
+    return _prefill_meter
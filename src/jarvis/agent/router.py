@@ -0,0 +1,312 @@
+"""JARVIS - Deterministic fast path for trivial tool commands.
+
+"what is 15*7" or "remind me in 10m to stretch" would otherwise cost two
+LLM calls: one to pick the tool, one to phrase its result. The router
+runs before the agent: each rule recognizes one kind of command and
+returns the tool arguments with a confidence. When the best match clears
+the threshold (router.min_confidence in config), the tool is called
+directly and the reply comes from the rule's template. Anything else,
+or a tool result that looks like an error, goes to the LLM as before.
+
+Rules are pluggable: subclass IntentRule (or use PatternRule with a
+regex) and pass it to IntentRouter.add_rule().
+"""
+
+import re
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import suppress
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from langchain_core.messages import AIMessage, ToolMessage
+
+from ..config import get_config
+from .instrumentation import instrument_tools
+from .tools import ALL_TOOLS
+
+# Tool results starting with these are failures; the LLM takes over
+FAILURE_PREFIXES = ("Error", "Could not")
+
+
+@dataclass
+class IntentMatch:
+    tool_name: str
+    args: dict
+    confidence: float  # 0-1
+    template: str  # Reply, formatted with the args and {result}
+    rule: str = ""
+
+
+class IntentRule(ABC):
+    """Recognizes one kind of command.
+
+    Subclasses implement match(); it sees the query lowercased with
+    surrounding whitespace and trailing punctuation removed, plus the
+    original text for arguments whose case matters.
+    """
+
+    name: str  # Reported in the match
+
+    @abstractmethod
+    def match(self, text: str, original: str) -> Optional[IntentMatch]:
+        """The rule's match for the command, or None."""
+
+
+@dataclass
+class PatternRule(IntentRule):
+    """Regex rule: named groups become tool arguments.
+
+    Args:
+        name: Rule name (reported in the match)
+        tool_name: Tool to call
+        patterns: Regexes tried in order against the normalized text; the
+            first to match fully wins
+        template: Reply template (args and {result})
+        confidence: Confidence of a match
+        build_args: Turns the match groups into tool arguments, or None to
+            reject the match (default: the named groups, stripped)
+    """
+
+    name: str
+    tool_name: str
+    patterns: list[str]
+    template: str = "{result}"
+    confidence: float = 0.95
+    build_args: Optional[Callable[[dict], Optional[dict]]] = None
+    _compiled: list[re.Pattern] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self._compiled = [re.compile(p, re.IGNORECASE) for p in self.patterns]
+
+    def match(self, text: str, original: str) -> Optional[IntentMatch]:
+        for pattern in self._compiled:
+            found = pattern.fullmatch(text)
+            if not found:
+                continue
+            # Take argument text from the original so its case is kept
+            groups = {
+                key: original[found.start(key):found.end(key)].strip()
+                for key, value in found.groupdict().items()
+                if value is not None
+            }
+            args = self.build_args(groups) if self.build_args else groups
+            if args is None:
+                return None
+            return IntentMatch(self.tool_name, args, self.confidence, self.template, self.name)
+        return None
+
+
+# Calculator: "what is 15*7", "calculate (2+3)/4", "15 times 7"
+
+_WORD_OPERATORS = (
+    (r"\bmultiplied by\b|\btimes\b|\bx\b|×", "*"),
+    (r"\bdivided by\b|\bover\b|÷", "/"),
+    (r"\bplus\b|\badd\b", "+"),
+    (r"\bminus\b|\bsubtract\b", "-"),
+)
+_MATH_PREFIX = re.compile(
+    r"^(?:(?:hey |ok )?jarvis,? )?(?:what(?: is|'s)|whats|calculate|compute|how much is|solve|evaluate)\s+"
+)
+_EXPRESSION = re.compile(r"[\d.\s()+\-*/]+")
+_BINARY_OPERATION = re.compile(r"\d\s*\)*\s*[+\-*/]\s*\(*\s*-?\d")
+# "555-1234", "2024-10-16", "3/4", "10-15": numbers, dates and ranges
+# more often than arithmetic unless the query asks for a calculation
+_AMBIGUOUS_OPERATOR = re.compile(r"\d[-/]\d")
+
+
+class CalculatorRule(IntentRule):
+    """Arithmetic on numbers only, with or without a question around it.
+
+    Without a question ("what is", "calculate", ...), "-" and "/" between
+    digits must have spaces around them: "555-1234" is a phone number.
+    """
+
+    name = "calculator"
+
+    def match(self, text: str, original: str) -> Optional[IntentMatch]:
+        expression = _MATH_PREFIX.sub("", text)
+        prefixed = expression != text
+        expression = expression.rstrip("= ")
+
+        confidence = 0.95
+        for pattern, operator in _WORD_OPERATORS:
+            expression, count = re.subn(pattern, f" {operator} ", expression)
+            if count:
+                confidence = 0.9  # Spoken operators are slightly less certain
+        expression = " ".join(expression.split())
+
+        if not _EXPRESSION.fullmatch(expression) or not _BINARY_OPERATION.search(expression):
+            return None
+        if "**" in expression:
+            return None  # Powers can take forever to evaluate; the LLM can decline
+        if not prefixed and _AMBIGUOUS_OPERATOR.search(expression):
+            return None
+        if not prefixed and not text[0].isdigit() and text[0] != "(":
+            confidence -= 0.1
+        return IntentMatch("calculator", {"expression": expression}, confidence, "{expression} is {result}.", self.name)
+
+
+# Reminders: "remind me in 10m to stretch", "remind me to call mom in 2 hours"
+
+_DURATION = r"\d+\s*(?:h|hrs?|hours?|m|mins?|minutes?|s|secs?|seconds?)(?:\s*(?:and\s*)?\d+\s*(?:m|mins?|minutes?))?"
+_DURATION_PART = re.compile(r"(\d+)\s*([hms])")
+
+
+def _reminder_args(groups: dict) -> Optional[dict]:
+    message = groups["message"]
+    if not message or "?" in message or len(message) > 200:
+        return None
+    # "1 hour and 30 minutes" -> "1h30m", the format reminder_set documents
+    when = "".join(f"{n}{unit}" for n, unit in _DURATION_PART.findall(groups["when"].lower()))
+    return {"message": message, "time_from_now": when}
+
+
+# Notes: "save a note: buy milk", "take a note that the wifi password changed".
+# The content must follow ":", "," or "that"/"saying": "take note of this"
+# and "add a note to my calendar" aren't dictating a note.
+
+def _note_args(groups: dict) -> Optional[dict]:
+    content = groups["content"]
+    return {"content": content} if len(content) >= 3 else None
+
+
+DEFAULT_RULES: list[IntentRule] = [
+    CalculatorRule(),
+    PatternRule(
+        name="reminder_set",
+        tool_name="reminder_set",
+        patterns=[
+            rf"(?:please )?(?:remind me|set a reminder) (?:in|after) (?P<when>{_DURATION}),? (?:to|that|about) (?P<message>.+)",
+            rf"(?:please )?(?:remind me|set a reminder) (?:to|that|about) (?P<message>.+?) (?:in|after) (?P<when>{_DURATION})",
+        ],
+        template="Okay. {result}.",
+        build_args=_reminder_args,
+    ),
+    PatternRule(
+        name="reminder_list",
+        tool_name="reminder_list",
+        patterns=[
+            r"(?:list|show|check|read)(?: me)?(?: all)?(?: my)?(?: pending)? reminders",
+            r"what (?:are|is) (?:my|the)(?: pending)? reminders?",
+            r"do i have any(?: pending)? reminders",
+        ],
+    ),
+    PatternRule(
+        name="note_save",
+        tool_name="note_save",
+        patterns=[r"(?:please )?(?:save|take|make|add) (?:a |this )?note(?:\s*[:,]\s*|\s+(?:that|saying)\s+)(?P<content>.+)"],
+        template="Saved the note.",
+        confidence=0.9,
+        build_args=_note_args,
+    ),
+]
+
+
+def _normalize(query: str) -> str:
+    return query.strip().rstrip("?.!").strip()
+
+
+class IntentRouter:
+    """Routes high-confidence commands straight to a tool."""
+
+    def __init__(
+        self,
+        tools: Optional[list] = None,
+        rules: Optional[list[IntentRule]] = None,
+        min_confidence: Optional[float] = None,
+    ):
+        """Initialize the router.
+
+        Args:
+            tools: Tools rules may call (default: ALL_TOOLS)
+            rules: Rules to try (default: DEFAULT_RULES)
+            min_confidence: Lowest confidence routed without the LLM
+                (default: router.min_confidence from config)
+        """
+        config = get_config().router
+        self.min_confidence = config.min_confidence if min_confidence is None else min_confidence
+        self.tools = {t.name: t for t in instrument_tools(list(tools if tools is not None else ALL_TOOLS))}
+        self.rules = list(DEFAULT_RULES if rules is None else rules)
+
+    def add_rule(self, rule: IntentRule):
+        self.rules.append(rule)
+
+    def match(self, query: str) -> Optional[IntentMatch]:
+        """Best match at or above the threshold, or None for the LLM."""
+        original = _normalize(query)
+        text = original.lower()
+        if not text:
+            return None
+        if len(text) != len(original):
+            original = text  # Lowercasing changed offsets; arguments come out lowercased
+
+        best = None
+        for rule in self.rules:
+            found = rule.match(text, original)
+            if found is None or found.tool_name not in self.tools:
+                continue
+            if best is None or found.confidence > best.confidence:
+                best = found
+        if best is None or best.confidence < self.min_confidence:
+            return None
+        return best
+
+    def route(self, query: str) -> Optional[list]:
+        """Answer a command without the LLM (blocking).
+
+        Returns:
+            The messages the agent would have produced (tool call, tool
+            result, reply), or None to use the agent
+        """
+        found = self.match(query)
+        if found is None:
+            return None
+        # A failing tool is recorded in the tool usage stats like any other
+        # call (see instrumentation); the agent then handles the query
+        with suppress(Exception):
+            return _reply_messages(found, self.tools[found.tool_name].invoke(found.args))
+        return None
+
+    async def aroute(self, query: str) -> Optional[list]:
+        """Async version of route()."""
+        found = self.match(query)
+        if found is None:
+            return None
+        with suppress(Exception):
+            return _reply_messages(found, await self.tools[found.tool_name].ainvoke(found.args))
+        return None
+
+
+def _reply_messages(found: IntentMatch, result) -> Optional[list]:
+    result = str(result)
+    if result.startswith(FAILURE_PREFIXES):
+        return None
+
+    call_id = f"call_{uuid.uuid4().hex[:12]}"
+    reply = found.template.format(**found.args, result=result)
+    return [
+        AIMessage(
+            content="",
+            tool_calls=[{"name": found.tool_name, "args": found.args, "id": call_id, "type": "tool_call"}],
+        ),
+        ToolMessage(content=result, tool_call_id=call_id, name=found.tool_name),
+        AIMessage(content=reply),
+    ]
+
+
+_router: Optional[IntentRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_intent_router() -> Optional[IntentRouter]:
+    """Process-wide router over ALL_TOOLS, or None if disabled in config."""
+    global _router
+    if not get_config().router.enabled:
+        return None
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = IntentRouter()
+    return _router
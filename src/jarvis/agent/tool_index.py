@@ -0,0 +1,144 @@
+"""JARVIS - Per-turn tool selection from a local lexical index.
+
+Every tool bound to the agent has its JSON schema rendered into the
+prompt, so each MCP server adds hundreds of prompt tokens to every LLM
+call whether or not the turn needs it. ToolIndex is a small BM25 index
+over each tool's name, description and argument names; ToolSelector
+binds the pinned tools (the built-ins by default), the top_k others
+that match the query, and the tools the conversation window already
+called, so follow-ups ("search that again in more detail") keep them.
+
+A different tool set is a different prompt prefix, so Ollama can't
+reuse its cache across it (see memory.window_drop). Selected tools keep
+their load order and the pinned set never changes: every turn that
+needs no extra tool renders exactly the same tools, and shares one
+cached agent graph.
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Iterable, Optional
+
+from ..config import get_config
+
+# BM25 parameters (the usual defaults)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Name tokens count this many times: "weather" in a tool's name says more
+# than "weather" somewhere in its description
+NAME_WEIGHT = 3
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do for from get how i if in into is it its me my of on or "
+    "please show some tell that the this to use using what when where which with you your".split()
+)
+_CAMEL_CASE = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _stem(word: str) -> str:
+    """Crude suffix stripping so "searches"/"searching" match "search"."""
+    for suffix in ("ing", "es", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3 and not word.endswith("ss"):
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word stems of text, with names like web_search_exa split."""
+    words = _WORD.findall(_CAMEL_CASE.sub(" ", text).lower())
+    return [_stem(word) for word in words if word not in _STOPWORDS]
+
+
+def _tool_terms(tool) -> list[str]:
+    """Index terms of a tool: name (weighted), description, argument names."""
+    terms = tokenize(tool.name) * NAME_WEIGHT
+    terms += tokenize(tool.description or "")
+    try:
+        args = tool.args
+    except Exception:
+        args = {}  # Some MCP schemas can't be converted; the name still counts
+    for name, schema in (args or {}).items():
+        terms += tokenize(name)
+        if isinstance(schema, dict):
+            terms += tokenize(schema.get("description", ""))
+    return terms
+
+
+class ToolIndex:
+    """BM25 index over tools, built once per tool list."""
+
+    def __init__(self, tools: list):
+        self.tools = list(tools)
+        self._terms = [Counter(_tool_terms(tool)) for tool in self.tools]
+        self._lengths = [sum(terms.values()) for terms in self._terms]
+        self._avg_length = (sum(self._lengths) / len(self._lengths) if self._lengths else 0.0) or 1.0
+
+        document_frequency = Counter(term for terms in self._terms for term in terms)
+        count = len(self.tools)
+        # The +1 keeps terms found in most tools slightly positive
+        self._idf = {
+            term: math.log(1 + (count - df + 0.5) / (df + 0.5))
+            for term, df in document_frequency.items()
+        }
+
+    def scores(self, query: str) -> list[float]:
+        """BM25 score of each tool (in index order) for the query."""
+        query_terms = set(tokenize(query)) & self._idf.keys()
+        scores = []
+        for terms, length in zip(self._terms, self._lengths):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / self._avg_length)
+            score = 0.0
+            for term in query_terms:
+                frequency = terms.get(term, 0)
+                if frequency:
+                    score += self._idf[term] * frequency * (BM25_K1 + 1) / (frequency + norm)
+            scores.append(score)
+        return scores
+
+    def search(self, query: str, top_k: int) -> list[tuple[float, object]]:
+        """The top_k tools matching the query, best first (score > 0 only)."""
+        ranked = sorted(
+            ((score, position) for position, score in enumerate(self.scores(query)) if score > 0),
+            key=lambda item: (-item[0], item[1]),
+        )
+        return [(score, self.tools[position]) for score, position in ranked[:top_k]]
+
+
+class ToolSelector:
+    """Chooses the tools bound for one turn."""
+
+    def __init__(
+        self,
+        tools: list,
+        pinned: Iterable[str] = (),
+        top_k: Optional[int] = None,
+    ):
+        """Initialize the selector.
+
+        Args:
+            tools: Every tool the agent may use, in load order
+            pinned: Names of tools bound on every turn
+            top_k: Other tools bound per turn (default: tool_selection.top_k
+                from config)
+        """
+        self.tools = list(tools)
+        self.pinned = frozenset(pinned)
+        self.top_k = get_config().tool_selection.top_k if top_k is None else top_k
+        self.index = ToolIndex([tool for tool in self.tools if tool.name not in self.pinned])
+
+    def select(self, query: str, used: Iterable[str] = ()) -> list:
+        """Tools for a turn, in load order.
+
+        Args:
+            query: The user's message
+            used: Names of tools called in the history sent with it
+
+        Returns:
+            Pinned tools, tools in `used`, and the top_k matches for the query
+        """
+        names = set(self.pinned) | set(used)
+        names.update(tool.name for _, tool in self.index.search(query, self.top_k))
+        return [tool for tool in self.tools if tool.name in names]
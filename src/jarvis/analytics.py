@@ -0,0 +1,190 @@
+"""JARVIS - Write-behind recording of tool call analytics.
+
+Every tool call is timed (see agent/instrumentation.py). Writing a row
+per call would put a commit, and a wait for the SQLite write lock, on
+the path of the agent turn. Instead, calls are put on a bounded
+in-memory queue and a background thread inserts them in batches: once
+BATCH_SIZE records are waiting, or FLUSH_INTERVAL seconds after the
+first one arrived.
+
+Recording never blocks: when the queue is full (the database is stuck)
+records are dropped and counted. Records still queued at exit are
+flushed by an atexit hook; a hard kill loses at most one interval.
+
+The writer thread also folds the raw rows into the minute/hour/day
+rollups every ROLLUP_INTERVAL seconds.
+"""
+
+import atexit
+import queue
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Optional
+
+from . import database, rollups
+
+# Records inserted per transaction, and the longest a record waits
+BATCH_SIZE = 200
+FLUSH_INTERVAL = 1.0
+
+# Seconds between rollup passes (see rollups.py) while the writer runs
+ROLLUP_INTERVAL = 60.0
+
+# Records held in memory before new ones are dropped
+MAX_QUEUED = 10_000
+
+# Characters of the tool arguments kept in tool_usage.query
+QUERY_PREVIEW = 200
+
+
+def _utc_now() -> str:
+    """Timestamp in the format SQLite's CURRENT_TIMESTAMP uses."""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+@dataclass
+class ToolCallRecord:
+    tool_name: str
+    duration_ms: float
+    success: bool = True
+    args_size: int = 0  # Bytes of JSON-encoded arguments
+    query: Optional[str] = None  # Argument preview
+    error: Optional[str] = None  # Exception type for failed calls
+    used_at: str = field(default_factory=_utc_now)
+
+
+class ToolUsageWriter:
+    """Bounded queue of tool call records drained by a writer thread."""
+
+    def __init__(
+        self,
+        batch_size: int = BATCH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL,
+        max_queued: int = MAX_QUEUED,
+        rollup_interval: float = ROLLUP_INTERVAL,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.rollup_interval = rollup_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queued)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def record(self, record: ToolCallRecord):
+        """Queue a record for writing (never blocks)."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Write everything queued so far.
+
+        Returns:
+            False if the writer didn't catch up within the timeout
+        """
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                thread = threading.Thread(target=self._run, name="jarvis-tool-usage", daemon=True)
+                thread.start()
+                self._thread = thread
+
+    def _run(self):
+        batch: list[ToolCallRecord] = []
+        waiters: list[threading.Event] = []
+        deadline = None
+        next_rollup = time.monotonic() + self.rollup_interval
+        while True:
+            wake = next_rollup if deadline is None else min(deadline, next_rollup)
+            try:
+                item = self._queue.get(timeout=max(0.0, wake - time.monotonic()))
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, threading.Event):
+                waiters.append(item)
+            elif item is not None:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            now = time.monotonic()
+            if waiters or len(batch) >= self.batch_size or (deadline is not None and now >= deadline):
+                self._write(batch)
+                batch, deadline = [], None
+                for waiter in waiters:
+                    waiter.set()
+                waiters = []
+            if now >= next_rollup:
+                self._roll_up()
+                next_rollup = now + self.rollup_interval
+
+    def _write(self, batch: list[ToolCallRecord]):
+        if not batch:
+            return
+        try:
+            database.log_tool_usages([asdict(record) for record in batch])
+            self.written += len(batch)
+        except Exception as e:
+            # Analytics must never take the assistant down
+            self.failed += len(batch)
+            print(f"[Analytics] Failed to write {len(batch)} tool usage records: {e}")
+
+    def _roll_up(self):
+        try:
+            rollups.roll_up()
+        except Exception as e:
+            print(f"[Analytics] Tool usage rollup failed: {e}")
+
+
+_writer: Optional[ToolUsageWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_tool_usage_writer() -> ToolUsageWriter:
+    """Process-wide writer (created on first use, flushed at exit)."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = ToolUsageWriter()
+                atexit.register(_writer.flush)
+    return _writer
+
+
+def record_tool_call(record: ToolCallRecord):
+    """Queue a tool call record on the process-wide writer."""
+    get_tool_usage_writer().record(record)
+
+
+def flush_tool_usage(timeout: float = 5.0) -> bool:
+    """Write queued tool call records now (e.g. before reading stats)."""
+    if _writer is None:
+        return True
+    return _writer.flush(timeout)
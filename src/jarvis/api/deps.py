@@ -1,14 +1,27 @@
 """JARVIS API - Shared dependencies."""
 
-from typing import Optional
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
 
 from fastapi import Depends
 
+from ..config import get_config
+from ..utils.errors import BusyError
 from .auth import verify_token
 
 # Global agent instance (lazy loaded)
 _agent = None
 _agent_with_mcp = None
+_agent_lock = asyncio.Lock()
+
+# Queue priorities (lower runs first)
+PRIORITY_INTERACTIVE = 0  # WebSocket / streaming clients waiting on tokens
+PRIORITY_DEFAULT = 10  # Blocking POST /chat
 
 
 async def get_agent(use_mcp: bool = False):
@@ -24,31 +37,170 @@ async def get_agent(use_mcp: bool = False):
     """
     global _agent, _agent_with_mcp
 
-    if use_mcp:
-        if _agent_with_mcp is None:
-            from ..agent import create_agent_async
-            print("[API] Loading agent with MCP tools...")
-            _agent_with_mcp = await create_agent_async()
-        return _agent_with_mcp
-    else:
-        if _agent is None:
-            from ..agent import create_agent
-            print("[API] Loading agent...")
-            _agent = create_agent()
-        return _agent
-
-
-def get_session(conversation_id: Optional[str] = None):
+    # Concurrent first requests share one agent instead of each building one
+    async with _agent_lock:
+        if use_mcp:
+            if _agent_with_mcp is None:
+                from ..agent import create_agent_async
+                print("[API] Loading agent with MCP tools...")
+                _agent_with_mcp = await create_agent_async()
+            return _agent_with_mcp
+        else:
+            if _agent is None:
+                from ..agent import create_agent
+                print("[API] Loading agent...")
+                _agent = create_agent()
+            return _agent
+
+
+class AgentExecutionPool:
+    """Admission control for agent runs.
+
+    At most `max_concurrent` runs reach Ollama at once; further requests
+    wait in a priority queue (FIFO within a priority). When the queue is
+    full, or a request waits longer than `queue_timeout`, BusyError is
+    raised so the route can answer 429 instead of piling more work on the
+    GPU.
+    """
+
+    # Recent wait times kept for percentile metrics
+    WAIT_SAMPLES = 1000
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self._active = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+        self._wait_ms: deque[float] = deque(maxlen=self.WAIT_SAMPLES)
+        self._admitted = 0
+        self._rejected = 0
+        self._timed_out = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of requests waiting for a slot."""
+        return sum(1 for _, _, fut in self._waiters if not fut.done())
+
+    @property
+    def is_full(self) -> bool:
+        """True if a new request would be rejected right now."""
+        return self._active >= self.max_concurrent and self.queue_depth >= self.max_queue
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_DEFAULT) -> AsyncIterator[None]:
+        """Hold an execution slot for the duration of the block.
+
+        Raises:
+            BusyError: If the queue is full or the wait timed out
+        """
+        await self._acquire(priority)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, priority: int):
+        start = time.perf_counter()
+
+        if self._active < self.max_concurrent and not self.queue_depth:
+            self._active += 1
+            self._record_admit(start)
+            return
+
+        if self.queue_depth >= self.max_queue:
+            self._rejected += 1
+            raise BusyError(f"{self.queue_depth} requests already queued")
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                # Slot was handed over just as we timed out; give it back
+                self._release()
+            future.cancel()
+            self._timed_out += 1
+            raise BusyError(f"waited more than {self.queue_timeout:.0f}s for the agent")
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release()
+            future.cancel()
+            raise
+
+        # _release() handed its slot to us (active count unchanged)
+        self._record_admit(start)
+
+    def _release(self):
+        # Hand the slot to the next live waiter, or free it
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._active -= 1
+
+    def _record_admit(self, start: float):
+        self._admitted += 1
+        self._wait_ms.append((time.perf_counter() - start) * 1000)
+
+    def stats(self) -> dict:
+        """Queue depth, concurrency and wait-time metrics."""
+        waits = sorted(self._wait_ms)
+
+        def pct(p: float) -> float:
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, int(len(waits) * p))], 1)
+
+        return {
+            "active": self._active,
+            "queued": self.queue_depth,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "admitted": self._admitted,
+            "rejected": self._rejected,
+            "timed_out": self._timed_out,
+            "wait_ms": {"p50": pct(0.50), "p95": pct(0.95), "max": round(waits[-1], 1) if waits else 0.0},
+        }
+
+
+# Global execution pool (lazy loaded)
+_pool: Optional[AgentExecutionPool] = None
+
+
+def get_execution_pool() -> AgentExecutionPool:
+    """Get the shared agent execution pool (sized from config)."""
+    global _pool
+    if _pool is None:
+        api_config = get_config().api
+        _pool = AgentExecutionPool(
+            max_concurrent=api_config.max_concurrent_generations,
+            max_queue=api_config.max_queue_size,
+            queue_timeout=api_config.queue_timeout,
+        )
+    return _pool
+
+
+async def get_session(conversation_id: Optional[str] = None):
     """Get or create a session memory instance.
 
+    Creating a session reads or inserts the conversation row, so it runs
+    on the database writer thread instead of the event loop.
+
     Args:
         conversation_id: Optional conversation ID to resume
 
     Returns:
         SessionMemory instance
     """
+    from ..async_database import run_write
     from ..memory import SessionMemory
-    return SessionMemory(conversation_id=conversation_id)
+    return await run_write(SessionMemory, conversation_id=conversation_id)
 
 
 # Dependency for protected routes
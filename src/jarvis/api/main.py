@@ -7,7 +7,10 @@ from typing import AsyncGenerator
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from .routes import chat, conversations, status, reminders, notes, mcp, voice
+from ..analytics import flush_tool_usage
+from ..backup import BackupScheduler
+from ..database import close_connections, resume_search_backfill
+from .routes import backup, chat, conversations, status, reminders, notes, mcp, voice, search, stats, transfer
 
 
 @asynccontextmanager
@@ -16,13 +19,24 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     # Startup
     print("[API] Starting JARVIS API server...")
 
+    # Finish indexing older messages for search if a previous run stopped early
+    resume_search_backfill()
+
     # Initialize agent (lazy load on first request instead)
     # This avoids loading heavy models if not needed immediately
 
+    # Scheduled snapshots (backup.schedule_hours in config)
+    backup_scheduler = BackupScheduler()
+    if backup_scheduler.start():
+        print(f"[API] Database snapshots every {backup_scheduler.config.schedule_hours}h")
+
     yield
 
     # Shutdown
     print("[API] Shutting down JARVIS API server...")
+    backup_scheduler.stop()
+    flush_tool_usage()
+    close_connections()
 
 
 def create_app() -> FastAPI:
@@ -53,16 +67,21 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "X-Prev-Cursor"],  # Conversation list paging
     )
 
     # Include routers
     app.include_router(status.router, prefix="/api/v1", tags=["status"])
     app.include_router(conversations.router, prefix="/api/v1", tags=["conversations"])
+    app.include_router(search.router, prefix="/api/v1", tags=["search"])
     app.include_router(chat.router, prefix="/api/v1", tags=["chat"])
     app.include_router(reminders.router, prefix="/api/v1", tags=["reminders"])
     app.include_router(notes.router, prefix="/api/v1", tags=["notes"])
     app.include_router(mcp.router, prefix="/api/v1", tags=["mcp"])
     app.include_router(voice.router, prefix="/api/v1", tags=["voice"])
+    app.include_router(transfer.router, prefix="/api/v1", tags=["transfer"])
+    app.include_router(stats.router, prefix="/api/v1", tags=["stats"])
+    app.include_router(backup.router, prefix="/api/v1", tags=["admin"])
 
     return app
 
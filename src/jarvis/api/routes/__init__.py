@@ -1,13 +1,17 @@
 """JARVIS API Routes."""
 
-from . import chat, conversations, mcp, notes, reminders, status, voice
+from . import backup, chat, conversations, mcp, notes, reminders, search, stats, status, transfer, voice
 
 __all__ = [
+    "backup",
     "chat",
     "conversations",
     "mcp",
     "notes",
     "reminders",
+    "search",
+    "stats",
     "status",
+    "transfer",
     "voice",
 ]
@@ -0,0 +1,65 @@
+"""JARVIS API - Database snapshot (backup) endpoints."""
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import BaseModel
+
+from ...backup import get_backup_dir, get_backup_status, list_snapshots, start_backup
+from ..auth import verify_token
+
+router = APIRouter()
+
+
+class BackupRequest(BaseModel):
+    compress: Optional[bool] = None  # Default: from config
+
+
+class BackupStatus(BaseModel):
+    state: str  # idle, running, done, failed
+    started_at: Optional[str] = None
+    progress: float = 0.0  # Fraction of pages copied
+    path: Optional[str] = None
+    size: Optional[int] = None
+    error: Optional[str] = None
+    snapshots: list[str] = []  # Snapshot files in the backup directory, oldest first
+
+
+def _status() -> BackupStatus:
+    job = get_backup_status()
+    return BackupStatus(
+        state=job.get("state", "idle"),
+        started_at=job.get("started_at"),
+        progress=job.get("progress", 0.0),
+        path=job.get("path"),
+        size=job.get("size"),
+        error=job.get("error"),
+        snapshots=[p.name for p in list_snapshots(get_backup_dir())],
+    )
+
+
+@router.post("/admin/backup", response_model=BackupStatus, status_code=status.HTTP_202_ACCEPTED)
+async def create_backup(
+    data: BackupRequest = BackupRequest(),
+    _: None = Depends(verify_token),
+):
+    """Start a snapshot of the database on a background thread.
+
+    Requests keep being served while it runs; poll GET /admin/backup
+    for progress.
+
+    Raises:
+        HTTPException: 409 if a snapshot is already running
+    """
+    if not start_backup(compress=data.compress):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A backup is already running",
+        )
+    return _status()
+
+
+@router.get("/admin/backup", response_model=BackupStatus)
+async def backup_status(_: None = Depends(verify_token)):
+    """Get the state of the latest snapshot and the snapshots on disk."""
+    return _status()
@@ -2,19 +2,30 @@
 
 import asyncio
 import json
-from typing import Optional
+from typing import AsyncIterator, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, status
+from fastapi import APIRouter, Depends, HTTPException, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from ...agent import run_agent, run_agent_async
+from ...agent import run_agent_async, run_agent_stream
 from ...database import get_conversation
 from ...memory import SessionMemory
 from ..auth import verify_token
-from ..deps import get_agent, get_session
+from ...utils.errors import BusyError
+from ..deps import (
+    PRIORITY_DEFAULT,
+    PRIORITY_INTERACTIVE,
+    get_agent,
+    get_execution_pool,
+    get_session,
+)
 
 router = APIRouter()
 
+# Seconds clients are told to wait after a 429
+RETRY_AFTER_SECONDS = 5
+
 
 class ChatRequest(BaseModel):
     message: str
@@ -40,18 +51,27 @@ async def chat(
 
     Returns:
         Assistant response with conversation ID
+
+    Raises:
+        HTTPException: 429 if too many requests are waiting for the agent
     """
+    pool = get_execution_pool()
+    if pool.is_full:
+        _raise_busy(BusyError("request queue is full"))
+
     # Get or create session
-    session = get_session(data.conversation_id)
+    session = await get_session(data.conversation_id)
 
     # Get agent
     agent = await get_agent(use_mcp=data.use_mcp)
 
-    # Run agent with session
-    if data.use_mcp:
-        response = await run_agent_async(data.message, agent, session=session)
-    else:
-        response = run_agent(data.message, agent, session=session)
+    # Run agent with session (async for both agents, so the event loop
+    # keeps serving other requests while the LLM generates)
+    try:
+        async with pool.slot(PRIORITY_DEFAULT):
+            response = await run_agent_async(data.message, agent, session=session)
+    except BusyError as e:
+        _raise_busy(e)
 
     return ChatResponse(
         response=response,
@@ -59,10 +79,190 @@ async def chat(
     )
 
 
+def _raise_busy(error: BusyError):
+    """Turn a BusyError into a 429 response."""
+    raise HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=error.user_message(),
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+    )
+
+
+def _sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _chat_event_stream(request: Request, query: str, agent, session) -> AsyncIterator[str]:
+    """Yield agent events as SSE, stopping generation if the client leaves."""
+    yield _sse("start", {"conversation_id": session.conversation_id})
+
+    try:
+        async with get_execution_pool().slot(PRIORITY_INTERACTIVE):
+            stream = run_agent_stream(query, agent, session=session)
+            try:
+                async for event in stream:
+                    if await request.is_disconnected():
+                        print(f"[SSE] Client disconnected, cancelling generation for {session.conversation_id}")
+                        break
+                    yield _sse(event["type"], event)
+            finally:
+                # Closing the agent stream cancels the in-flight LLM request
+                # and saves the partial reply as interrupted
+                await stream.aclose()
+    except BusyError as e:
+        yield _sse("error", {"message": e.user_message(), "code": "BUSY"})
+    except Exception as e:
+        yield _sse("error", {"message": str(e), "code": "AGENT_ERROR"})
+
+
+@router.post("/chat/stream")
+async def chat_stream(
+    data: ChatRequest,
+    request: Request,
+    _: None = Depends(verify_token),
+):
+    """Send a message and stream the response as Server-Sent Events.
+
+    Events (each `data:` is JSON):
+        start        { "conversation_id": "..." }
+        token        { "type": "token", "delta": "..." }
+        tool_call    { "type": "tool_call", "id": "...", "name": "...", "args": {...} }
+        tool_result  { "type": "tool_result", "id": "...", "name": "...", "content": "..." }
+        done         { "type": "done", "content": "...", "prefill_tokens": 0 }
+        error        { "message": "...", "code": "..." }
+
+    Disconnecting cancels the generation.
+
+    Args:
+        data: Chat request with message and optional conversation ID
+
+    Returns:
+        text/event-stream response
+
+    Raises:
+        HTTPException: 429 if too many requests are waiting for the agent
+    """
+    if get_execution_pool().is_full:
+        _raise_busy(BusyError("request queue is full"))
+
+    session = await get_session(data.conversation_id)
+    agent = await get_agent(use_mcp=data.use_mcp)
+
+    return StreamingResponse(
+        _chat_event_stream(request, data.message, agent, session),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Disable proxy buffering (nginx)
+        },
+    )
+
+
+async def _stream_to_websocket(
+    websocket: WebSocket,
+    message_id: str,
+    text: str,
+    agent,
+    session: SessionMemory,
+):
+    """Run one agent turn and forward its events to the WebSocket client."""
+    # Send start event
+    await websocket.send_json({
+        "type": "response_start",
+        "message_id": message_id,
+        "conversation_id": session.conversation_id,
+    })
+
+    response = ""
+    partial = ""
+    try:
+        # Stream tokens and tool events as the agent produces them
+        async with get_execution_pool().slot(PRIORITY_INTERACTIVE):
+            stream = run_agent_stream(text, agent, session=session)
+            try:
+                async for event in stream:
+                    if event["type"] == "token":
+                        partial += event["delta"]
+                        await websocket.send_json({
+                            "type": "response_delta",
+                            "message_id": message_id,
+                            "delta": event["delta"],
+                        })
+                    elif event["type"] in ("tool_call", "tool_result"):
+                        partial = ""
+                        tool_event = {
+                            "type": event["type"],
+                            "message_id": message_id,
+                            "tool_call_id": event["id"],
+                            "name": event["name"],
+                        }
+                        if event["type"] == "tool_call":
+                            tool_event["args"] = event["args"]
+                        else:
+                            tool_event["content"] = event["content"]
+                        await websocket.send_json(tool_event)
+                    elif event["type"] == "done":
+                        response = event["content"]
+            finally:
+                # Close the stream right away (also when cancelled between
+                # events) so the partial turn is saved before we report it
+                await stream.aclose()
+
+        # Send end event
+        await websocket.send_json({
+            "type": "response_end",
+            "message_id": message_id,
+            "content": response,
+            "conversation_id": session.conversation_id,
+        })
+
+    except asyncio.CancelledError:
+        # Interrupted by the client (or the socket closed)
+        try:
+            await websocket.send_json({
+                "type": "interrupted",
+                "message_id": message_id,
+                "content": partial,
+                "conversation_id": session.conversation_id,
+            })
+        except Exception:
+            pass
+        raise
+    except BusyError as e:
+        await websocket.send_json({
+            "type": "error",
+            "message": e.user_message(),
+            "code": "BUSY",
+        })
+    except Exception as e:
+        await websocket.send_json({
+            "type": "error",
+            "message": str(e),
+            "code": "AGENT_ERROR",
+        })
+
+
+async def _cancel_generation(task: Optional[asyncio.Task]):
+    """Cancel a running generation task and wait for it to wind down."""
+    if task is None or task.done():
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
 @router.websocket("/ws")
 async def websocket_chat(websocket: WebSocket):
     """WebSocket endpoint for real-time chat.
 
+    Generation runs as a background task, so the connection keeps reading
+    messages while a response streams. "interrupt" cancels the running
+    generation: the Ollama request is aborted, pending tool calls are
+    dropped and the partial reply is saved marked as interrupted.
+
     Protocol:
         Client → Server:
             { "action": "send_message", "text": "...", "conversation_id": "...", "use_mcp": false }
@@ -73,7 +273,10 @@ async def websocket_chat(websocket: WebSocket):
             { "type": "connected", "session_id": "..." }
             { "type": "response_start", "message_id": "..." }
             { "type": "response_delta", "message_id": "...", "delta": "..." }
+            { "type": "tool_call", "message_id": "...", "tool_call_id": "...", "name": "...", "args": {...} }
+            { "type": "tool_result", "message_id": "...", "tool_call_id": "...", "name": "...", "content": "..." }
             { "type": "response_end", "message_id": "...", "content": "..." }
+            { "type": "interrupted", "message_id": "...", "content": "..." }
             { "type": "error", "message": "...", "code": "..." }
             { "type": "pong" }
     """
@@ -93,6 +296,9 @@ async def websocket_chat(websocket: WebSocket):
     current_session: Optional[SessionMemory] = None
     current_agent = None
 
+    # Running generation, if any
+    generation: Optional[asyncio.Task] = None
+
     try:
         while True:
             # Receive message
@@ -116,13 +322,21 @@ async def websocket_chat(websocket: WebSocket):
                     })
                     continue
 
+                if generation is not None and not generation.done():
+                    await websocket.send_json({
+                        "type": "error",
+                        "message": "A response is already being generated; interrupt it first",
+                        "code": "GENERATION_IN_PROGRESS",
+                    })
+                    continue
+
                 # Get or create session
                 if conversation_id:
                     if current_session is None or current_session.conversation_id != conversation_id:
-                        current_session = SessionMemory(conversation_id=conversation_id)
+                        current_session = await get_session(conversation_id)
                 else:
                     if current_session is None:
-                        current_session = SessionMemory()
+                        current_session = await get_session()
 
                 # Get agent (lazy load)
                 if current_agent is None:
@@ -131,55 +345,20 @@ async def websocket_chat(websocket: WebSocket):
                 # Generate message ID
                 message_id = str(uuid.uuid4())[:8]
 
-                # Send start event
-                await websocket.send_json({
-                    "type": "response_start",
-                    "message_id": message_id,
-                    "conversation_id": current_session.conversation_id,
-                })
-
-                try:
-                    # Run agent
-                    # Note: For streaming, we'd need to modify the agent to yield chunks
-                    # For now, we send the full response at once
-                    if use_mcp:
-                        response = await run_agent_async(text, current_agent, session=current_session)
-                    else:
-                        # Run sync agent in thread pool to not block
-                        loop = asyncio.get_event_loop()
-                        response = await loop.run_in_executor(
-                            None,
-                            lambda: run_agent(text, current_agent, session=current_session)
-                        )
-
-                    # Send response (as single delta for now)
-                    await websocket.send_json({
-                        "type": "response_delta",
-                        "message_id": message_id,
-                        "delta": response,
-                    })
-
-                    # Send end event
-                    await websocket.send_json({
-                        "type": "response_end",
-                        "message_id": message_id,
-                        "content": response,
-                        "conversation_id": current_session.conversation_id,
-                    })
+                generation = asyncio.create_task(
+                    _stream_to_websocket(websocket, message_id, text, current_agent, current_session)
+                )
 
-                except Exception as e:
+            elif action == "interrupt":
+                if generation is not None and not generation.done():
+                    # The task reports "interrupted" with the partial reply
+                    await _cancel_generation(generation)
+                else:
                     await websocket.send_json({
-                        "type": "error",
-                        "message": str(e),
-                        "code": "AGENT_ERROR",
+                        "type": "interrupted",
+                        "message_id": None,
                     })
 
-            elif action == "interrupt":
-                # TODO: Implement interrupt for TTS/long responses
-                await websocket.send_json({
-                    "type": "interrupted",
-                })
-
             else:
                 await websocket.send_json({
                     "type": "error",
@@ -199,3 +378,6 @@ async def websocket_chat(websocket: WebSocket):
             })
         except:
             pass
+    finally:
+        # Nobody is listening any more; stop generating
+        await _cancel_generation(generation)
@@ -1,22 +1,46 @@
 """JARVIS API - Conversations endpoints."""
 
+import base64
+import binascii
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from pydantic import BaseModel
 
-from ...database import (
+from ...async_database import (
+    archive_conversation,
     create_conversation,
     get_conversation,
     get_messages,
-    list_conversations,
+    get_messages_page,
+    list_conversations_page,
     update_conversation_title,
 )
+from ...database import Conversation
 from ..auth import verify_token
 
 router = APIRouter()
 
 
+def _encode_cursor(conv: Conversation) -> str:
+    """Opaque paging cursor for a conversation's (updated_at, id) key."""
+    key = f"{conv.updated_at}|{conv.id}"
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[str, str]:
+    """Turn a cursor from _encode_cursor back into (updated_at, id)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        updated_at, conv_id = base64.urlsafe_b64decode(padded).decode().split("|", 1)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid cursor: {cursor}",
+        )
+    return updated_at, conv_id
+
+
 # Pydantic models for request/response
 class ConversationCreate(BaseModel):
     title: Optional[str] = None
@@ -44,6 +68,8 @@ class ConversationResponse(BaseModel):
     created_at: str
     updated_at: str
     archived: bool = False
+    message_count: int = 0
+    last_message_at: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -51,24 +77,66 @@ class ConversationResponse(BaseModel):
 
 class ConversationWithMessages(ConversationResponse):
     messages: list[MessageResponse]
+    has_more_messages: bool = False  # Conversation has messages past this list
+
+
+class MessagePageResponse(BaseModel):
+    messages: list[MessageResponse]
+    has_more: bool  # More messages in the paging direction
+    before: Optional[int] = None  # Cursor for the older page (first seq)
+    after: Optional[int] = None  # Cursor for the newer page (last seq)
 
 
 @router.get("/conversations", response_model=list[ConversationResponse])
 async def list_all_conversations(
-    limit: int = 50,
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
     include_archived: bool = False,
+    before: Optional[str] = Query(None, description="Cursor: return older conversations"),
+    after: Optional[str] = Query(None, description="Cursor: return newer conversations"),
     _: None = Depends(verify_token),
 ):
-    """List all conversations.
+    """List conversations, most recently updated first.
+
+    Keyset paging: while older conversations exist the response carries
+    an X-Next-Cursor header, passed back as `before` for the next page;
+    X-Prev-Cursor is passed as `after` to page back towards newer ones.
 
     Args:
         limit: Maximum number of conversations to return
         include_archived: Include archived conversations
+        before: Cursor of the last conversation seen
+        after: Cursor of the first conversation seen
 
     Returns:
         List of conversations ordered by last update
+
+    Raises:
+        HTTPException: 400 if a cursor is malformed or both are given
     """
-    conversations = list_conversations(limit=limit, include_archived=include_archived)
+    if before and after:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Use either before or after, not both",
+        )
+
+    page = await list_conversations_page(
+        limit=limit,
+        include_archived=include_archived,
+        before=_decode_cursor(before) if before else None,
+        after=_decode_cursor(after) if after else None,
+    )
+    conversations = page.conversations
+    if conversations:
+        # has_more only covers the paging direction; the cursor we came
+        # from proves there is more on the other side
+        more_older = page.has_more if not after else True
+        more_newer = page.has_more if after else bool(before)
+        if more_older:
+            response.headers["X-Next-Cursor"] = _encode_cursor(conversations[-1])
+        if more_newer:
+            response.headers["X-Prev-Cursor"] = _encode_cursor(conversations[0])
+
     return [
         ConversationResponse(
             id=c.id,
@@ -76,6 +144,8 @@ async def list_all_conversations(
             created_at=str(c.created_at),
             updated_at=str(c.updated_at),
             archived=c.archived,
+            message_count=c.message_count,
+            last_message_at=str(c.last_message_at) if c.last_message_at else None,
         )
         for c in conversations
     ]
@@ -94,8 +164,8 @@ async def create_new_conversation(
     Returns:
         Created conversation
     """
-    conv_id = create_conversation(title=data.title)
-    conv = get_conversation(conv_id)
+    conv_id = await create_conversation(title=data.title)
+    conv = await get_conversation(conv_id)
 
     return ConversationResponse(
         id=conv.id,
@@ -103,30 +173,37 @@ async def create_new_conversation(
         created_at=str(conv.created_at),
         updated_at=str(conv.updated_at),
         archived=conv.archived,
+        message_count=conv.message_count,
+        last_message_at=str(conv.last_message_at) if conv.last_message_at else None,
     )
 
 
 @router.get("/conversations/{conversation_id}", response_model=ConversationWithMessages)
 async def get_conversation_with_messages(
     conversation_id: str,
+    limit: int = Query(100, ge=1, le=1000),
     _: None = Depends(verify_token),
 ):
-    """Get a conversation with all its messages.
+    """Get a conversation with its first messages.
+
+    Long conversations are better read with
+    GET /conversations/{conversation_id}/messages.
 
     Args:
         conversation_id: Conversation ID
+        limit: Maximum number of messages to include
 
     Returns:
         Conversation with messages
     """
-    conv = get_conversation(conversation_id)
+    conv = await get_conversation(conversation_id)
     if not conv:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Conversation {conversation_id} not found",
         )
 
-    messages = get_messages(conversation_id)
+    messages = await get_messages(conversation_id, limit)
 
     return ConversationWithMessages(
         id=conv.id,
@@ -134,6 +211,67 @@ async def get_conversation_with_messages(
         created_at=str(conv.created_at),
         updated_at=str(conv.updated_at),
         archived=conv.archived,
+        message_count=conv.message_count,
+        last_message_at=str(conv.last_message_at) if conv.last_message_at else None,
+        messages=[
+            MessageResponse(
+                id=m.id,
+                role=m.role,
+                content=m.content,
+                tool_name=m.tool_name,
+                tool_args=m.tool_args,
+                created_at=str(m.created_at) if m.created_at else None,
+            )
+            for m in messages
+        ],
+        has_more_messages=conv.message_count > len(messages),
+    )
+
+
+@router.get("/conversations/{conversation_id}/messages", response_model=MessagePageResponse)
+async def list_conversation_messages(
+    conversation_id: str,
+    limit: int = Query(50, ge=1, le=500),
+    before: Optional[int] = Query(None, ge=1, description="Return messages before this seq"),
+    after: Optional[int] = Query(None, ge=0, description="Return messages after this seq"),
+    _: None = Depends(verify_token),
+):
+    """Page through a conversation's messages.
+
+    Without a cursor the newest messages are returned. Scroll back by
+    passing the response's `before` as `before`; poll for new messages
+    by passing `after` as `after`. Pages are in conversation order.
+
+    Args:
+        conversation_id: Conversation ID
+        limit: Maximum number of messages to return
+        before: Sequence number cursor (older messages)
+        after: Sequence number cursor (newer messages)
+
+    Returns:
+        One page of messages with the cursors for its neighbours
+
+    Raises:
+        HTTPException: 404 if the conversation doesn't exist,
+            400 if both cursors are given
+    """
+    if before is not None and after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Use either before or after, not both",
+        )
+
+    conv = await get_conversation(conversation_id)
+    if not conv:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Conversation {conversation_id} not found",
+        )
+
+    page = await get_messages_page(conversation_id, limit, before=before, after=after)
+    messages = page.messages
+
+    return MessagePageResponse(
         messages=[
             MessageResponse(
                 id=m.id,
@@ -145,6 +283,9 @@ async def get_conversation_with_messages(
             )
             for m in messages
         ],
+        has_more=page.has_more,
+        before=messages[0].seq if messages else before,
+        after=messages[-1].seq if messages else after,
     )
 
 
@@ -163,15 +304,15 @@ async def update_conversation(
     Returns:
         Updated conversation
     """
-    conv = get_conversation(conversation_id)
+    conv = await get_conversation(conversation_id)
     if not conv:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Conversation {conversation_id} not found",
         )
 
-    update_conversation_title(conversation_id, data.title)
-    conv = get_conversation(conversation_id)
+    await update_conversation_title(conversation_id, data.title)
+    conv = await get_conversation(conversation_id)
 
     return ConversationResponse(
         id=conv.id,
@@ -179,6 +320,8 @@ async def update_conversation(
         created_at=str(conv.created_at),
         updated_at=str(conv.updated_at),
         archived=conv.archived,
+        message_count=conv.message_count,
+        last_message_at=str(conv.last_message_at) if conv.last_message_at else None,
     )
 
 
@@ -194,9 +337,7 @@ async def delete_conversation(
     Args:
         conversation_id: Conversation ID
     """
-    from ...database import get_connection
-
-    conv = get_conversation(conversation_id)
+    conv = await get_conversation(conversation_id)
     if not conv:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -204,9 +345,4 @@ async def delete_conversation(
         )
 
     # Soft delete (archive)
-    with get_connection() as conn:
-        conn.execute(
-            "UPDATE conversations SET archived = TRUE WHERE id = ?",
-            (conversation_id,)
-        )
-        conn.commit()
+    await archive_conversation(conversation_id)
@@ -0,0 +1,107 @@
+"""JARVIS API - Conversation history search endpoints."""
+
+import html
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel
+
+from ...async_database import run_read, search_messages
+from ...database import get_search_index_status
+from ..auth import verify_token
+
+router = APIRouter()
+
+# Control characters used as highlight markers, so the snippet can be
+# HTML-escaped before they are turned into <mark> tags
+_MARK_START = "\x02"
+_MARK_END = "\x03"
+
+
+class MessageHit(BaseModel):
+    message_id: str
+    conversation_id: str
+    conversation_title: Optional[str] = None
+    role: str
+    snippet: str  # HTML-escaped, matches wrapped in <mark>...</mark>
+    rank: float
+    created_at: Optional[str] = None
+
+
+class MessageSearchResponse(BaseModel):
+    query: str
+    results: list[MessageHit]
+    indexing: bool = False  # True while older messages are still being indexed
+
+
+def _highlight(snippet: str) -> str:
+    """Escape a snippet for HTML and mark the matched terms."""
+    return (
+        html.escape(snippet)
+        .replace(_MARK_START, "<mark>")
+        .replace(_MARK_END, "</mark>")
+    )
+
+
+@router.get("/search/messages", response_model=MessageSearchResponse)
+async def search_conversation_messages(
+    q: str = Query(..., min_length=1, description="Words to search for"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    conversation_id: Optional[str] = None,
+    role: Optional[Literal["user", "assistant", "tool", "system"]] = None,
+    include_archived: bool = False,
+    _: None = Depends(verify_token),
+):
+    """Search past messages, best matches first.
+
+    Every word must appear in a message; the last word also matches as a
+    prefix, so partial input works for search-as-you-type.
+
+    Args:
+        q: Search text
+        limit: Maximum number of results
+        offset: Results to skip (paging)
+        conversation_id: Only search this conversation
+        role: Only search messages with this role
+        include_archived: Also search archived conversations
+
+    Returns:
+        Ranked hits with highlighted snippets
+
+    Raises:
+        HTTPException: 503 if SQLite was built without FTS5
+    """
+    index_status = await run_read(get_search_index_status)
+    if index_status is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Full-text search is not available (SQLite built without FTS5)",
+        )
+
+    hits = await search_messages(
+        q,
+        limit=limit,
+        offset=offset,
+        conversation_id=conversation_id,
+        role=role,
+        include_archived=include_archived,
+        highlight=(_MARK_START, _MARK_END),
+    )
+
+    return MessageSearchResponse(
+        query=q,
+        results=[
+            MessageHit(
+                message_id=hit.message.id,
+                conversation_id=hit.message.conversation_id,
+                conversation_title=hit.conversation_title,
+                role=hit.message.role,
+                snippet=_highlight(hit.snippet),
+                rank=hit.rank,
+                created_at=str(hit.message.created_at) if hit.message.created_at else None,
+            )
+            for hit in hits
+        ],
+        indexing=not index_status["complete"],
+    )
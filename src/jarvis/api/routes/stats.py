@@ -0,0 +1,66 @@
+"""JARVIS API - Usage statistics endpoints."""
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from pydantic import BaseModel
+
+from ...agent.instrumentation import get_prefill_meter
+from ...analytics import get_tool_usage_writer
+from ...async_database import get_tool_stats, roll_up_tool_usage, tool_usage_rollup_behind
+from ...rollups import stats_granularity
+from ..auth import verify_token
+
+router = APIRouter()
+
+
+class ToolStats(BaseModel):
+    tool_name: str
+    calls: int
+    errors: int
+    error_rate: float
+    p50_ms: Optional[float]  # Estimated from the rollup latency histogram
+    p95_ms: Optional[float]
+    avg_ms: Optional[float]
+    max_ms: Optional[float]
+    avg_args_bytes: float
+
+
+class ToolStatsResponse(BaseModel):
+    hours: Optional[float]  # Window the stats cover (None: all time)
+    granularity: str  # Rollup level read: minute, hour or day
+    tools: list[ToolStats]
+    recorder: dict  # Write-behind queue: queued, written, dropped, failed
+
+
+@router.get("/stats/tools", response_model=ToolStatsResponse)
+async def tool_stats(
+    hours: Optional[float] = Query(None, gt=0, description="Only calls from the last N hours; omit for all"),
+    _: None = Depends(verify_token),
+):
+    """Per-tool call counts, error rates and p50/p95 latency.
+
+    Reads only the rollup tables, so it stays fast however many calls
+    have been recorded. Calls appear once the analytics writer has rolled
+    them up (every minute); the endpoint only rolls up itself when that
+    has fallen behind, so reading stats doesn't queue a write.
+    """
+    if await tool_usage_rollup_behind():
+        await roll_up_tool_usage()
+    rows = await get_tool_stats(hours)
+    return ToolStatsResponse(
+        hours=hours,
+        granularity=stats_granularity(hours),
+        tools=[ToolStats(**row) for row in rows],
+        recorder=get_tool_usage_writer().stats(),
+    )
+
+
+@router.get("/stats/prefill")
+async def prefill_stats(_: None = Depends(verify_token)):
+    """Prompt tokens Ollama had to evaluate per turn (recent turns, in memory).
+
+    Low numbers mean the prompt prefix was served from Ollama's cache and
+    each turn only paid for its new tokens.
+    """
+    return get_prefill_meter().stats()
@@ -3,8 +3,9 @@
 from fastapi import APIRouter
 
 from ...utils import check_ollama_running, check_dependencies
-from ...database import list_conversations
+from ...async_database import get_database_stats
 from ..auth import is_auth_enabled
+from ..deps import get_execution_pool
 
 router = APIRouter()
 
@@ -22,9 +23,10 @@ async def get_status():
         - Dependencies status
         - Auth status
         - Database stats
+        - Agent queue metrics
     """
     deps = check_dependencies()
-    conversations = list_conversations(limit=1000)
+    stats = await get_database_stats()
 
     return {
         "status": "ok",
@@ -40,8 +42,11 @@ async def get_status():
             "sounddevice": deps.get("sounddevice", False),
         },
         "database": {
-            "conversations": len(conversations),
+            "conversations": stats["conversations"],
+            "archived_conversations": stats["archived_conversations"],
+            "messages": stats["messages"],
         },
+        "agent_pool": get_execution_pool().stats(),
     }
 
 
@@ -0,0 +1,96 @@
+"""JARVIS API - Streaming NDJSON export/import endpoints."""
+
+import itertools
+from typing import AsyncIterator, Iterator
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from ...async_database import run_read, run_write
+from ...transfer import Importer, export_lines, parse_line
+from ..auth import verify_token
+
+router = APIRouter()
+
+# NDJSON lines sent per response chunk
+EXPORT_LINES_PER_CHUNK = 500
+
+
+class ImportResponse(BaseModel):
+    read: dict[str, int]  # Records per table in the upload
+    inserted: dict[str, int]  # New rows per table (existing rows are kept)
+    skipped: dict[str, int] = {}  # New rows not inserted (tool responses already stored)
+
+
+def _take(lines: Iterator[str], count: int) -> str:
+    return "".join(itertools.islice(lines, count))
+
+
+async def _export_stream() -> AsyncIterator[str]:
+    """Advance the export generator on database reader threads, chunk by chunk."""
+    lines = export_lines()
+    while True:
+        chunk = await run_read(_take, lines, EXPORT_LINES_PER_CHUNK)
+        if not chunk:
+            break
+        yield chunk
+
+
+@router.get("/export")
+async def export_data(_: None = Depends(verify_token)):
+    """Stream every conversation, message, user fact and reminder as NDJSON.
+
+    Returns:
+        application/x-ndjson stream (see jarvis.transfer for the format)
+    """
+    return StreamingResponse(
+        _export_stream(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="jarvis-export.ndjson"'},
+    )
+
+
+async def _request_lines(request: Request) -> AsyncIterator[bytes]:
+    """Split the request body into lines as it arrives."""
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+
+@router.post("/import", response_model=ImportResponse)
+async def import_data(request: Request, _: None = Depends(verify_token)):
+    """Import an NDJSON export sent as the request body.
+
+    The body is parsed as it streams in and written in batches, one
+    transaction each. Existing rows are kept, so a failed upload can be
+    retried.
+
+    Returns:
+        Record and insert counts per table
+
+    Raises:
+        HTTPException: 400 on a malformed line (earlier batches stay imported)
+    """
+    importer = Importer()
+    line_number = 0
+    try:
+        async for line in _request_lines(request):
+            line_number += 1
+            record = parse_line(line, line_number)
+            if record is not None and importer.add(record):
+                await run_write(importer.write_batch, importer.take_batch())
+        await run_write(importer.write_batch, importer.take_batch())
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return ImportResponse(
+        read=importer.stats.read,
+        inserted=importer.stats.inserted,
+        skipped=importer.stats.skipped,
+    )
@@ -0,0 +1,162 @@
+"""JARVIS - Async access to the SQLite store.
+
+The helpers in jarvis.database block on sqlite3, so calling them from
+async code (FastAPI routes, WebSockets, run_agent_async) stalls the event
+loop for every open connection. The functions here mirror that module
+but run each call on dedicated database threads:
+
+- one writer thread, since SQLite only allows one writer at a time and
+  queueing writes here avoids lock contention and busy waits
+- a small reader pool, since WAL lets readers run alongside the writer
+
+Each thread keeps its own pooled connection (see database.ConnectionPool).
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from . import database, rollups
+from .database import (
+    Conversation,
+    ConversationPage,
+    ConversationSummary,
+    Message,
+    MessagePage,
+    SearchHit,
+    UserFact,
+)
+
+T = TypeVar("T")
+
+# Reader threads (each holds one SQLite connection)
+READER_THREADS = 4
+
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="jarvis-db-write")
+_readers = ThreadPoolExecutor(max_workers=READER_THREADS, thread_name_prefix="jarvis-db-read")
+
+
+async def run_read(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking read-only database call on a reader thread."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_readers, functools.partial(func, *args, **kwargs))
+
+
+async def run_write(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking database call that writes on the writer thread."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_writer, functools.partial(func, *args, **kwargs))
+
+
+# Conversation CRUD
+async def create_conversation(title: Optional[str] = None) -> str:
+    """Create a new conversation, return its ID."""
+    return await run_write(database.create_conversation, title)
+
+
+async def get_conversation(conv_id: str) -> Optional[Conversation]:
+    """Get a conversation by ID."""
+    return await run_read(database.get_conversation, conv_id)
+
+
+async def list_conversations(limit: int = 50, include_archived: bool = False) -> list[Conversation]:
+    """List recent conversations."""
+    return await run_read(database.list_conversations, limit, include_archived)
+
+
+async def list_conversations_page(limit: int = 50, include_archived: bool = False, **cursors) -> ConversationPage:
+    """List conversations one keyset page at a time (see database.list_conversations_page)."""
+    return await run_read(database.list_conversations_page, limit, include_archived, **cursors)
+
+
+async def count_conversations(include_archived: bool = False) -> int:
+    """Count conversations without loading them."""
+    return await run_read(database.count_conversations, include_archived)
+
+
+async def get_database_stats() -> dict:
+    """Conversation and message totals (see database.get_database_stats)."""
+    return await run_read(database.get_database_stats)
+
+
+async def update_conversation_title(conv_id: str, title: str):
+    """Update conversation title."""
+    await run_write(database.update_conversation_title, conv_id, title)
+
+
+async def archive_conversation(conv_id: str):
+    """Archive (soft delete) a conversation."""
+    await run_write(database.archive_conversation, conv_id)
+
+
+# Message CRUD
+async def add_message(conversation_id: str, role: str, content: str, **kwargs) -> Optional[str]:
+    """Add a message to a conversation (see database.add_message)."""
+    return await run_write(database.add_message, conversation_id, role, content, **kwargs)
+
+
+async def add_messages(
+    conversation_id: str,
+    messages: list[dict],
+    title: Optional[str] = None,
+) -> list[Optional[str]]:
+    """Add several messages in a single transaction (see database.add_messages)."""
+    return await run_write(database.add_messages, conversation_id, messages, title)
+
+
+async def get_messages(conversation_id: str, limit: int = 100) -> list[Message]:
+    """Get messages for a conversation, in conversation order (seq)."""
+    return await run_read(database.get_messages, conversation_id, limit)
+
+
+async def get_messages_page(conversation_id: str, limit: int = 50, **cursors) -> MessagePage:
+    """Get one keyset page of messages (see database.get_messages_page)."""
+    return await run_read(database.get_messages_page, conversation_id, limit, **cursors)
+
+
+async def get_recent_messages(conversation_id: str, limit: int = 10) -> list[Message]:
+    """Get the N most recent messages."""
+    return await run_read(database.get_recent_messages, conversation_id, limit)
+
+
+async def search_messages(query: str, **kwargs) -> list[SearchHit]:
+    """Full-text search over message content (see database.search_messages)."""
+    return await run_read(database.search_messages, query, **kwargs)
+
+
+async def get_conversation_summary(conversation_id: str) -> Optional[ConversationSummary]:
+    """Get the rolling summary of a conversation, if one exists."""
+    return await run_read(database.get_conversation_summary, conversation_id)
+
+
+# User facts (long-term memory)
+async def set_user_fact(fact_type: str, key: str, value: str, confidence: float = 1.0):
+    """Set or update a user fact."""
+    await run_write(database.set_user_fact, fact_type, key, value, confidence)
+
+
+async def get_user_facts(fact_type: Optional[str] = None) -> list[UserFact]:
+    """Get user facts, optionally filtered by type."""
+    return await run_read(database.get_user_facts, fact_type)
+
+
+# Tool usage tracking
+async def log_tool_usage(tool_name: str, query: Optional[str] = None, success: bool = True):
+    """Log tool usage for analytics."""
+    await run_write(database.log_tool_usage, tool_name, query, success)
+
+
+async def get_tool_stats(since_hours: Optional[float] = None) -> list[dict]:
+    """Per-tool call counts, error rate and latency (see rollups.get_tool_stats)."""
+    return await run_read(rollups.get_tool_stats, since_hours)
+
+
+async def tool_usage_rollup_behind() -> bool:
+    """Whether the tool usage rollups lag behind (see rollups.rollup_behind)."""
+    return await run_read(rollups.rollup_behind)
+
+
+async def roll_up_tool_usage() -> rollups.RollupReport:
+    """Fold new tool usage rows into the rollups."""
+    return await run_write(rollups.roll_up)
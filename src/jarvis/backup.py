@@ -0,0 +1,241 @@
+"""JARVIS - Online snapshots of the SQLite store.
+
+Copying jarvis.db while the API server writes to it can produce a torn
+file. Snapshots here use SQLite's online backup API instead, a few
+pages per step, from a dedicated connection that holds a read
+transaction for the whole copy. In WAL mode that read transaction pins
+one consistent snapshot without ever blocking writers. Without it, every
+commit by another connection would restart the backup from page one,
+and under steady traffic it would never finish.
+
+Snapshots are written next to their final name and renamed into place,
+so a snapshot file is always complete. They can be gzipped, and the
+API server can take them on a schedule with retention (BackupScheduler).
+"""
+
+import gzip
+import shutil
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+from .config import DATA_DIR, BackupConfig, get_config
+from .database import get_db_path
+
+# Pages copied per backup step, and the pause between steps
+BACKUP_PAGES = 256
+BACKUP_PAUSE = 0.005
+
+SNAPSHOT_PREFIX = "jarvis-"
+SNAPSHOT_SUFFIXES = (".db", ".db.gz")
+
+
+@dataclass
+class BackupResult:
+    path: Path
+    size: int  # Bytes written (compressed size for .gz)
+    pages: int  # Database pages copied
+    seconds: float
+
+
+def get_backup_dir(config: Optional[BackupConfig] = None) -> Path:
+    """Snapshot directory from config (relative paths are under the project root)."""
+    config = config or get_config().backup
+    directory = Path(config.directory)
+    if not directory.is_absolute():
+        directory = DATA_DIR.parent / directory
+    return directory
+
+
+def snapshot_path(directory: Path, compress: bool) -> Path:
+    """Timestamped snapshot file name in a directory."""
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    return directory / f"{SNAPSHOT_PREFIX}{stamp}{'.db.gz' if compress else '.db'}"
+
+
+def backup_database(
+    destination: Optional[Path] = None,
+    compress: Optional[bool] = None,
+    pages: int = BACKUP_PAGES,
+    pause: float = BACKUP_PAUSE,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> BackupResult:
+    """Write a consistent snapshot of the live database (blocking).
+
+    Args:
+        destination: Output file (default: timestamped file in the backup
+            directory); a .gz suffix compresses
+        compress: gzip the snapshot (default: from the .gz suffix, or
+            config when destination is None)
+        pages: Pages copied per step
+        pause: Seconds to sleep between steps
+        progress: Called with (pages copied, total pages) after each step
+
+    Returns:
+        Where and how much was written
+    """
+    if destination is None:
+        if compress is None:
+            compress = get_config().backup.compress
+        destination = snapshot_path(get_backup_dir(), compress)
+    else:
+        destination = Path(destination)
+        if compress is None:
+            compress = destination.suffix == ".gz"
+    destination.parent.mkdir(parents=True, exist_ok=True)
+
+    started = time.monotonic()
+    partial = destination.with_name(destination.name + ".partial")
+    raw = partial.with_suffix(".db") if compress else partial
+    total_pages = 0
+
+    def on_step(status: int, remaining: int, total: int):
+        nonlocal total_pages
+        total_pages = total
+        if progress:
+            progress(total - remaining, total)
+
+    source = sqlite3.connect(get_db_path(), isolation_level=None, check_same_thread=False)
+    target = sqlite3.connect(raw)
+    try:
+        # Pin one snapshot for the whole copy (see module docstring)
+        source.execute("BEGIN")
+        source.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone()
+        source.backup(target, pages=pages, progress=on_step, sleep=pause)
+        source.execute("COMMIT")
+    except BaseException:
+        target.close()
+        raw.unlink(missing_ok=True)
+        raise
+    finally:
+        source.close()
+    # The copy inherits WAL mode; a snapshot should be one self-contained file
+    target.execute("PRAGMA journal_mode = DELETE")
+    target.close()
+
+    if compress:
+        try:
+            with open(raw, "rb") as f_in, gzip.open(partial, "wb", compresslevel=6) as f_out:
+                shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+        finally:
+            raw.unlink(missing_ok=True)
+    partial.replace(destination)
+
+    return BackupResult(
+        path=destination,
+        size=destination.stat().st_size,
+        pages=total_pages,
+        seconds=time.monotonic() - started,
+    )
+
+
+def list_snapshots(directory: Path) -> list[Path]:
+    """Snapshots in a directory, oldest first (names sort by time)."""
+    if not directory.exists():
+        return []
+    return sorted(
+        p for p in directory.iterdir()
+        if p.name.startswith(SNAPSHOT_PREFIX) and p.name.endswith(SNAPSHOT_SUFFIXES)
+    )
+
+
+def prune_snapshots(directory: Path, keep: int) -> list[Path]:
+    """Delete all but the newest `keep` snapshots.
+
+    Returns:
+        Deleted files
+    """
+    snapshots = list_snapshots(directory)
+    stale = snapshots[:-keep] if keep > 0 else snapshots
+    for path in stale:
+        path.unlink(missing_ok=True)
+    return stale
+
+
+# Background snapshots (API server)
+
+_job_lock = threading.Lock()
+_job_thread: Optional[threading.Thread] = None
+_last_job: dict = {}
+
+
+def start_backup(destination: Optional[Path] = None, compress: Optional[bool] = None) -> bool:
+    """Take a snapshot on a background thread.
+
+    Returns:
+        False if a snapshot is already running
+    """
+    global _job_thread
+    with _job_lock:
+        if _job_thread is not None and _job_thread.is_alive():
+            return False
+
+        _last_job.update(
+            state="running", started_at=datetime.now().isoformat(timespec="seconds"),
+            path=None, size=None, error=None, progress=0.0,
+        )
+
+        def run():
+            def on_progress(done: int, total: int):
+                _last_job["progress"] = done / total if total else 1.0
+
+            try:
+                result = backup_database(destination, compress, progress=on_progress)
+                _last_job.update(state="done", path=str(result.path), size=result.size, progress=1.0)
+            except Exception as e:
+                _last_job.update(state="failed", error=str(e))
+                print(f"[Backup] Snapshot failed: {e}")
+
+        _job_thread = threading.Thread(target=run, name="jarvis-backup", daemon=True)
+        _job_thread.start()
+        return True
+
+
+def get_backup_status() -> dict:
+    """State of the most recent background snapshot (empty if none ran)."""
+    return dict(_last_job)
+
+
+class BackupScheduler:
+    """Takes a snapshot every `schedule_hours` and keeps the newest `keep`."""
+
+    def __init__(self, config: Optional[BackupConfig] = None):
+        self.config = config or get_config().backup
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> bool:
+        """Start the schedule; returns False if it is disabled in config."""
+        if self.config.schedule_hours <= 0:
+            return False
+        self._thread = threading.Thread(target=self._run, name="jarvis-backup-scheduler", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        interval = self.config.schedule_hours * 3600
+        directory = get_backup_dir(self.config)
+        while not self._stop.wait(self._seconds_until_due(directory, interval)):
+            try:
+                result = backup_database(snapshot_path(directory, self.config.compress))
+                prune_snapshots(directory, self.config.keep)
+                print(f"[Backup] Snapshot {result.path.name} ({result.size} bytes, {result.seconds:.1f}s)")
+            except Exception as e:
+                print(f"[Backup] Scheduled snapshot failed: {e}")
+                self._stop.wait(min(interval, 600))
+
+    @staticmethod
+    def _seconds_until_due(directory: Path, interval: float) -> float:
+        """Wait so restarts don't snapshot early: due `interval` after the newest one."""
+        snapshots = list_snapshots(directory)
+        if not snapshots:
+            return 0
+        age = time.time() - snapshots[-1].stat().st_mtime
+        return max(0.0, interval - age)
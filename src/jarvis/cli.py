@@ -1,6 +1,7 @@
 """JARVIS - CLI interface."""
 
 import asyncio
+import re
 import sys
 import warnings
 
@@ -16,7 +17,7 @@ from .utils import format_error_for_user, check_ollama_running
 
 
 # Known subcommands for detection
-SUBCOMMANDS = {"calc", "mcp-status", "ask", "config", "status", "chat", "history", "serve"}
+SUBCOMMANDS = {"calc", "mcp-status", "ask", "config", "status", "chat", "history", "compact", "export", "import", "backup", "maintenance", "serve"}
 
 
 @click.group(invoke_without_command=True)
@@ -291,7 +292,7 @@ def status():
     """Show JARVIS status and configuration."""
     from .utils import check_dependencies
     from .config import get_config, CONFIG_PATH
-    from .database import list_conversations, get_db_path
+    from .database import get_database_stats, get_db_path, get_schema_version
 
     config = get_config()
     deps = check_dependencies()
@@ -316,9 +317,10 @@ def status():
 
     # Memory
     click.echo("\nMemory:")
-    conversations = list_conversations(limit=1000)
-    click.echo(f"  Conversations: {len(conversations)}")
-    click.echo(f"  Database: {get_db_path()}")
+    stats = get_database_stats()
+    click.echo(f"  Conversations: {stats['conversations']}")
+    click.echo(f"  Messages:      {stats['messages']}")
+    click.echo(f"  Database: {get_db_path()} (schema v{get_schema_version()})")
 
     # Paths
     click.echo("\nPaths:")
@@ -425,15 +427,21 @@ def chat(ctx, resume, conv_id):
 
 
 @cli.command()
-@click.option("--limit", "-n", default=10, help="Number of conversations to show")
-def history(limit):
-    """Show recent conversation history.
+@click.option("--limit", "-n", default=10, help="Number of conversations (or matches) to show")
+@click.option("--grep", "-g", "pattern", default=None, help="Search message text instead of listing")
+def history(limit, pattern):
+    """Show recent conversation history, or search it.
 
     Example:
-        jarvis history           # Show last 10 conversations
-        jarvis history -n 20     # Show last 20 conversations
+        jarvis history                 # Show last 10 conversations
+        jarvis history -n 20           # Show last 20 conversations
+        jarvis history --grep pizza    # Find messages mentioning pizza
     """
-    from .database import list_conversations, get_messages
+    from .database import list_conversations
+
+    if pattern:
+        _history_grep(pattern, limit)
+        return
 
     conversations = list_conversations(limit=limit)
 
@@ -446,17 +454,13 @@ def history(limit):
     click.echo("=" * 60)
 
     for conv in conversations:
-        # Get message count
-        messages = get_messages(conv.id, limit=1000)
-        msg_count = len(messages)
-
         title = conv.title or "(untitled)"
         if len(title) > 40:
             title = title[:40] + "..."
 
         click.echo(f"\n  ID: {conv.id}")
         click.echo(f"  Title: {title}")
-        click.echo(f"  Messages: {msg_count}")
+        click.echo(f"  Messages: {conv.message_count}")
         click.echo(f"  Updated: {conv.updated_at}")
         click.echo("-" * 60)
 
@@ -465,6 +469,204 @@ def history(limit):
     click.echo("  jarvis chat --resume  (resumes most recent)")
 
 
+def _history_grep(pattern: str, limit: int):
+    """Print messages matching a full-text search, best matches first."""
+    from .database import get_search_index_status, search_messages
+
+    index_status = get_search_index_status()
+    if index_status is None:
+        click.echo("Search is not available: SQLite was built without FTS5.")
+        return
+
+    hits = search_messages(pattern, limit=limit, highlight=("\x02", "\x03"))
+    if not index_status["complete"]:
+        click.echo("(Older messages are still being indexed; results may be incomplete.)")
+
+    if not hits:
+        click.echo(f"No messages matching '{pattern}'.")
+        return
+
+    click.echo("\n" + "=" * 60)
+    click.echo(f"  Messages matching '{pattern}'")
+    click.echo("=" * 60)
+
+    for hit in hits:
+        title = hit.conversation_title or "(untitled)"
+        if len(title) > 40:
+            title = title[:40] + "..."
+        snippet = re.sub(
+            "\x02(.*?)\x03",
+            lambda m: click.style(m.group(1), fg="yellow", bold=True),
+            hit.snippet.replace("\n", " "),
+        )
+
+        click.echo(f"\n  [{hit.message.conversation_id}] {title}")
+        click.echo(f"  {hit.message.role} @ {hit.message.created_at}: {snippet}")
+
+    click.echo("\nOpen a conversation:")
+    click.echo("  jarvis chat --id <conversation_id>")
+
+
+@cli.command()
+def compact():
+    """Remove duplicated tool messages from the conversation history.
+
+    Older versions re-saved every earlier tool result on each turn.
+    This keeps the first copy of each and prevents new duplicates.
+
+    Example:
+        jarvis compact
+    """
+    from .database import compact_duplicate_tool_messages
+
+    deleted = compact_duplicate_tool_messages()
+    click.echo(f"Removed {deleted} duplicate tool message(s).")
+
+
+def _open_ndjson(path: str, mode: str):
+    """Open an NDJSON file for export/import; "-" is stdout/stdin, .gz is gzipped."""
+    if path == "-":
+        return click.open_file("-", mode, encoding="utf-8")
+    if path.endswith(".gz"):
+        import gzip
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+@cli.command("export")
+@click.argument("output", default="-")
+def export_data(output):
+    """Export conversations, messages, facts and reminders as NDJSON.
+
+    Streams the database in chunks, so any size of history works in
+    bounded memory. A path ending in .gz is compressed.
+
+    Example:
+        jarvis export backup.ndjson.gz
+        jarvis export > backup.ndjson
+    """
+    from .transfer import export_lines
+
+    lines = 0
+    with _open_ndjson(output, "w") as f:
+        for line in export_lines():
+            f.write(line)
+            lines += 1
+    if output != "-":
+        click.echo(f"Exported {lines - 1} record(s) to {output}")
+
+
+@cli.command("import")
+@click.argument("input_path", metavar="INPUT", default="-")
+@click.option("--batch-size", default=1000, help="Records inserted per transaction")
+def import_data(input_path, batch_size):
+    """Import an NDJSON export into the database.
+
+    Existing conversations, messages and facts are kept, so importing
+    the same file again (e.g. after an interruption) is safe.
+
+    Example:
+        jarvis import backup.ndjson.gz
+    """
+    from .transfer import import_lines
+
+    try:
+        with _open_ndjson(input_path, "r") as f:
+            stats = import_lines(f, batch_size=batch_size)
+    except (OSError, ValueError) as e:
+        click.echo(f"Import failed: {e}")
+        sys.exit(1)
+
+    for table, count in stats.read.items():
+        line = f"  {table}: {stats.inserted.get(table, 0)} imported, {count} in file"
+        if stats.skipped.get(table):
+            line += f", {stats.skipped[table]} skipped (tool responses already stored)"
+        click.echo(line)
+
+
+def _format_bytes(size: int) -> str:
+    """Human-readable byte count."""
+    for unit in ("B", "KB", "MB"):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+@cli.command()
+@click.option("--dry-run", is_flag=True, help="Only show what would be moved")
+@click.option("--full-vacuum", is_flag=True, help="Rewrite the whole database file (slow on big files)")
+@click.option("--restore", "restore_id", default=None, help="Move a conversation back from the archive")
+def maintenance(dry_run, full_vacuum, restore_id):
+    """Move old conversations to the archive database and reclaim space.
+
+    What moves is set under `retention` in the config: deleted
+    conversations, ones idle for archive_after_days, and the oldest ones
+    while the database is over max_hot_mb.
+
+    Example:
+        jarvis maintenance --dry-run
+        jarvis maintenance
+        jarvis maintenance --restore abc123
+    """
+    from .retention import restore_conversation, run_maintenance
+
+    if restore_id:
+        if restore_conversation(restore_id):
+            click.echo(f"Restored conversation {restore_id}.")
+        else:
+            click.echo(f"Conversation {restore_id} is not in the archive.")
+        return
+
+    report = run_maintenance(dry_run=dry_run, full_vacuum=full_vacuum)
+
+    if dry_run:
+        click.echo(f"{len(report.candidates)} conversation(s) would move to {report.cold_db}")
+        for conv_id in report.candidates[:20]:
+            click.echo(f"  {conv_id}")
+        if len(report.candidates) > 20:
+            click.echo(f"  ... and {len(report.candidates) - 20} more")
+        return
+
+    click.echo(f"Moved {report.conversations_moved} conversation(s), {report.messages_moved} message(s) to {report.cold_db}")
+    click.echo(
+        f"Database: {_format_bytes(report.bytes_before)} -> {_format_bytes(report.bytes_after)} "
+        f"({_format_bytes(report.bytes_reclaimed)} reclaimed)"
+    )
+    if report.reclaimable_bytes:
+        click.echo(f"{_format_bytes(report.reclaimable_bytes)} more can be reclaimed with --full-vacuum")
+
+
+@cli.command()
+@click.argument("output", required=False)
+@click.option("--compress/--no-compress", default=None, help="gzip the snapshot (default: from config or .gz suffix)")
+@click.option("--keep", type=int, default=None, help="Then delete all but the newest N snapshots in the backup directory")
+def backup(output, compress, keep):
+    """Take a consistent snapshot of the database while it is in use.
+
+    Uses SQLite's online backup API, so the API server can keep running.
+    Without OUTPUT the snapshot goes to the backup directory in config.
+
+    Example:
+        jarvis backup                      # data/backups/jarvis-<time>.db.gz
+        jarvis backup ~/jarvis.db          # Specific file
+        jarvis backup --keep 7             # Snapshot and keep the newest 7
+    """
+    from pathlib import Path
+
+    from .backup import backup_database, get_backup_dir, prune_snapshots
+
+    def show_progress(done: int, total: int):
+        click.echo(f"\r  {done}/{total} pages", nl=False)
+
+    result = backup_database(Path(output) if output else None, compress, progress=show_progress)
+    click.echo(f"\nSnapshot written: {result.path} ({result.size / 1024 / 1024:.1f} MB, {result.seconds:.1f}s)")
+
+    if keep is not None:
+        deleted = prune_snapshots(get_backup_dir(), keep)
+        click.echo(f"Deleted {len(deleted)} old snapshot(s).")
+
+
 @cli.command()
 @click.option("--host", "-h", default="0.0.0.0", help="Host to bind to")
 @click.option("--port", "-p", default=8000, help="Port to bind to")
@@ -23,6 +23,7 @@ class ModelConfig:
     """LLM model configuration."""
     name: str = "qwen2.5:7b-instruct"
     temperature: float = 0.7
+    keep_alive: str = "30m"  # How long Ollama keeps the model (and its prompt cache) loaded; "-1m" = forever
 
 
 @dataclass
@@ -48,12 +49,73 @@ class MCPConfig:
     config_path: str = "data/mcp_servers.json"
 
 
+@dataclass
+class MemoryConfig:
+    """Conversation context configuration."""
+    context_window: int = 20  # Max messages in LLM context (message-count mode)
+    context_token_budget: int = 0  # >0 switches to token-budget mode
+    tokenizer: str = "chars"  # "chars", "tiktoken:<encoding>", "hf:<tokenizer.json>"
+    context_max_messages: int = 200  # Messages kept in memory for token-budget mode
+    summarize: bool = False  # Fold messages leaving the window into a rolling summary
+    summary_chunk_size: int = 10  # Messages folded into the summary per update
+    window_drop: float = 0.5  # Share of the window dropped at once when full (0: slide every turn)
+
+
+@dataclass
+class RouterConfig:
+    """Fast path that answers simple tool commands without the LLM."""
+    enabled: bool = True
+    min_confidence: float = 0.9  # Lower routes more commands directly, with more misfires
+
+
+@dataclass
+class ToolSelectionConfig:
+    """Binding only the tools relevant to each turn (for many MCP tools)."""
+    enabled: bool = True
+    min_tools: int = 12  # Only select when more tools than this are loaded
+    top_k: int = 4  # Tools bound per turn besides the pinned ones
+    pin_builtin: bool = True  # Always bind the built-in tools
+    cached_agents: int = 16  # Agent graphs kept, one per tool subset
+
+
+@dataclass
+class APIConfig:
+    """API server configuration."""
+    max_concurrent_generations: int = 2  # Agent runs sent to Ollama at once
+    max_queue_size: int = 16  # Waiting requests before answering 429
+    queue_timeout: float = 60.0  # Seconds a request may wait for a slot
+
+
+@dataclass
+class BackupConfig:
+    """Database snapshot configuration."""
+    directory: str = "data/backups"
+    compress: bool = True  # gzip snapshots
+    schedule_hours: float = 0  # >0: snapshot this often while the API server runs
+    keep: int = 7  # Snapshots kept in the directory by the schedule; older ones are deleted
+
+
+@dataclass
+class RetentionConfig:
+    """What `jarvis maintenance` moves out of the hot database."""
+    cold_db: str = "data/jarvis-archive.db"  # Where moved conversations go
+    move_archived: bool = True  # Move deleted (archived) conversations
+    archive_after_days: int = 0  # >0: also move conversations idle this long
+    max_hot_mb: float = 0  # >0: also move the oldest until data fits this size
+
+
 @dataclass
 class Config:
     """Main configuration."""
     model: ModelConfig = field(default_factory=ModelConfig)
     voice: VoiceConfig = field(default_factory=VoiceConfig)
     mcp: MCPConfig = field(default_factory=MCPConfig)
+    memory: MemoryConfig = field(default_factory=MemoryConfig)
+    router: RouterConfig = field(default_factory=RouterConfig)
+    tool_selection: ToolSelectionConfig = field(default_factory=ToolSelectionConfig)
+    api: APIConfig = field(default_factory=APIConfig)
+    backup: BackupConfig = field(default_factory=BackupConfig)
+    retention: RetentionConfig = field(default_factory=RetentionConfig)
 
     # Data paths
     notes_dir: str = "data/notes"
@@ -87,6 +149,7 @@ def load_config() -> Config:
             config.model = ModelConfig(
                 name=model_data.get("name", config.model.name),
                 temperature=model_data.get("temperature", config.model.temperature),
+                keep_alive=str(model_data.get("keep_alive", config.model.keep_alive)),
             )
 
         # Voice settings
@@ -109,6 +172,67 @@ def load_config() -> Config:
                 config_path=mcp_data.get("config_path", config.mcp.config_path),
             )
 
+        # Memory settings
+        if "memory" in data:
+            memory_data = data["memory"]
+            config.memory = MemoryConfig(
+                context_window=memory_data.get("context_window", config.memory.context_window),
+                context_token_budget=memory_data.get("context_token_budget", config.memory.context_token_budget),
+                tokenizer=memory_data.get("tokenizer", config.memory.tokenizer),
+                context_max_messages=memory_data.get("context_max_messages", config.memory.context_max_messages),
+                summarize=memory_data.get("summarize", config.memory.summarize),
+                summary_chunk_size=memory_data.get("summary_chunk_size", config.memory.summary_chunk_size),
+                window_drop=memory_data.get("window_drop", config.memory.window_drop),
+            )
+
+        # Fast-path router settings
+        if "router" in data:
+            router_data = data["router"]
+            config.router = RouterConfig(
+                enabled=router_data.get("enabled", config.router.enabled),
+                min_confidence=router_data.get("min_confidence", config.router.min_confidence),
+            )
+
+        # Per-turn tool selection settings
+        if "tool_selection" in data:
+            selection_data = data["tool_selection"]
+            config.tool_selection = ToolSelectionConfig(
+                enabled=selection_data.get("enabled", config.tool_selection.enabled),
+                min_tools=selection_data.get("min_tools", config.tool_selection.min_tools),
+                top_k=selection_data.get("top_k", config.tool_selection.top_k),
+                pin_builtin=selection_data.get("pin_builtin", config.tool_selection.pin_builtin),
+                cached_agents=selection_data.get("cached_agents", config.tool_selection.cached_agents),
+            )
+
+        # API settings
+        if "api" in data:
+            api_data = data["api"]
+            config.api = APIConfig(
+                max_concurrent_generations=api_data.get("max_concurrent_generations", config.api.max_concurrent_generations),
+                max_queue_size=api_data.get("max_queue_size", config.api.max_queue_size),
+                queue_timeout=api_data.get("queue_timeout", config.api.queue_timeout),
+            )
+
+        # Backup settings
+        if "backup" in data:
+            backup_data = data["backup"]
+            config.backup = BackupConfig(
+                directory=backup_data.get("directory", config.backup.directory),
+                compress=backup_data.get("compress", config.backup.compress),
+                schedule_hours=backup_data.get("schedule_hours", config.backup.schedule_hours),
+                keep=backup_data.get("keep", config.backup.keep),
+            )
+
+        # Retention settings
+        if "retention" in data:
+            retention_data = data["retention"]
+            config.retention = RetentionConfig(
+                cold_db=retention_data.get("cold_db", config.retention.cold_db),
+                move_archived=retention_data.get("move_archived", config.retention.move_archived),
+                archive_after_days=retention_data.get("archive_after_days", config.retention.archive_after_days),
+                max_hot_mb=retention_data.get("max_hot_mb", config.retention.max_hot_mb),
+            )
+
         # Other settings
         config.notes_dir = data.get("notes_dir", config.notes_dir)
         config.reminders_file = data.get("reminders_file", config.reminders_file)
@@ -136,6 +260,7 @@ def save_config(config: Config) -> None:
         "model": {
             "name": config.model.name,
             "temperature": config.model.temperature,
+            "keep_alive": config.model.keep_alive,
         },
         "voice": {
             "stt_model": config.voice.stt_model,
@@ -149,6 +274,43 @@ def save_config(config: Config) -> None:
             "enabled": config.mcp.enabled,
             "config_path": config.mcp.config_path,
         },
+        "memory": {
+            "context_window": config.memory.context_window,
+            "context_token_budget": config.memory.context_token_budget,
+            "tokenizer": config.memory.tokenizer,
+            "context_max_messages": config.memory.context_max_messages,
+            "summarize": config.memory.summarize,
+            "summary_chunk_size": config.memory.summary_chunk_size,
+            "window_drop": config.memory.window_drop,
+        },
+        "router": {
+            "enabled": config.router.enabled,
+            "min_confidence": config.router.min_confidence,
+        },
+        "tool_selection": {
+            "enabled": config.tool_selection.enabled,
+            "min_tools": config.tool_selection.min_tools,
+            "top_k": config.tool_selection.top_k,
+            "pin_builtin": config.tool_selection.pin_builtin,
+            "cached_agents": config.tool_selection.cached_agents,
+        },
+        "api": {
+            "max_concurrent_generations": config.api.max_concurrent_generations,
+            "max_queue_size": config.api.max_queue_size,
+            "queue_timeout": config.api.queue_timeout,
+        },
+        "backup": {
+            "directory": config.backup.directory,
+            "compress": config.backup.compress,
+            "schedule_hours": config.backup.schedule_hours,
+            "keep": config.backup.keep,
+        },
+        "retention": {
+            "cold_db": config.retention.cold_db,
+            "move_archived": config.retention.move_archived,
+            "archive_after_days": config.retention.archive_after_days,
+            "max_hot_mb": config.retention.max_hot_mb,
+        },
         "notes_dir": config.notes_dir,
         "reminders_file": config.reminders_file,
         "verbose": config.verbose,
@@ -1,16 +1,32 @@
 """JARVIS - SQLite database setup and management."""
 
+import re
 import sqlite3
+import threading
+import time
 import uuid
+import weakref
 from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
+
+from . import migrations
 
 # Database file location
 DB_PATH = Path(__file__).parent.parent.parent / "data" / "jarvis.db"
 
+# Pragmas applied once when a pooled connection is opened
+CONNECTION_PRAGMAS = (
+    ("journal_mode", "WAL"),        # Readers don't block the writer
+    ("synchronous", "NORMAL"),      # fsync on checkpoint, not every commit (safe with WAL)
+    ("busy_timeout", 5000),         # Wait up to 5s for a lock instead of failing
+    ("cache_size", -16000),         # 16 MB page cache per connection
+    ("mmap_size", 268435456),       # Memory-map up to 256 MB of the file
+    ("temp_store", "MEMORY"),
+)
+
 
 def get_db_path() -> Path:
     """Get database file path, ensure parent directory exists."""
@@ -18,107 +34,311 @@ def get_db_path() -> Path:
     return DB_PATH
 
 
+def _open_connection(path: Path) -> sqlite3.Connection:
+    """Open a new connection and apply the connection pragmas."""
+    # The pool guarantees a connection is only used by its owning thread;
+    # check_same_thread=False just lets close_all() close it from elsewhere.
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    for name, value in CONNECTION_PRAGMAS:
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+
+class ConnectionPool:
+    """Thread-local pool of persistent SQLite connections.
+
+    Each thread (CLI main thread, FastAPI executor workers, the reminder
+    checker) lazily opens one connection and reuses it for every call,
+    so pragmas are applied once per connection instead of once per query.
+    Connections owned by threads that have exited are closed on the next
+    connection open. The first connection a process opens to a database
+    file brings its schema up to date.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # (owner thread ref, db path, connection) for every open connection
+        self._connections: list[tuple[weakref.ref, Path, sqlite3.Connection]] = []
+
+    def acquire(self) -> sqlite3.Connection:
+        """Return this thread's connection to the current database file."""
+        path = get_db_path()
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.path == path:
+            return conn
+
+        if conn is not None:
+            # DB_PATH changed since this thread connected
+            self._discard(conn)
+
+        conn = _open_connection(path)
+        try:
+            applied = _ensure_schema(conn, path)
+        except BaseException:
+            conn.close()
+            raise
+
+        self._local.conn = conn
+        self._local.path = path
+        with self._lock:
+            self._prune()
+            self._connections.append((weakref.ref(threading.current_thread()), path, conn))
+
+        if applied:
+            resume_search_backfill()
+        return conn
+
+    def close_all(self) -> None:
+        """Close every pooled connection (e.g. on server shutdown)."""
+        with self._lock:
+            connections = self._connections
+            self._connections = []
+        for _, _, conn in connections:
+            conn.close()
+        self._local = threading.local()
+        with _schema_lock:
+            _schema_ready.clear()
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        """Close and forget a single connection."""
+        with self._lock:
+            self._connections = [c for c in self._connections if c[2] is not conn]
+        conn.close()
+
+    def _prune(self) -> None:
+        """Close connections whose owner thread has exited (lock held)."""
+        alive = []
+        for thread_ref, path, conn in self._connections:
+            thread = thread_ref()
+            if thread is not None and thread.is_alive():
+                alive.append((thread_ref, path, conn))
+            else:
+                conn.close()
+        self._connections = alive
+
+
+_pool = ConnectionPool()
+
+# Database files already migrated by this process
+_schema_lock = threading.Lock()
+_schema_ready: set[Path] = set()
+
+
+def _ensure_schema(conn: sqlite3.Connection, path: Path) -> list[migrations.Migration]:
+    """Migrate a database file on this process's first connection to it.
+
+    Later connections skip this entirely; the first one costs a single
+    PRAGMA user_version read when the schema is already current.
+
+    Returns:
+        Migrations that were applied
+    """
+    if path in _schema_ready:
+        return []
+    with _schema_lock:
+        if path in _schema_ready:
+            return []
+        applied = migrations.migrate(conn)
+        _schema_ready.add(path)
+    return applied
+
+
 @contextmanager
 def get_connection():
-    """Get a database connection with proper cleanup."""
-    conn = sqlite3.connect(get_db_path())
-    conn.row_factory = sqlite3.Row
+    """Get this thread's pooled database connection.
+
+    The connection stays open after the block; an uncommitted transaction
+    is rolled back if the block raises.
+    """
+    conn = _pool.acquire()
     try:
         yield conn
-    finally:
-        conn.close()
+    except BaseException:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+
+
+def close_connections() -> None:
+    """Close all pooled database connections."""
+    _pool.close_all()
 
 
 def init_db():
-    """Initialize database with schema."""
+    """Create or upgrade the schema of the current database file now.
+
+    Not needed before normal use: the first connection a process opens
+    to a database file migrates it (see _ensure_schema).
+    """
     with get_connection() as conn:
-        cursor = conn.cursor()
-
-        # Conversations table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS conversations (
-                id TEXT PRIMARY KEY,
-                title TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                archived BOOLEAN DEFAULT FALSE
-            )
-        """)
-
-        # Messages table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS messages (
-                id TEXT PRIMARY KEY,
-                conversation_id TEXT NOT NULL,
-                role TEXT NOT NULL CHECK(role IN ('user', 'assistant', 'tool', 'system')),
-                content TEXT NOT NULL,
-                message_type TEXT DEFAULT 'text',
-                tool_name TEXT,
-                tool_args TEXT,
-                tool_call_id TEXT,
-                metadata TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (conversation_id) REFERENCES conversations(id) ON DELETE CASCADE
-            )
-        """)
-
-        # Reminders table (migrated from JSON)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS reminders (
-                id TEXT PRIMARY KEY,
-                message TEXT NOT NULL,
-                due_at DATETIME NOT NULL,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                completed_at DATETIME,
-                notified BOOLEAN DEFAULT FALSE
-            )
-        """)
-
-        # Notes metadata (content stays in markdown files)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS notes (
-                id TEXT PRIMARY KEY,
-                title TEXT,
-                file_path TEXT NOT NULL UNIQUE,
-                tags TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                updated_at DATETIME
-            )
-        """)
-
-        # Tool usage stats
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS tool_usage (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                tool_name TEXT NOT NULL,
-                query TEXT,
-                success BOOLEAN,
-                used_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        # User preferences / facts (long-term memory)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS user_facts (
-                id TEXT PRIMARY KEY,
-                fact_type TEXT NOT NULL,
-                key TEXT NOT NULL,
-                value TEXT NOT NULL,
-                confidence REAL DEFAULT 1.0,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                updated_at DATETIME,
-                UNIQUE(fact_type, key)
-            )
-        """)
+        with _schema_lock:
+            applied = migrations.migrate(conn)
+    if applied:
+        resume_search_backfill()
+
+
+def get_schema_version() -> int:
+    """Schema version of the current database file."""
+    with get_connection() as conn:
+        return migrations.get_version(conn)
+
+
+def refresh_conversation_stats(conversation_ids: Optional[list[str]] = None):
+    """Recompute message_count/last_message_at from the messages table.
+
+    add_message() and add_messages() keep these columns current; this is
+    only needed after messages are deleted or written by other means.
+
+    Args:
+        conversation_ids: Conversations to refresh (None: all)
+    """
+    sql = """UPDATE conversations SET
+                 message_count = (SELECT COUNT(*) FROM messages WHERE conversation_id = conversations.id),
+                 last_message_at = (SELECT MAX(created_at) FROM messages WHERE conversation_id = conversations.id)"""
+    params: tuple = ()
+    if conversation_ids is not None:
+        if not conversation_ids:
+            return
+        sql += f" WHERE id IN ({', '.join('?' * len(conversation_ids))})"
+        params = tuple(conversation_ids)
 
-        # Create indexes
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_messages_conversation ON messages(conversation_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_messages_created ON messages(created_at)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_reminders_due ON reminders(due_at)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_facts_type ON user_facts(fact_type)")
+    with get_connection() as conn:
+        conn.execute(sql, params)
+        conn.commit()
+
+
+def compact_duplicate_tool_messages() -> int:
+    """Remove re-persisted copies of tool messages, keeping the first one.
 
+    Also creates the unique index that prevents new duplicates.
+
+    Returns:
+        Number of deleted messages
+    """
+    with get_connection() as conn:
+        cursor = conn.execute(
+            """DELETE FROM messages
+               WHERE role = 'tool' AND tool_call_id IS NOT NULL AND tool_call_id != ''
+               AND rowid NOT IN (
+                   SELECT MIN(rowid) FROM messages
+                   WHERE role = 'tool' AND tool_call_id IS NOT NULL AND tool_call_id != ''
+                   GROUP BY conversation_id, tool_call_id
+               )"""
+        )
+        deleted = cursor.rowcount
+        conn.execute(migrations.TOOL_CALL_INDEX_SQL)
         conn.commit()
 
+    if deleted:
+        refresh_conversation_stats()
+    return deleted
+
+
+# Full-text search over message content (schema and the rules for which
+# rows the triggers cover: see migrations.MESSAGE_SEARCH_SCHEMA)
+
+# Rows indexed per backfill transaction, and the pause between them so
+# other writers can take the lock
+SEARCH_BACKFILL_CHUNK = 2000
+SEARCH_BACKFILL_PAUSE = 0.05
+
+_backfill_thread: Optional[threading.Thread] = None
+
+
+def message_search_available() -> bool:
+    """Check whether the full-text index exists (SQLite has FTS5)."""
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages_fts'"
+        ).fetchone()
+    return row is not None
+
+
+def backfill_message_search(
+    chunk_size: int = SEARCH_BACKFILL_CHUNK,
+    max_chunks: Optional[int] = None,
+    pause: float = 0.0,
+) -> int:
+    """Index messages stored before the full-text index existed.
+
+    Each chunk of rowids is indexed in its own short transaction, so a
+    large database is never locked for the whole backfill.
+
+    Args:
+        chunk_size: Rowids covered per transaction
+        max_chunks: Stop after this many chunks (None: until done)
+        pause: Seconds to sleep between chunks
+
+    Returns:
+        Number of messages indexed
+    """
+    indexed = 0
+    chunks = 0
+    while max_chunks is None or chunks < max_chunks:
+        with get_connection() as conn:
+            state = conn.execute(
+                "SELECT indexed_through, backfill_target FROM search_index_state"
+            ).fetchone()
+            if state is None or state["indexed_through"] >= state["backfill_target"]:
+                break
+
+            start = state["indexed_through"]
+            end = min(start + chunk_size, state["backfill_target"])
+            cursor = conn.execute(
+                """INSERT INTO messages_fts (rowid, content)
+                   SELECT rowid, content FROM messages WHERE rowid > ? AND rowid <= ?""",
+                (start, end)
+            )
+            conn.execute("UPDATE search_index_state SET indexed_through = ?", (end,))
+            conn.commit()
+
+        indexed += cursor.rowcount
+        chunks += 1
+        if pause:
+            time.sleep(pause)
+    return indexed
+
+
+def get_search_index_status() -> Optional[dict]:
+    """Get backfill progress of the full-text index (None if unavailable)."""
+    if not message_search_available():
+        return None
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT indexed_through, backfill_target FROM search_index_state"
+        ).fetchone()
+    return {
+        "indexed_through": row["indexed_through"],
+        "backfill_target": row["backfill_target"],
+        "complete": row["indexed_through"] >= row["backfill_target"],
+    }
+
+
+def start_search_backfill():
+    """Backfill the full-text index on a background thread (if not running)."""
+    global _backfill_thread
+    if _backfill_thread is not None and _backfill_thread.is_alive():
+        return
+
+    def run():
+        try:
+            indexed = backfill_message_search(pause=SEARCH_BACKFILL_PAUSE)
+            print(f"[DB] Search index backfill done ({indexed} messages)")
+        except Exception as e:
+            print(f"[DB] Search index backfill failed: {e}")
+
+    _backfill_thread = threading.Thread(target=run, name="jarvis-search-backfill", daemon=True)
+    _backfill_thread.start()
+
+
+def resume_search_backfill():
+    """Start the full-text backfill if older messages are still unindexed."""
+    status = get_search_index_status()
+    if status is not None and not status["complete"]:
+        start_search_backfill()
+
 
 # Data classes for typed access
 @dataclass
@@ -128,6 +348,8 @@ class Conversation:
     created_at: datetime
     updated_at: datetime
     archived: bool = False
+    message_count: int = 0
+    last_message_at: Optional[datetime] = None
 
 
 @dataclass
@@ -142,6 +364,19 @@ class Message:
     tool_call_id: Optional[str] = None  # Links tool response to tool call
     metadata: Optional[str] = None
     created_at: Optional[datetime] = None
+    seq: Optional[int] = None  # Position within the conversation
+
+
+@dataclass
+class ConversationPage:
+    conversations: list[Conversation]  # Newest first
+    has_more: bool  # More conversations past this page, in the paging direction
+
+
+@dataclass
+class MessagePage:
+    messages: list[Message]  # Conversation order (seq)
+    has_more: bool  # More messages past this page, in the paging direction
 
 
 @dataclass
@@ -155,6 +390,52 @@ class UserFact:
     updated_at: Optional[datetime] = None
 
 
+@dataclass
+class SearchHit:
+    message: Message
+    conversation_title: Optional[str]
+    snippet: str  # Content excerpt with matches wrapped in the highlight markers
+    rank: float  # bm25 score, lower is more relevant
+
+
+@dataclass
+class ConversationSummary:
+    conversation_id: str
+    summary: str
+    summarized_through: int  # rowid of the last message covered
+    updated_at: Optional[datetime] = None
+
+
+def _row_to_conversation(row: sqlite3.Row) -> Conversation:
+    """Build a Conversation from a conversations table row."""
+    return Conversation(
+        id=row["id"],
+        title=row["title"],
+        created_at=row["created_at"],
+        updated_at=row["updated_at"],
+        archived=bool(row["archived"]),
+        message_count=row["message_count"],
+        last_message_at=row["last_message_at"],
+    )
+
+
+def _row_to_message(row: sqlite3.Row) -> Message:
+    """Build a Message from a messages table row."""
+    return Message(
+        id=row["id"],
+        conversation_id=row["conversation_id"],
+        role=row["role"],
+        content=row["content"],
+        message_type=row["message_type"],
+        tool_name=row["tool_name"],
+        tool_args=row["tool_args"],
+        tool_call_id=row["tool_call_id"],
+        metadata=row["metadata"],
+        created_at=row["created_at"],
+        seq=row["seq"],
+    )
+
+
 def generate_id() -> str:
     """Generate a unique ID."""
     return str(uuid.uuid4())[:8]
@@ -180,13 +461,7 @@ def get_conversation(conv_id: str) -> Optional[Conversation]:
             "SELECT * FROM conversations WHERE id = ?", (conv_id,)
         ).fetchone()
         if row:
-            return Conversation(
-                id=row["id"],
-                title=row["title"],
-                created_at=row["created_at"],
-                updated_at=row["updated_at"],
-                archived=bool(row["archived"])
-            )
+            return _row_to_conversation(row)
     return None
 
 
@@ -196,19 +471,84 @@ def list_conversations(limit: int = 50, include_archived: bool = False) -> list[
         query = "SELECT * FROM conversations"
         if not include_archived:
             query += " WHERE archived = FALSE"
-        query += " ORDER BY updated_at DESC LIMIT ?"
+        query += " ORDER BY updated_at DESC, id DESC LIMIT ?"
 
         rows = conn.execute(query, (limit,)).fetchall()
-        return [
-            Conversation(
-                id=row["id"],
-                title=row["title"],
-                created_at=row["created_at"],
-                updated_at=row["updated_at"],
-                archived=bool(row["archived"])
-            )
-            for row in rows
-        ]
+        return [_row_to_conversation(row) for row in rows]
+
+
+def list_conversations_page(
+    limit: int = 50,
+    include_archived: bool = False,
+    before: Optional[tuple[str, str]] = None,
+    after: Optional[tuple[str, str]] = None,
+) -> ConversationPage:
+    """List conversations newest first, one keyset page at a time.
+
+    Pages are keyed on (updated_at, id), so each fetch is an index range
+    scan no matter how deep the client has scrolled (unlike OFFSET).
+
+    Args:
+        limit: Conversations per page
+        include_archived: Include archived conversations
+        before: (updated_at, id) of the last conversation seen; returns older ones
+        after: (updated_at, id) of the first conversation seen; returns newer ones
+
+    Returns:
+        The page, newest first either way
+    """
+    sql = "SELECT * FROM conversations WHERE TRUE"
+    params: list = []
+    if not include_archived:
+        sql += " AND archived = FALSE"
+
+    if after is not None:
+        sql += " AND (updated_at, id) > (?, ?) ORDER BY updated_at ASC, id ASC LIMIT ?"
+        params.extend(after)
+    else:
+        if before is not None:
+            sql += " AND (updated_at, id) < (?, ?)"
+            params.extend(before)
+        sql += " ORDER BY updated_at DESC, id DESC LIMIT ?"
+    # One extra row tells whether another page follows
+    params.append(limit + 1)
+
+    with get_connection() as conn:
+        rows = conn.execute(sql, params).fetchall()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if after is not None:
+        rows.reverse()
+    return ConversationPage([_row_to_conversation(row) for row in rows], has_more)
+
+
+def count_conversations(include_archived: bool = False) -> int:
+    """Count conversations without loading them."""
+    with get_connection() as conn:
+        query = "SELECT COUNT(*) FROM conversations"
+        if not include_archived:
+            query += " WHERE archived = FALSE"
+        return conn.execute(query).fetchone()[0]
+
+
+def get_database_stats() -> dict:
+    """Conversation and message totals in a single aggregate query.
+
+    Returns:
+        Dict with conversations (active), archived_conversations,
+        messages and last_message_at
+    """
+    with get_connection() as conn:
+        row = conn.execute(
+            """SELECT
+                   COALESCE(SUM(archived = FALSE), 0) AS conversations,
+                   COALESCE(SUM(archived = TRUE), 0) AS archived_conversations,
+                   COALESCE(SUM(message_count), 0) AS messages,
+                   MAX(last_message_at) AS last_message_at
+               FROM conversations"""
+        ).fetchone()
+        return dict(row)
 
 
 def update_conversation_title(conv_id: str, title: str):
@@ -221,7 +561,48 @@ def update_conversation_title(conv_id: str, title: str):
         conn.commit()
 
 
+def archive_conversation(conv_id: str):
+    """Archive (soft delete) a conversation."""
+    with get_connection() as conn:
+        conn.execute(
+            "UPDATE conversations SET archived = TRUE WHERE id = ?",
+            (conv_id,)
+        )
+        conn.commit()
+
+
 # Message CRUD
+
+# seq is computed inside the INSERT, which holds the write lock, so
+# concurrent writers can never hand out the same number
+_INSERT_MESSAGE = """
+    INSERT INTO messages
+    (id, conversation_id, role, content, message_type, tool_name, tool_args, tool_call_id, metadata, seq)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?,
+            (SELECT COALESCE(MAX(seq), 0) + 1 FROM messages WHERE conversation_id = ?))
+"""
+
+# Only a second response to the same tool call is skipped; any other
+# conflict (e.g. an ID collision) still raises IntegrityError
+INSERT_MESSAGE_SQL = _INSERT_MESSAGE + """
+    ON CONFLICT(conversation_id, tool_call_id)
+    WHERE role = 'tool' AND tool_call_id IS NOT NULL AND tool_call_id != ''
+    DO NOTHING
+"""
+
+
+def _insert_message(conn: sqlite3.Connection, row: tuple) -> bool:
+    """Insert one message row; return False if it was a duplicate tool response."""
+    try:
+        cursor = conn.execute(INSERT_MESSAGE_SQL, row)
+    except sqlite3.OperationalError as e:
+        if "ON CONFLICT" not in str(e):
+            raise
+        # No idx_messages_tool_call yet (duplicates left for `jarvis compact`)
+        cursor = conn.execute(_INSERT_MESSAGE, row)
+    return cursor.rowcount > 0
+
+
 def add_message(
     conversation_id: str,
     role: str,
@@ -231,51 +612,99 @@ def add_message(
     tool_args: Optional[str] = None,
     tool_call_id: Optional[str] = None,
     metadata: Optional[str] = None
-) -> str:
-    """Add a message to a conversation."""
+) -> Optional[str]:
+    """Add a message to a conversation.
+
+    Returns:
+        The message ID, or None if it was a tool message whose
+        tool_call_id is already stored in the conversation (skipped)
+    """
     msg_id = generate_id()
     with get_connection() as conn:
+        inserted = _insert_message(
+            conn,
+            (msg_id, conversation_id, role, content, message_type, tool_name, tool_args, tool_call_id, metadata,
+             conversation_id)
+        )
+        # Update conversation timestamp and message stats
         conn.execute(
-            """INSERT INTO messages
-               (id, conversation_id, role, content, message_type, tool_name, tool_args, tool_call_id, metadata)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (msg_id, conversation_id, role, content, message_type, tool_name, tool_args, tool_call_id, metadata)
+            """UPDATE conversations
+               SET updated_at = CURRENT_TIMESTAMP,
+                   message_count = message_count + ?,
+                   last_message_at = CASE WHEN ? THEN CURRENT_TIMESTAMP ELSE last_message_at END
+               WHERE id = ?""",
+            (int(inserted), inserted, conversation_id)
+        )
+        conn.commit()
+    return msg_id if inserted else None
+
+
+def add_messages(
+    conversation_id: str,
+    messages: list[dict],
+    title: Optional[str] = None,
+) -> list[Optional[str]]:
+    """Add several messages to a conversation in a single transaction.
+
+    Args:
+        conversation_id: Conversation to append to
+        messages: Dicts with the same keys as add_message() arguments
+            (role and content required)
+        title: Optionally set the conversation title in the same write
+
+    Returns:
+        One entry per message, in order: its ID, or None if it was skipped
+        (a tool message already stored for the same tool_call_id, as in
+        add_message())
+    """
+    if not messages and title is None:
+        return []
+
+    msg_ids = [generate_id() for _ in messages]
+    rows = [
+        (
+            msg_id,
+            conversation_id,
+            msg["role"],
+            msg["content"],
+            msg.get("message_type", "text"),
+            msg.get("tool_name"),
+            msg.get("tool_args"),
+            msg.get("tool_call_id"),
+            msg.get("metadata"),
+            conversation_id,
         )
-        # Update conversation timestamp
+        for msg_id, msg in zip(msg_ids, messages)
+    ]
+    with get_connection() as conn:
+        stored = [_insert_message(conn, row) for row in rows]
+        inserted = sum(stored)
+        # One timestamp, stats (and optional title) update for the whole batch
         conn.execute(
-            "UPDATE conversations SET updated_at = CURRENT_TIMESTAMP WHERE id = ?",
-            (conversation_id,)
+            """UPDATE conversations
+               SET updated_at = CURRENT_TIMESTAMP,
+                   title = COALESCE(?, title),
+                   message_count = message_count + ?,
+                   last_message_at = CASE WHEN ? THEN CURRENT_TIMESTAMP ELSE last_message_at END
+               WHERE id = ?""",
+            (title, inserted, inserted > 0, conversation_id)
         )
         conn.commit()
-    return msg_id
+    return [msg_id if ok else None for msg_id, ok in zip(msg_ids, stored)]
 
 
 def get_messages(conversation_id: str, limit: int = 100) -> list[Message]:
-    """Get messages for a conversation, ordered by creation time."""
+    """Get messages for a conversation, in conversation order (seq)."""
     with get_connection() as conn:
         rows = conn.execute(
             """SELECT * FROM messages
                WHERE conversation_id = ?
-               ORDER BY created_at ASC
+               ORDER BY seq ASC
                LIMIT ?""",
             (conversation_id, limit)
         ).fetchall()
 
-        return [
-            Message(
-                id=row["id"],
-                conversation_id=row["conversation_id"],
-                role=row["role"],
-                content=row["content"],
-                message_type=row["message_type"],
-                tool_name=row["tool_name"],
-                tool_args=row["tool_args"],
-                tool_call_id=row["tool_call_id"],
-                metadata=row["metadata"],
-                created_at=row["created_at"]
-            )
-            for row in rows
-        ]
+        return [_row_to_message(row) for row in rows]
 
 
 def get_recent_messages(conversation_id: str, limit: int = 10) -> list[Message]:
@@ -286,33 +715,201 @@ def get_recent_messages(conversation_id: str, limit: int = 10) -> list[Message]:
     the sliding window logic properly.
     """
     with get_connection() as conn:
+        # Newest first is a backward range scan of the (conversation_id, seq)
+        # index; flip to chronological order here instead of re-sorting in SQL
         rows = conn.execute(
-            """SELECT * FROM (
-                SELECT * FROM messages
-                WHERE conversation_id = ?
-                ORDER BY created_at DESC
-                LIMIT ?
-            ) ORDER BY created_at ASC""",
+            """SELECT * FROM messages
+               WHERE conversation_id = ?
+               ORDER BY seq DESC
+               LIMIT ?""",
             (conversation_id, limit)
         ).fetchall()
 
+        return [_row_to_message(row) for row in reversed(rows)]
+
+
+def get_messages_page(
+    conversation_id: str,
+    limit: int = 50,
+    before: Optional[int] = None,
+    after: Optional[int] = None,
+) -> MessagePage:
+    """Get one keyset page of a conversation's messages.
+
+    Without a cursor this is the newest page, which is what a chat view
+    shows first; scroll back with before=<seq of the first message shown>.
+    Every page is a range scan of the (conversation_id, seq) index.
+
+    Args:
+        conversation_id: Conversation to read
+        limit: Messages per page
+        before: Return messages with a lower seq (older)
+        after: Return messages with a higher seq (newer)
+
+    Returns:
+        The page, in conversation order either way
+    """
+    sql = "SELECT * FROM messages WHERE conversation_id = ?"
+    params: list = [conversation_id]
+    if after is not None:
+        sql += " AND seq > ? ORDER BY seq ASC LIMIT ?"
+        params.append(after)
+    else:
+        if before is not None:
+            sql += " AND seq < ?"
+            params.append(before)
+        sql += " ORDER BY seq DESC LIMIT ?"
+    # One extra row tells whether another page follows
+    params.append(limit + 1)
+
+    with get_connection() as conn:
+        rows = conn.execute(sql, params).fetchall()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if after is None:
+        rows.reverse()
+    return MessagePage([_row_to_message(row) for row in rows], has_more)
+
+
+# Full-text search
+def _fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query: all words must match.
+
+    Words are quoted so punctuation in user input can't break the query
+    syntax; the last word also matches as a prefix (search-as-you-type).
+    """
+    words = re.findall(r"\w+", text)
+    if not words:
+        return ""
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search_messages(
+    query: str,
+    limit: int = 20,
+    offset: int = 0,
+    conversation_id: Optional[str] = None,
+    role: Optional[str] = None,
+    include_archived: bool = False,
+    highlight: tuple[str, str] = ("[", "]"),
+    snippet_tokens: int = 12,
+) -> list[SearchHit]:
+    """Search message content, best matches first.
+
+    Args:
+        query: Free text; every word must appear (last word as a prefix)
+        limit: Maximum number of hits
+        offset: Hits to skip (paging)
+        conversation_id: Only search this conversation
+        role: Only search messages with this role
+        include_archived: Also search archived conversations
+        highlight: Markers placed around matched terms in the snippet
+        snippet_tokens: Approximate snippet length in tokens
+
+    Returns:
+        Hits ranked by bm25
+    """
+    match = _fts_query(query)
+    if not match:
+        return []
+
+    sql = """SELECT m.*, c.title AS conversation_title,
+                    snippet(messages_fts, 0, ?, ?, '…', ?) AS snippet,
+                    bm25(messages_fts) AS rank
+             FROM messages_fts
+             JOIN messages m ON m.rowid = messages_fts.rowid
+             JOIN conversations c ON c.id = m.conversation_id
+             WHERE messages_fts MATCH ?"""
+    params: list = [highlight[0], highlight[1], snippet_tokens, match]
+
+    if conversation_id:
+        sql += " AND m.conversation_id = ?"
+        params.append(conversation_id)
+    if role:
+        sql += " AND m.role = ?"
+        params.append(role)
+    if not include_archived:
+        sql += " AND c.archived = FALSE"
+
+    sql += " ORDER BY rank LIMIT ? OFFSET ?"
+    params.extend([limit, offset])
+
+    with get_connection() as conn:
+        rows = conn.execute(sql, params).fetchall()
         return [
-            Message(
-                id=row["id"],
-                conversation_id=row["conversation_id"],
-                role=row["role"],
-                content=row["content"],
-                message_type=row["message_type"],
-                tool_name=row["tool_name"],
-                tool_args=row["tool_args"],
-                tool_call_id=row["tool_call_id"],
-                metadata=row["metadata"],
-                created_at=row["created_at"]
+            SearchHit(
+                message=_row_to_message(row),
+                conversation_title=row["conversation_title"],
+                snippet=row["snippet"],
+                rank=row["rank"],
             )
             for row in rows
         ]
 
 
+# Conversation summaries
+def get_message_rows_after(
+    conversation_id: str,
+    after_rowid: int = 0,
+    limit: int = 100,
+) -> list[tuple[int, Message]]:
+    """Get (rowid, message) pairs inserted after a rowid, oldest first."""
+    with get_connection() as conn:
+        rows = conn.execute(
+            """SELECT rowid, * FROM messages
+               WHERE conversation_id = ? AND rowid > ?
+               ORDER BY rowid ASC
+               LIMIT ?""",
+            (conversation_id, after_rowid, limit)
+        ).fetchall()
+        return [(row["rowid"], _row_to_message(row)) for row in rows]
+
+
+def count_messages_after(conversation_id: str, after_rowid: int = 0) -> int:
+    """Count messages in a conversation inserted after a rowid."""
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT COUNT(*) FROM messages WHERE conversation_id = ? AND rowid > ?",
+            (conversation_id, after_rowid)
+        ).fetchone()
+        return row[0]
+
+
+def get_conversation_summary(conversation_id: str) -> Optional[ConversationSummary]:
+    """Get the rolling summary of a conversation, if one exists."""
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT * FROM conversation_summaries WHERE conversation_id = ?",
+            (conversation_id,)
+        ).fetchone()
+        if row:
+            return ConversationSummary(
+                conversation_id=row["conversation_id"],
+                summary=row["summary"],
+                summarized_through=row["summarized_through"],
+                updated_at=row["updated_at"],
+            )
+    return None
+
+
+def save_conversation_summary(conversation_id: str, summary: str, summarized_through: int):
+    """Store a conversation's rolling summary and its message watermark."""
+    with get_connection() as conn:
+        conn.execute(
+            """INSERT INTO conversation_summaries (conversation_id, summary, summarized_through)
+               VALUES (?, ?, ?)
+               ON CONFLICT(conversation_id) DO UPDATE SET
+               summary = excluded.summary,
+               summarized_through = excluded.summarized_through,
+               updated_at = CURRENT_TIMESTAMP""",
+            (conversation_id, summary, summarized_through)
+        )
+        conn.commit()
+
+
 # User facts (long-term memory)
 def set_user_fact(fact_type: str, key: str, value: str, confidence: float = 1.0):
     """Set or update a user fact."""
@@ -357,6 +954,153 @@ def get_user_facts(fact_type: Optional[str] = None) -> list[UserFact]:
         ]
 
 
+# Bulk export / import (see jarvis.transfer)
+
+# Columns carried in exports; message_count/last_message_at are derived
+EXPORT_COLUMNS = {
+    "conversations": ("id", "title", "created_at", "updated_at", "archived"),
+    "messages": (
+        "id", "conversation_id", "role", "content", "message_type", "tool_name",
+        "tool_args", "tool_call_id", "metadata", "created_at", "seq",
+    ),
+    "user_facts": ("id", "fact_type", "key", "value", "confidence", "created_at", "updated_at"),
+    "reminders": ("id", "message", "due_at", "created_at", "completed_at", "notified"),
+}
+
+# Existing rows win on import, so importing the same file twice is harmless.
+# A message whose seq is missing, or already taken by another message of
+# the conversation (it grew since the export), is appended after the
+# conversation's last one.
+_IMPORT_MESSAGE = """INSERT INTO messages
+        (id, conversation_id, role, content, message_type, tool_name, tool_args, tool_call_id,
+         metadata, created_at, seq)
+        VALUES (:id, :conversation_id, :role, :content, COALESCE(:message_type, 'text'), :tool_name,
+                :tool_args, :tool_call_id, :metadata, COALESCE(:created_at, CURRENT_TIMESTAMP),
+                CASE WHEN :seq IS NULL OR EXISTS (SELECT 1 FROM messages
+                                                  WHERE conversation_id = :conversation_id AND seq = :seq)
+                     THEN (SELECT COALESCE(MAX(seq), 0) + 1 FROM messages
+                           WHERE conversation_id = :conversation_id)
+                     ELSE :seq END)
+        ON CONFLICT(id) DO NOTHING"""
+
+IMPORT_SQL = {
+    "conversations": """INSERT INTO conversations (id, title, created_at, updated_at, archived)
+        VALUES (:id, :title, COALESCE(:created_at, CURRENT_TIMESTAMP),
+                COALESCE(:updated_at, CURRENT_TIMESTAMP), COALESCE(:archived, FALSE))
+        ON CONFLICT DO NOTHING""",
+    # A second response to a stored tool call is skipped, as in add_message()
+    "messages": _IMPORT_MESSAGE + """
+        ON CONFLICT(conversation_id, tool_call_id)
+        WHERE role = 'tool' AND tool_call_id IS NOT NULL AND tool_call_id != ''
+        DO NOTHING""",
+    "user_facts": """INSERT INTO user_facts (id, fact_type, key, value, confidence, created_at, updated_at)
+        VALUES (:id, :fact_type, :key, :value, COALESCE(:confidence, 1.0),
+                COALESCE(:created_at, CURRENT_TIMESTAMP), :updated_at)
+        ON CONFLICT DO NOTHING""",
+    "reminders": """INSERT INTO reminders (id, message, due_at, created_at, completed_at, notified)
+        VALUES (:id, :message, :due_at, COALESCE(:created_at, CURRENT_TIMESTAMP), :completed_at,
+                COALESCE(:notified, FALSE))
+        ON CONFLICT DO NOTHING""",
+}
+
+# Rows fetched per query while exporting
+EXPORT_CHUNK = 1000
+
+
+def iter_table_rows(table: str, key: str, chunk_size: int = EXPORT_CHUNK) -> Iterator[dict]:
+    """Yield every row of an exportable table, ordered by key.
+
+    Reads one keyset chunk per query and holds no cursor or transaction
+    between chunks, so memory stays bounded and the generator can be
+    resumed from any thread.
+
+    Args:
+        table: Table in EXPORT_COLUMNS
+        key: Column list to order and page by, e.g. "id" or
+            "conversation_id, seq" (must be unique)
+        chunk_size: Rows per query
+    """
+    columns = EXPORT_COLUMNS[table]
+    key_columns = [c.strip() for c in key.split(",")]
+    select = f"SELECT {', '.join(columns)} FROM {table}"
+    order = f" ORDER BY {key} LIMIT ?"
+    last: Optional[tuple] = None
+    while True:
+        with get_connection() as conn:
+            if last is None:
+                rows = conn.execute(select + order, (chunk_size,)).fetchall()
+            else:
+                placeholders = ", ".join("?" * len(key_columns))
+                rows = conn.execute(
+                    f"{select} WHERE ({key}) > ({placeholders}){order}",
+                    (*last, chunk_size)
+                ).fetchall()
+        for row in rows:
+            yield dict(row)
+        if len(rows) < chunk_size:
+            return
+        last = tuple(rows[-1][c] for c in key_columns)
+
+
+def _import_message(conn: sqlite3.Connection, params: dict) -> Optional[bool]:
+    """Import one message row.
+
+    Returns:
+        True if inserted, None if a message with its ID exists, False if
+        it was skipped as a second response to a stored tool call
+    """
+    try:
+        cursor = conn.execute(IMPORT_SQL["messages"], params)
+    except sqlite3.OperationalError as e:
+        if "ON CONFLICT" not in str(e):
+            raise
+        # No idx_messages_tool_call yet (duplicates left for `jarvis compact`)
+        cursor = conn.execute(_IMPORT_MESSAGE, params)
+    if cursor.rowcount > 0:
+        return True
+    exists = conn.execute("SELECT 1 FROM messages WHERE id = ?", (params["id"],)).fetchone()
+    return None if exists else False
+
+
+def import_rows(rows: dict[str, list[dict]]) -> tuple[dict[str, int], dict[str, int]]:
+    """Insert exported rows in a single transaction.
+
+    Args:
+        rows: Table name -> records (keys from EXPORT_COLUMNS; missing
+            keys get defaults)
+
+    Returns:
+        (inserted, skipped): table name -> rows inserted, and -> new rows
+        that were not inserted (tool responses already stored under
+        another message ID). Rows that already exist count in neither.
+    """
+    inserted, skipped = {}, {}
+    with get_connection() as conn:
+        # Conversations first so their messages have a parent
+        for table in EXPORT_COLUMNS:
+            records = rows.get(table)
+            if not records:
+                continue
+            columns = EXPORT_COLUMNS[table]
+            params = ({column: record.get(column) for column in columns} for record in records)
+            if table == "messages":
+                # Row by row: each seq depends on the rows inserted before it
+                outcomes = [_import_message(conn, row) for row in params]
+                inserted[table] = outcomes.count(True)
+                if outcomes.count(False):
+                    skipped[table] = outcomes.count(False)
+                continue
+            cursor = conn.executemany(IMPORT_SQL[table], params)
+            inserted[table] = max(cursor.rowcount, 0)
+        conn.commit()
+
+    conversation_ids = {m["conversation_id"] for m in rows.get("messages", ())}
+    conversation_ids.update(c["id"] for c in rows.get("conversations", ()))
+    if inserted.get("messages"):
+        refresh_conversation_stats(sorted(conversation_ids))
+    return inserted, skipped
+
+
 # Tool usage tracking
 def log_tool_usage(tool_name: str, query: Optional[str] = None, success: bool = True):
     """Log tool usage for analytics."""
@@ -368,5 +1112,20 @@ def log_tool_usage(tool_name: str, query: Optional[str] = None, success: bool =
         conn.commit()
 
 
-# Initialize on import
-init_db()
+def log_tool_usages(events: list[dict]):
+    """Insert many tool call records in a single transaction.
+
+    Args:
+        events: Dicts with tool_name, query, success, duration_ms,
+            args_size, error and used_at ("YYYY-MM-DD HH:MM:SS" UTC)
+    """
+    if not events:
+        return
+    with get_connection() as conn:
+        conn.executemany(
+            """INSERT INTO tool_usage (tool_name, query, success, duration_ms, args_size, error, used_at)
+               VALUES (:tool_name, :query, :success, :duration_ms, :args_size, :error, :used_at)""",
+            events
+        )
+        conn.commit()
+
@@ -1,5 +1,18 @@
 """JARVIS Memory module - Session and conversation management."""
 
-from .session import SessionMemory, get_session_memory, get_or_create_session
+from .session import SessionMemory, TurnWriter, get_session_memory, get_or_create_session
+from .compaction import ConversationCompactor, get_compactor
+from .tokens import CharEstimator, Tokenizer, get_tokenizer, register_tokenizer
 
-__all__ = ["SessionMemory", "get_session_memory", "get_or_create_session"]
+__all__ = [
+    "SessionMemory",
+    "TurnWriter",
+    "get_session_memory",
+    "get_or_create_session",
+    "ConversationCompactor",
+    "get_compactor",
+    "CharEstimator",
+    "Tokenizer",
+    "get_tokenizer",
+    "register_tokenizer",
+]
@@ -0,0 +1,168 @@
+"""JARVIS - Rolling summarization of old conversation history.
+
+Messages that fall out of the context window are folded into a stored
+per-conversation summary, one chunk at a time: each update feeds the
+previous summary plus the next chunk to the LLM, so the summary is never
+regenerated from scratch. Work runs on a single background thread so it
+never delays a turn.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from ..config import get_config
+from ..database import (
+    Message,
+    count_messages_after,
+    get_conversation_summary,
+    get_message_rows_after,
+    save_conversation_summary,
+)
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and JARVIS, a voice assistant.
+
+Current summary:
+{summary}
+
+New messages:
+{messages}
+
+Rewrite the summary so it also covers the new messages. Keep facts, decisions, names, numbers and open requests; drop small talk. Use at most 150 words. Reply with the summary only."""
+
+# Long tool outputs are clipped before being summarized
+MAX_CHARS_PER_MESSAGE = 500
+
+# (previous summary, new messages) -> updated summary
+Summarizer = Callable[[str, list[Message]], str]
+
+
+def format_messages_for_summary(messages: list[Message]) -> str:
+    """Render messages as plain transcript lines for the summary prompt."""
+    lines = []
+    for msg in messages:
+        content = msg.content[:MAX_CHARS_PER_MESSAGE]
+        if msg.role == "user":
+            lines.append(f"User: {content}")
+        elif msg.role == "assistant":
+            if content:
+                lines.append(f"JARVIS: {content}")
+        elif msg.role == "tool":
+            lines.append(f"Tool {msg.tool_name or 'unknown'}: {content}")
+    return "\n".join(lines)
+
+
+def summarize_with_llm(summary: str, messages: list[Message]) -> str:
+    """Update a summary with new messages using the configured Ollama model."""
+    from langchain_ollama import ChatOllama
+
+    model_config = get_config().model
+    # Same keep_alive as the agent, or this request would reset Ollama's unload timer
+    llm = ChatOllama(model=model_config.name, temperature=0, keep_alive=model_config.keep_alive)
+    prompt = SUMMARY_PROMPT.format(
+        summary=summary or "(empty)",
+        messages=format_messages_for_summary(messages),
+    )
+    return llm.invoke(prompt).content.strip()
+
+
+class ConversationCompactor:
+    """Background worker that keeps conversation summaries up to date."""
+
+    def __init__(
+        self,
+        summarize: Optional[Summarizer] = None,
+        chunk_size: Optional[int] = None,
+    ):
+        """Initialize the compactor.
+
+        Args:
+            summarize: Summary update function (default: Ollama model)
+            chunk_size: Messages folded into the summary per update
+                (default: memory.summary_chunk_size from config)
+        """
+        self.summarize = summarize or summarize_with_llm
+        self.chunk_size = chunk_size or get_config().memory.summary_chunk_size
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="jarvis-compaction")
+        self._pending: set[str] = set()
+        self._lock = threading.Lock()
+
+    def schedule(
+        self,
+        conversation_id: str,
+        keep_recent: int,
+        on_update: Optional[Callable[[str], None]] = None,
+        on_done: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """Queue a compaction pass for a conversation (deduplicated).
+
+        Args:
+            conversation_id: Conversation to compact
+            keep_recent: Number of newest messages still in the context
+                window, which must not be summarized
+            on_update: Called with the new summary text after each update
+            on_done: Called once the pass has folded in everything outside
+                the window (not called if the pass fails, or if a pass
+                for the conversation was already queued)
+        """
+        with self._lock:
+            if conversation_id in self._pending:
+                return
+            self._pending.add(conversation_id)
+
+        self._executor.submit(self._run, conversation_id, keep_recent, on_update, on_done)
+
+    def compact(
+        self,
+        conversation_id: str,
+        keep_recent: int,
+        on_update: Optional[Callable[[str], None]] = None,
+    ) -> int:
+        """Fold every complete chunk outside the window into the summary.
+
+        Returns:
+            Number of chunks summarized
+        """
+        existing = get_conversation_summary(conversation_id)
+        summary = existing.summary if existing else ""
+        watermark = existing.summarized_through if existing else 0
+        chunks = 0
+
+        while count_messages_after(conversation_id, watermark) - keep_recent >= self.chunk_size:
+            rows = get_message_rows_after(conversation_id, watermark, limit=self.chunk_size)
+            if not rows:
+                break
+
+            summary = self.summarize(summary, [msg for _, msg in rows])
+            watermark = rows[-1][0]
+            save_conversation_summary(conversation_id, summary, watermark)
+            chunks += 1
+
+            if on_update:
+                on_update(summary)
+
+        return chunks
+
+    def _run(self, conversation_id: str, keep_recent: int, on_update, on_done) -> None:
+        """Worker entry point: compact and swallow errors."""
+        try:
+            self.compact(conversation_id, keep_recent, on_update)
+            if on_done:
+                on_done()
+        except Exception as e:
+            print(f"[Memory] Summarization failed for {conversation_id}: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(conversation_id)
+
+
+# Global compactor instance (lazy loaded)
+_compactor: Optional[ConversationCompactor] = None
+
+
+def get_compactor() -> ConversationCompactor:
+    """Get the shared background compactor."""
+    global _compactor
+    if _compactor is None:
+        _compactor = ConversationCompactor()
+    return _compactor
@@ -5,7 +5,9 @@ to ensure tool call/response pairs are never split.
 """
 
 import json
-from typing import Optional
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterator, Optional
 
 from langchain_core.messages import (
     AIMessage,
@@ -14,17 +16,21 @@ from langchain_core.messages import (
     ToolMessage,
 )
 
+from ..config import get_config
 from ..database import (
     Message,
     UserFact,
     add_message,
+    add_messages,
     create_conversation,
     get_conversation,
+    get_conversation_summary,
     get_recent_messages,
     get_user_facts,
     list_conversations,
     update_conversation_title,
 )
+from .tokens import Tokenizer, count_message_tokens, get_tokenizer
 
 
 class SessionMemory:
@@ -33,28 +39,67 @@ class SessionMemory:
     Handles:
     - Creating/resuming conversations
     - Building message history for LLM context
-    - Safe sliding window (never splits tool call/response pairs)
+    - Safe sliding window (never splits tool call/response pairs), either
+      by message count or by token budget
     - Auto-generating conversation titles
+    - Rolling summary of messages that left the window (if enabled)
+    - Prefix-stable windows: with memory.window_drop, the window keeps its
+      first message while it grows and moves only once it is full,
+      dropping that share of it at once. Between drops each prompt starts
+      with the previous one, so Ollama can reuse its prompt cache.
+
+    Converted LangChain messages are cached in-process: the database is
+    read once on the first get_context_messages() call, and later
+    messages added through this session are appended to the cache.
     """
 
+    # Extra messages kept beyond the window so tool pairs can be completed
+    CONTEXT_BUFFER = 10
+
     def __init__(
         self,
         conversation_id: Optional[str] = None,
-        context_window: int = 20,
+        context_window: Optional[int] = None,
+        token_budget: Optional[int] = None,
+        tokenizer: Optional[Tokenizer] = None,
     ):
         """Initialize session memory.
 
         Args:
-            conversation_id: Resume existing conversation, or None for new
+            conversation_id: Resume existing conversation (its title is
+                kept), or None for new
             context_window: Max messages to include in LLM context
+                (default: memory.context_window from config, 20 as shipped)
+            token_budget: Max history tokens in LLM context; a positive value
+                enables token-budget mode (default: memory.context_token_budget)
+            tokenizer: Tokenizer for token-budget mode
+                (default: memory.tokenizer from config)
         """
-        self.context_window = context_window
+        memory_config = get_config().memory
+        self.context_window = context_window or memory_config.context_window
+        self.token_budget = (
+            memory_config.context_token_budget if token_budget is None else token_budget
+        )
+
+        self.summarize = memory_config.summarize
+        self.window_drop = min(max(memory_config.window_drop, 0.0), 0.9)
+
+        self.tokenizer = None
+        if self.token_budget:
+            self.tokenizer = tokenizer or get_tokenizer(memory_config.tokenizer)
+            self._context_size = max(memory_config.context_max_messages, self.context_window)
+        else:
+            self._context_size = self.context_window + self.CONTEXT_BUFFER
+
+        self._title_generated = False
 
         if conversation_id:
             # Resume existing conversation
             conv = get_conversation(conversation_id)
             if conv:
                 self.conversation_id = conversation_id
+                # Keep the title set by the first message
+                self._title_generated = conv.title is not None
             else:
                 # Conversation not found, create new
                 self.conversation_id = create_conversation()
@@ -62,7 +107,24 @@ class SessionMemory:
             # Create new conversation
             self.conversation_id = create_conversation()
 
-        self._title_generated = False
+        # Converted context messages, loaded lazily from the DB, and their
+        # token counts (token-budget mode only, kept aligned with _context)
+        self._context: Optional[deque] = None
+        self._context_tokens: Optional[deque] = None
+
+        # Size of the last window handed to the LLM, and the cached summary
+        self._window_size: Optional[int] = None
+        self._summary: Optional[str] = None
+
+        # First message of the current window and the summary shown with it
+        # (prefix-stable windows, see class docstring). Each window move
+        # starts a generation; with summarize on, the summary is only
+        # pinned once a compaction pass of that generation has folded in
+        # the messages the move dropped
+        self._window_anchor = None
+        self._prompt_summary: Optional[str] = None
+        self._window_generation = 0
+        self._summary_behind = False
 
     def add_user_message(self, content: str) -> str:
         """Add a user message and return its ID."""
@@ -71,6 +133,7 @@ class SessionMemory:
             role="user",
             content=content,
         )
+        self._remember(msg_id, role="user", content=content)
 
         # Auto-generate title from first message
         if not self._title_generated:
@@ -82,33 +145,24 @@ class SessionMemory:
         self,
         content: str,
         tool_calls: Optional[list] = None,
+        interrupted: bool = False,
     ) -> str:
         """Add an assistant message.
 
         Args:
             content: The text response
             tool_calls: List of tool calls made (if any)
+            interrupted: True if generation was cancelled part-way
         """
-        metadata = None
-        if tool_calls:
-            # Store tool calls in metadata for reconstruction
-            metadata = json.dumps({
-                "tool_calls": [
-                    {
-                        "id": tc.get("id"),
-                        "name": tc.get("name"),
-                        "args": tc.get("args"),
-                    }
-                    for tc in tool_calls
-                ]
-            })
-
-        return add_message(
+        metadata = _assistant_metadata(tool_calls, interrupted)
+        msg_id = add_message(
             conversation_id=self.conversation_id,
             role="assistant",
             content=content,
             metadata=metadata,
         )
+        self._remember(msg_id, role="assistant", content=content, metadata=metadata)
+        return msg_id
 
     def add_tool_message(
         self,
@@ -116,9 +170,13 @@ class SessionMemory:
         content: str,
         tool_call_id: str,
         tool_args: Optional[str] = None,
-    ) -> str:
-        """Add a tool response message."""
-        return add_message(
+    ) -> Optional[str]:
+        """Add a tool response message.
+
+        Returns:
+            Its ID, or None if this tool call already has a stored response
+        """
+        msg_id = add_message(
             conversation_id=self.conversation_id,
             role="tool",
             content=content,
@@ -126,6 +184,48 @@ class SessionMemory:
             tool_args=tool_args,
             tool_call_id=tool_call_id,
         )
+        if msg_id is None:
+            return None
+        self._remember(
+            msg_id,
+            role="tool",
+            content=content,
+            tool_name=tool_name,
+            tool_args=tool_args,
+            tool_call_id=tool_call_id,
+        )
+        return msg_id
+
+    def _remember(self, msg_id: str, **fields):
+        """Append a newly stored message to the context cache (if loaded)."""
+        if self._context is None:
+            return
+
+        message = Message(id=msg_id, conversation_id=self.conversation_id, **fields)
+        lc_message = _to_langchain_message(message)
+        self._context.append(lc_message)
+        if self._context_tokens is not None:
+            self._context_tokens.append(count_message_tokens(lc_message, self.tokenizer))
+
+    @contextmanager
+    def turn(self) -> Iterator["TurnWriter"]:
+        """Collect one turn's messages and persist them in one transaction.
+
+        Messages recorded on the yielded writer are written when the block
+        exits, including when it raises, so the user message of a failed
+        turn is still kept.
+
+        Example:
+            with session.turn() as turn:
+                turn.add_user_message(query)
+                ...
+                turn.add_assistant_message(response)
+        """
+        writer = TurnWriter(self)
+        try:
+            yield writer
+        finally:
+            writer.flush()
 
     def get_context_messages(self) -> list:
         """Get messages for LLM context with safe sliding window.
@@ -133,28 +233,155 @@ class SessionMemory:
         Returns LangChain message objects ready for the agent.
         Ensures tool call/response pairs are never split.
         """
-        # Fetch more than needed to handle edge cases
-        raw_messages = get_recent_messages(
-            self.conversation_id,
-            limit=self.context_window + 10  # Buffer for tool pairs
-        )
+        if self._context is None:
+            self._load_context()
 
-        if not raw_messages:
+        if not self._context:
             return []
 
+        messages = list(self._context)
+        window = self._anchored_window(messages)
+        if window is None:
+            # First turn takes a full window; once full, drop a share of it
+            fraction = 1.0 if self._window_anchor is None else 1.0 - self.window_drop
+            window = self._select_window(messages, fraction)
+            self._window_anchor = window[0]
+            self._prompt_summary = None
+            self._window_generation += 1
+            self._summary_behind = self.summarize
+
+        self._window_size = len(window)
+        return window
+
+    def _select_window(self, messages: list, fraction: float = 1.0) -> list:
+        """Most recent messages within a fraction of the window limit."""
+        if self.token_budget:
+            return self._token_budget_window(
+                messages, list(self._context_tokens), max(1, int(self.token_budget * fraction))
+            )
         # Apply safe sliding window
-        messages = self._safe_sliding_window(raw_messages, self.context_window)
+        return self._safe_sliding_window(messages, max(1, int(self.context_window * fraction)))
+
+    def _anchored_window(self, messages: list) -> Optional[list]:
+        """The current window grown by the new messages, or None if it is full.
+
+        The window starts at a message kept by identity, so it is found
+        however far the cache deque has rotated.
+        """
+        if not self.window_drop or self._window_anchor is None:
+            return None
 
-        # Convert to LangChain message format
-        return self._to_langchain_messages(messages)
+        for start, msg in enumerate(messages):
+            if msg is self._window_anchor:
+                break
+        else:
+            return None
 
-    def _safe_sliding_window(
+        window = messages[start:]
+        if self.token_budget:
+            fits = sum(list(self._context_tokens)[start:]) <= self.token_budget
+        else:
+            fits = len(window) <= self.context_window
+        return window if fits else None
+
+    def get_summary(self) -> str:
+        """Get the rolling summary of messages older than the window.
+
+        With prefix-stable windows, the summary shown is kept until the
+        window moves (call get_context_messages() first), so a summary
+        updated in the background doesn't change the prompt prefix. Right
+        after a move the messages it dropped are not summarized yet, so
+        the latest summary is shown until the compactor has caught up,
+        and only then kept.
+        """
+        if self._summary is None:
+            summary = get_conversation_summary(self.conversation_id)
+            self._summary = summary.summary if summary else ""
+        if not self.window_drop:
+            return self._summary
+        if self._prompt_summary is None:
+            if self._summary_behind:
+                return self._summary
+            self._prompt_summary = self._summary
+        return self._prompt_summary
+
+    def _set_summary(self, summary: str):
+        """Receive an updated summary from the background compactor."""
+        self._summary = summary
+
+    def _summary_caught_up(self, generation: int):
+        """A compaction pass scheduled in `generation` has finished."""
+        if generation == self._window_generation:
+            self._summary_behind = False
+
+    def _schedule_compaction(self):
+        """Summarize messages that are no longer in the window (background)."""
+        if not self.summarize or self._window_size is None:
+            return
+
+        from .compaction import get_compactor
+
+        keep_recent = self._window_size
+        if self.window_drop and self._context is not None:
+            # The anchored window has grown by this turn's messages, and
+            # stays in the prompt until it moves
+            for age, msg in enumerate(reversed(self._context), start=1):
+                if msg is self._window_anchor:
+                    keep_recent = max(keep_recent, age)
+                    break
+
+        get_compactor().schedule(
+            self.conversation_id,
+            keep_recent=keep_recent,
+            on_update=self._set_summary,
+            on_done=lambda generation=self._window_generation: self._summary_caught_up(generation),
+        )
+
+    def _load_context(self):
+        """Fill the context cache from the database (first use only)."""
+        # Fetch more than needed to handle edge cases
+        raw_messages = get_recent_messages(self.conversation_id, limit=self._context_size)
+
+        lc_messages = self._to_langchain_messages(raw_messages)
+        self._context = deque(lc_messages, maxlen=self._context_size)
+        if self.token_budget:
+            self._context_tokens = deque(
+                (count_message_tokens(m, self.tokenizer) for m in lc_messages),
+                maxlen=self._context_size,
+            )
+
+    def _token_budget_window(
         self,
-        messages: list[Message],
-        limit: int,
-    ) -> list[Message]:
+        messages: list,
+        token_counts: list[int],
+        budget: int,
+    ) -> list:
+        """Take the most recent messages that fit in a token budget.
+
+        Messages are grouped into units that must stay together (an
+        assistant message with tool calls plus its tool responses), and
+        whole units are taken from the end until the next one would not
+        fit. The most recent unit is always included.
+        """
+        selected = []
+        used = 0
+
+        for unit in reversed(_group_tool_units(messages)):
+            cost = sum(token_counts[i] for i in unit)
+            if selected and used + cost > budget:
+                break
+            selected.append(unit)
+            used += cost
+
+        selected.reverse()
+        return [messages[i] for unit in selected for i in unit]
+
+    def _safe_sliding_window(self, messages: list, limit: int) -> list:
         """Apply sliding window without splitting tool call/response pairs.
 
+        Works on converted LangChain messages, so tool call IDs are read
+        from AIMessage.tool_calls instead of re-parsing stored metadata.
+
         The key insight: if we're about to cut off a tool message,
         we need to also include its parent assistant message (with tool_calls).
         """
@@ -171,20 +398,13 @@ class SessionMemory:
                 break
 
             # If this is a tool response, we need its parent tool call
-            if msg.role == "tool" and msg.tool_call_id:
+            if msg.type == "tool" and msg.tool_call_id:
                 tool_call_ids_needed.add(msg.tool_call_id)
 
             # If this is an assistant message with tool calls, check if needed
-            if msg.role == "assistant" and msg.metadata:
-                try:
-                    meta = json.loads(msg.metadata)
-                    if "tool_calls" in meta:
-                        for tc in meta["tool_calls"]:
-                            tc_id = tc.get("id")
-                            if tc_id in tool_call_ids_needed:
-                                tool_call_ids_needed.discard(tc_id)
-                except (json.JSONDecodeError, KeyError):
-                    pass
+            if msg.type == "ai":
+                for tc in msg.tool_calls:
+                    tool_call_ids_needed.discard(tc.get("id"))
 
             result.append(msg)
 
@@ -194,17 +414,12 @@ class SessionMemory:
             for msg in reversed(remaining_messages):
                 if not tool_call_ids_needed:
                     break
-                if msg.role == "assistant" and msg.metadata:
-                    try:
-                        meta = json.loads(msg.metadata)
-                        if "tool_calls" in meta:
-                            for tc in meta["tool_calls"]:
-                                if tc.get("id") in tool_call_ids_needed:
-                                    result.append(msg)
-                                    tool_call_ids_needed.discard(tc.get("id"))
-                                    break
-                    except (json.JSONDecodeError, KeyError):
-                        pass
+                if msg.type == "ai":
+                    for tc in msg.tool_calls:
+                        if tc.get("id") in tool_call_ids_needed:
+                            result.append(msg)
+                            tool_call_ids_needed.discard(tc.get("id"))
+                            break
 
         # Reverse to get chronological order
         result.reverse()
@@ -212,58 +427,15 @@ class SessionMemory:
 
     def _to_langchain_messages(self, messages: list[Message]) -> list:
         """Convert database messages to LangChain message objects."""
-        lc_messages = []
-
-        for msg in messages:
-            if msg.role == "user":
-                lc_messages.append(HumanMessage(content=msg.content))
-
-            elif msg.role == "assistant":
-                # Check for tool calls
-                tool_calls = []
-                if msg.metadata:
-                    try:
-                        meta = json.loads(msg.metadata)
-                        if "tool_calls" in meta:
-                            tool_calls = [
-                                {
-                                    "id": tc["id"],
-                                    "name": tc["name"],
-                                    "args": tc["args"],
-                                }
-                                for tc in meta["tool_calls"]
-                            ]
-                    except (json.JSONDecodeError, KeyError):
-                        pass
-
-                if tool_calls:
-                    lc_messages.append(AIMessage(
-                        content=msg.content,
-                        tool_calls=tool_calls,
-                    ))
-                else:
-                    lc_messages.append(AIMessage(content=msg.content))
-
-            elif msg.role == "tool":
-                lc_messages.append(ToolMessage(
-                    content=msg.content,
-                    tool_call_id=msg.tool_call_id or "",
-                    name=msg.tool_name or "unknown",
-                ))
-
-            elif msg.role == "system":
-                lc_messages.append(SystemMessage(content=msg.content))
-
-        return lc_messages
+        return [
+            lc_message
+            for lc_message in (_to_langchain_message(msg) for msg in messages)
+            if lc_message is not None
+        ]
 
     def _generate_title(self, first_message: str):
         """Generate a title from the first message."""
-        # Truncate to first 50 chars
-        title = first_message[:50]
-        if len(first_message) > 50:
-            title += "..."
-
-        update_conversation_title(self.conversation_id, title)
+        update_conversation_title(self.conversation_id, _make_title(first_message))
         self._title_generated = True
 
     def get_user_facts_formatted(self) -> str:
@@ -291,13 +463,186 @@ class SessionMemory:
     @property
     def is_new_conversation(self) -> bool:
         """Check if this is a new (empty) conversation."""
+        if self._context is not None:
+            return len(self._context) == 0
         messages = get_recent_messages(self.conversation_id, limit=1)
         return len(messages) == 0
 
 
+class TurnWriter:
+    """Buffers the messages of a single turn for one batched write.
+
+    Obtained from SessionMemory.turn(); mirrors the add_*_message methods
+    of SessionMemory but defers the database write to flush().
+    """
+
+    def __init__(self, session: SessionMemory):
+        self._session = session
+        self._pending: list[dict] = []
+        self._title: Optional[str] = None
+
+    def add_user_message(self, content: str):
+        """Queue a user message."""
+        self._pending.append({"role": "user", "content": content})
+
+        # Auto-generate title from first message (written with the batch)
+        if not self._session._title_generated and self._title is None:
+            self._title = _make_title(content)
+
+    def add_assistant_message(
+        self,
+        content: str,
+        tool_calls: Optional[list] = None,
+        interrupted: bool = False,
+    ):
+        """Queue an assistant message (with its tool calls, if any)."""
+        self._pending.append({
+            "role": "assistant",
+            "content": content,
+            "metadata": _assistant_metadata(tool_calls, interrupted),
+        })
+
+    def add_tool_message(
+        self,
+        tool_name: str,
+        content: str,
+        tool_call_id: str,
+        tool_args: Optional[str] = None,
+    ):
+        """Queue a tool response message."""
+        self._pending.append({
+            "role": "tool",
+            "content": content,
+            "tool_name": tool_name,
+            "tool_args": tool_args,
+            "tool_call_id": tool_call_id,
+        })
+
+    def flush(self) -> list[str]:
+        """Write all queued messages in one transaction, return the stored IDs."""
+        if not self._pending and self._title is None:
+            return []
+
+        msg_ids = add_messages(
+            self._session.conversation_id,
+            self._pending,
+            title=self._title,
+        )
+        if self._title is not None:
+            self._session._title_generated = True
+
+        # Skipped messages (duplicate tool responses) are not in the database
+        stored = []
+        for msg_id, fields in zip(msg_ids, self._pending):
+            if msg_id is not None:
+                self._session._remember(msg_id, **fields)
+                stored.append(msg_id)
+
+        self._pending = []
+        self._title = None
+
+        self._session._schedule_compaction()
+        return stored
+
+
+def _group_tool_units(messages: list) -> list[list[int]]:
+    """Group message indices so tool responses stay with their tool call.
+
+    Tool responses whose tool call is not in `messages` (evicted from the
+    cache, or cut off at load) are in no unit, so a window built from
+    units never starts with an unpaired response.
+
+    Returns:
+        Chronological list of units; each unit is a list of indices
+    """
+    units: list[list[int]] = []
+    open_calls: dict[str, list[int]] = {}
+
+    for i, msg in enumerate(messages):
+        if msg.type == "tool":
+            if msg.tool_call_id in open_calls:
+                open_calls[msg.tool_call_id].append(i)
+            continue
+
+        unit = [i]
+        units.append(unit)
+        if msg.type == "ai":
+            for tc in msg.tool_calls:
+                open_calls[tc.get("id")] = unit
+
+    return units
+
+
+def _to_langchain_message(msg: Message):
+    """Convert a database message to a LangChain message object."""
+    if msg.role == "user":
+        return HumanMessage(content=msg.content)
+
+    if msg.role == "assistant":
+        # Check for tool calls
+        tool_calls = []
+        if msg.metadata:
+            try:
+                meta = json.loads(msg.metadata)
+                if "tool_calls" in meta:
+                    tool_calls = [
+                        {
+                            "id": tc["id"],
+                            "name": tc["name"],
+                            "args": tc["args"],
+                        }
+                        for tc in meta["tool_calls"]
+                    ]
+            except (json.JSONDecodeError, KeyError):
+                pass
+
+        if tool_calls:
+            return AIMessage(content=msg.content, tool_calls=tool_calls)
+        return AIMessage(content=msg.content)
+
+    if msg.role == "tool":
+        return ToolMessage(
+            content=msg.content,
+            tool_call_id=msg.tool_call_id or "",
+            name=msg.tool_name or "unknown",
+        )
+
+    if msg.role == "system":
+        return SystemMessage(content=msg.content)
+
+    return None
+
+
+def _make_title(first_message: str) -> str:
+    """Build a conversation title from the first message."""
+    # Truncate to first 50 chars
+    title = first_message[:50]
+    if len(first_message) > 50:
+        title += "..."
+    return title
+
+
+def _assistant_metadata(tool_calls: Optional[list], interrupted: bool = False) -> Optional[str]:
+    """Serialize tool calls (and the interrupted flag) into message metadata."""
+    metadata = {}
+    if tool_calls:
+        metadata["tool_calls"] = [
+            {
+                "id": tc.get("id"),
+                "name": tc.get("name"),
+                "args": tc.get("args"),
+            }
+            for tc in tool_calls
+        ]
+    if interrupted:
+        metadata["interrupted"] = True
+
+    return json.dumps(metadata) if metadata else None
+
+
 def get_session_memory(
     conversation_id: Optional[str] = None,
-    context_window: int = 20,
+    context_window: Optional[int] = None,
 ) -> SessionMemory:
     """Factory function to get a session memory instance."""
     return SessionMemory(
@@ -0,0 +1,128 @@
+"""JARVIS - Token counting for context budgeting.
+
+Tokenizers are selected by a spec string:
+- "chars"                      Cheap estimate (~4 characters per token)
+- "tiktoken:<encoding>"        tiktoken encoding, e.g. "tiktoken:cl100k_base"
+- "hf:<path/to/tokenizer.json>" Local HuggingFace tokenizer file (e.g. Qwen's)
+
+Additional tokenizers can be added with register_tokenizer(). If the
+requested tokenizer can't be loaded, the char estimator is used instead.
+"""
+
+import json
+import math
+from functools import lru_cache
+from typing import Callable, Optional, Protocol
+
+# Approximate per-message overhead of the chat template (role markers etc.)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+class Tokenizer(Protocol):
+    """Anything that can count tokens in a string."""
+
+    def count(self, text: str) -> int:
+        ...
+
+
+class CharEstimator:
+    """Estimate tokens from character count (no dependencies)."""
+
+    def __init__(self, chars_per_token: float = 4.0):
+        self.chars_per_token = chars_per_token
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        return math.ceil(len(text) / self.chars_per_token)
+
+
+class TiktokenTokenizer:
+    """Count tokens with a tiktoken encoding."""
+
+    def __init__(self, encoding: str = "cl100k_base"):
+        import tiktoken
+        self._encoding = tiktoken.get_encoding(encoding)
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+
+class HuggingFaceTokenizer:
+    """Count tokens with a local HuggingFace tokenizer.json file."""
+
+    def __init__(self, path: str):
+        from tokenizers import Tokenizer as HFTokenizer
+        self._tokenizer = HFTokenizer.from_file(path)
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        return len(self._tokenizer.encode(text, add_special_tokens=False).ids)
+
+
+# name -> factory(argument) where argument is the part after "name:"
+_TOKENIZERS: dict[str, Callable[[str], Tokenizer]] = {
+    "chars": lambda arg: CharEstimator(float(arg) if arg else 4.0),
+    "tiktoken": lambda arg: TiktokenTokenizer(arg or "cl100k_base"),
+    "hf": lambda arg: HuggingFaceTokenizer(arg),
+}
+
+
+def register_tokenizer(name: str, factory: Callable[[str], Tokenizer]) -> None:
+    """Register a tokenizer factory under a spec name.
+
+    Args:
+        name: Spec prefix, e.g. "sentencepiece"
+        factory: Called with the text after "name:" (may be empty)
+    """
+    _TOKENIZERS[name] = factory
+    get_tokenizer.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer(spec: Optional[str] = None) -> Tokenizer:
+    """Create a tokenizer from a spec string, falling back to CharEstimator.
+
+    Tokenizers are cached per spec, so sessions share one instance.
+
+    Args:
+        spec: Tokenizer spec like "chars" or "hf:models/qwen/tokenizer.json"
+
+    Returns:
+        Tokenizer instance
+    """
+    if not spec:
+        return CharEstimator()
+
+    name, _, arg = spec.partition(":")
+    factory = _TOKENIZERS.get(name)
+    if factory is None:
+        print(f"[Memory] Unknown tokenizer '{name}', using char estimate")
+        return CharEstimator()
+
+    try:
+        return factory(arg)
+    except ImportError as e:
+        print(f"[Memory] Tokenizer '{name}' not installed ({e}), using char estimate")
+    except Exception as e:
+        print(f"[Memory] Could not load tokenizer '{spec}': {e}, using char estimate")
+    return CharEstimator()
+
+
+def count_message_tokens(message, tokenizer: Tokenizer) -> int:
+    """Count tokens a LangChain message contributes to the prompt."""
+    content = message.content
+    if not isinstance(content, str):
+        content = json.dumps(content, default=str)
+
+    tokens = MESSAGE_OVERHEAD_TOKENS + tokenizer.count(content)
+
+    # Tool calls are serialized into the prompt as JSON
+    for tc in getattr(message, "tool_calls", None) or []:
+        tokens += tokenizer.count(tc.get("name", ""))
+        tokens += tokenizer.count(json.dumps(tc.get("args", {}), default=str))
+
+    return tokens
@@ -0,0 +1,622 @@
+"""JARVIS - Versioned schema migrations for the SQLite store.
+
+The schema version lives in the database header (PRAGMA user_version).
+migrate() reads it and applies only the migrations above it, so an up to
+date database costs a single pragma read per process.
+
+Each migration runs in its own BEGIN IMMEDIATE transaction together with
+the user_version bump, so a crash leaves the database at the previous
+version and the migration simply runs again. Long-running migrations
+(table rewrites, index builds on big tables) are marked
+transactional=False and manage their own short transactions with the
+batch helpers below; they must be safe to re-run, since the version is
+only bumped once they finish.
+
+Migrations are frozen history: never edit one that has shipped, append a
+new one instead. They use the connection they are given and not the
+helpers in jarvis.database, which change over time.
+"""
+
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional, Sequence
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    upgrade: Callable[[sqlite3.Connection], None]
+    transactional: bool = True  # False: upgrade commits its own batches
+
+
+# Batch helpers for online migrations
+
+# Rows copied per transaction, and the pause between them so other
+# writers can take the lock
+BATCH_SIZE = 5000
+BATCH_PAUSE = 0.01
+
+
+def table_columns(conn: sqlite3.Connection, table: str) -> set[str]:
+    """Column names of a table (empty if it doesn't exist)."""
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def add_column(conn: sqlite3.Connection, table: str, column: str, definition: str) -> bool:
+    """Add a column unless it already exists.
+
+    Returns:
+        True if the column was added
+    """
+    if column in table_columns(conn, table):
+        return False
+    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    return True
+
+
+def create_index_online(conn: sqlite3.Connection, sql: str) -> None:
+    """Build an index in its own transaction.
+
+    SQLite can't build an index incrementally, but in WAL mode readers
+    keep working during the build and writers only wait for this one
+    statement, not for the rest of the migration.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(sql)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def update_in_batches(
+    conn: sqlite3.Connection,
+    table: str,
+    sql: str,
+    batch_size: int = BATCH_SIZE,
+    pause: float = BATCH_PAUSE,
+) -> int:
+    """Run an update over a table in rowid ranges, one range per transaction.
+
+    The statement must be safe to repeat, since a crash part-way means
+    the whole pass runs again.
+
+    Args:
+        conn: Connection (must not be inside a transaction)
+        table: Table whose rowids are walked
+        sql: Statement taking the range as two parameters: rowid > ? AND rowid <= ?
+        batch_size: Rowids covered per transaction
+        pause: Seconds to sleep between batches
+
+    Returns:
+        Number of rows updated
+    """
+    updated = 0
+    start = 0
+    while True:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            last = conn.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {table}").fetchone()[0]
+            if start >= last:
+                conn.commit()
+                return updated
+            end = min(start + batch_size, last)
+            cursor = conn.execute(sql, (start, end))
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        updated += cursor.rowcount
+        start = end
+        if pause:
+            time.sleep(pause)
+
+
+def add_column_online(conn: sqlite3.Connection, table: str, column: str, definition: str) -> bool:
+    """add_column() in its own transaction (for non-transactional migrations).
+
+    Another process running the same migration may add the column first;
+    the check happens under the write lock.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        added = add_column(conn, table, column, definition)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return added
+
+
+def copy_in_batches(
+    conn: sqlite3.Connection,
+    source: str,
+    target: str,
+    columns: Sequence[str],
+    select_exprs: Optional[Sequence[str]] = None,
+    batch_size: int = BATCH_SIZE,
+    pause: float = BATCH_PAUSE,
+) -> int:
+    """Copy rows from source to target in rowid order, one batch per transaction.
+
+    Resumable: copying restarts after the highest rowid already in target,
+    so rowids are preserved.
+
+    Args:
+        conn: Connection (must not be inside a transaction)
+        source: Table to read
+        target: Table to write; must have the listed columns
+        columns: Target columns to fill (rowid is copied as well)
+        select_exprs: Source expressions for the columns (default: same names)
+        batch_size: Source rowids covered per transaction
+        pause: Seconds to sleep between batches
+
+    Returns:
+        Number of rows copied
+    """
+    exprs = select_exprs or columns
+    insert_sql = (
+        f"INSERT INTO {target} (rowid, {', '.join(columns)}) "
+        f"SELECT rowid, {', '.join(exprs)} FROM {source} WHERE rowid > ? AND rowid <= ?"
+    )
+    copied = 0
+    start = conn.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {target}").fetchone()[0]
+    while True:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            last = conn.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {source}").fetchone()[0]
+            if start >= last:
+                conn.commit()
+                return copied
+            end = min(start + batch_size, last)
+            cursor = conn.execute(insert_sql, (start, end))
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        copied += cursor.rowcount
+        start = end
+        if pause:
+            time.sleep(pause)
+
+
+def rewrite_table(
+    conn: sqlite3.Connection,
+    table: str,
+    create_sql: str,
+    columns: Sequence[str],
+    select_exprs: Optional[Sequence[str]] = None,
+    after: Sequence[str] = (),
+    batch_size: int = BATCH_SIZE,
+    pause: float = BATCH_PAUSE,
+) -> int:
+    """Rebuild a table with a new definition without one long write lock.
+
+    Rows are copied into "<table>_new" in batches; then, in one short
+    transaction, the last rows are copied, the old table is dropped and
+    the new one renamed. Indexes and triggers on the old table are
+    dropped with it, so recreate them with `after`. Updates and deletes
+    of rows already copied are not carried over, so this suits
+    append-only tables (or idle writers).
+
+    Args:
+        conn: Connection (must not be inside a transaction)
+        table: Table to rewrite
+        create_sql: CREATE TABLE statement for "<table>_new"
+        columns: Columns to fill in the new table
+        select_exprs: Expressions computing them from the old table
+        after: Statements run in the swap transaction (indexes, triggers)
+        batch_size: Rows copied per transaction
+        pause: Seconds to sleep between batches
+
+    Returns:
+        Number of rows copied
+    """
+    new_table = f"{table}_new"
+    conn.execute(create_sql)
+    conn.commit()
+    copied = copy_in_batches(conn, table, new_table, columns, select_exprs, batch_size, pause)
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Rows written since the last batch
+        copied += _copy_remaining(conn, table, new_table, columns, select_exprs)
+        conn.execute(f"DROP TABLE {table}")
+        conn.execute(f"ALTER TABLE {new_table} RENAME TO {table}")
+        for statement in after:
+            conn.execute(statement)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return copied
+
+
+def _copy_remaining(
+    conn: sqlite3.Connection,
+    source: str,
+    target: str,
+    columns: Sequence[str],
+    select_exprs: Optional[Sequence[str]] = None,
+) -> int:
+    """Copy the rows of source past target's highest rowid (caller's transaction)."""
+    exprs = select_exprs or columns
+    cursor = conn.execute(
+        f"INSERT INTO {target} (rowid, {', '.join(columns)}) "
+        f"SELECT rowid, {', '.join(exprs)} FROM {source} "
+        f"WHERE rowid > (SELECT COALESCE(MAX(rowid), 0) FROM {target})"
+    )
+    return cursor.rowcount
+
+
+# Migrations
+
+def _initial_schema(conn: sqlite3.Connection):
+    """Tables and indexes as they were before versioned migrations."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS conversations (
+            id TEXT PRIMARY KEY,
+            title TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            archived BOOLEAN DEFAULT FALSE
+        )
+    """)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS messages (
+            id TEXT PRIMARY KEY,
+            conversation_id TEXT NOT NULL,
+            role TEXT NOT NULL CHECK(role IN ('user', 'assistant', 'tool', 'system')),
+            content TEXT NOT NULL,
+            message_type TEXT DEFAULT 'text',
+            tool_name TEXT,
+            tool_args TEXT,
+            tool_call_id TEXT,
+            metadata TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (conversation_id) REFERENCES conversations(id) ON DELETE CASCADE
+        )
+    """)
+
+    # Reminders table (migrated from JSON)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS reminders (
+            id TEXT PRIMARY KEY,
+            message TEXT NOT NULL,
+            due_at DATETIME NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            completed_at DATETIME,
+            notified BOOLEAN DEFAULT FALSE
+        )
+    """)
+
+    # Notes metadata (content stays in markdown files)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS notes (
+            id TEXT PRIMARY KEY,
+            title TEXT,
+            file_path TEXT NOT NULL UNIQUE,
+            tags TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME
+        )
+    """)
+
+    # Tool usage stats
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS tool_usage (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tool_name TEXT NOT NULL,
+            query TEXT,
+            success BOOLEAN,
+            used_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # User preferences / facts (long-term memory)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS user_facts (
+            id TEXT PRIMARY KEY,
+            fact_type TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            confidence REAL DEFAULT 1.0,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME,
+            UNIQUE(fact_type, key)
+        )
+    """)
+
+    # Rolling summary of messages that fell out of the context window
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS conversation_summaries (
+            conversation_id TEXT PRIMARY KEY,
+            summary TEXT NOT NULL,
+            summarized_through INTEGER NOT NULL,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (conversation_id) REFERENCES conversations(id) ON DELETE CASCADE
+        )
+    """)
+
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_conversation ON messages(conversation_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_created ON messages(created_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_reminders_due ON reminders(due_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_user_facts_type ON user_facts(fact_type)")
+
+
+def _conversation_stats(conn: sqlite3.Connection):
+    """Denormalized message_count/last_message_at on conversations.
+
+    Filled in conversation rowid batches; recounting is idempotent, so an
+    interrupted run simply starts over.
+    """
+    add_column_online(conn, "conversations", "message_count", "INTEGER NOT NULL DEFAULT 0")
+    add_column_online(conn, "conversations", "last_message_at", "DATETIME")
+    update_in_batches(
+        conn,
+        "conversations",
+        """UPDATE conversations SET
+               message_count = (SELECT COUNT(*) FROM messages WHERE conversation_id = conversations.id),
+               last_message_at = (SELECT MAX(created_at) FROM messages WHERE conversation_id = conversations.id)
+           WHERE rowid > ? AND rowid <= ?""",
+    )
+
+
+def _message_seq(conn: sqlite3.Connection):
+    """Number messages per conversation and index (conversation_id, seq).
+
+    Walks messages in rowid batches; each batch numbers every conversation
+    that still has unnumbered rows in its range, whole, so numbering
+    never depends on where a batch boundary falls. The unique index is
+    built once everything is numbered.
+    """
+    add_column_online(conn, "messages", "seq", "INTEGER")
+    update_in_batches(
+        conn,
+        "messages",
+        """WITH numbered AS (
+               SELECT rowid AS rid,
+                      ROW_NUMBER() OVER (PARTITION BY conversation_id ORDER BY created_at, rowid) AS n
+               FROM messages
+               WHERE conversation_id IN (
+                   SELECT conversation_id FROM messages
+                   WHERE rowid > ? AND rowid <= ? AND seq IS NULL
+               )
+           )
+           UPDATE messages SET seq = numbered.n
+           FROM numbered
+           WHERE numbered.rid = messages.rowid AND messages.seq IS NULL""",
+    )
+    # Ordered history reads are range scans on this index; it also
+    # covers every conversation_id lookup, so the old index goes
+    create_index_online(
+        conn,
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_messages_conversation_seq ON messages(conversation_id, seq)",
+    )
+    conn.execute("DROP INDEX IF EXISTS idx_messages_conversation")
+
+
+# One stored response per tool call within a conversation
+TOOL_CALL_INDEX_SQL = """
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_messages_tool_call
+    ON messages(conversation_id, tool_call_id)
+    WHERE role = 'tool' AND tool_call_id IS NOT NULL AND tool_call_id != ''
+"""
+
+
+def _tool_call_index(conn: sqlite3.Connection):
+    """Unique tool_call_id index, if existing data allows it.
+
+    Databases written before turn-scoped persistence can contain the same
+    tool response many times; `jarvis compact` removes those and creates
+    the index.
+    """
+    try:
+        conn.execute(TOOL_CALL_INDEX_SQL)
+    except sqlite3.IntegrityError:
+        print("[DB] Duplicate tool messages found; run `jarvis compact` to remove them")
+
+
+# Full-text search over message content (FTS5, external content table).
+#
+# Databases created before the index existed are backfilled in rowid
+# chunks (see database.backfill_message_search). search_index_state
+# tracks progress: rows with rowid <= indexed_through or
+# rowid > backfill_target are "covered" and kept in sync by the triggers;
+# rows in between are left to the backfill, since issuing an FTS 'delete'
+# for a row that was never indexed corrupts an external content index.
+MESSAGE_SEARCH_SCHEMA = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+        content,
+        content='messages',
+        content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TABLE IF NOT EXISTS search_index_state (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        indexed_through INTEGER NOT NULL,
+        backfill_target INTEGER NOT NULL
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages
+       WHEN new.rowid <= (SELECT indexed_through FROM search_index_state)
+         OR new.rowid > (SELECT backfill_target FROM search_index_state)
+       BEGIN
+           INSERT INTO messages_fts (rowid, content) VALUES (new.rowid, new.content);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages
+       WHEN old.rowid <= (SELECT indexed_through FROM search_index_state)
+         OR old.rowid > (SELECT backfill_target FROM search_index_state)
+       BEGIN
+           INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF content ON messages
+       WHEN old.rowid <= (SELECT indexed_through FROM search_index_state)
+         OR old.rowid > (SELECT backfill_target FROM search_index_state)
+       BEGIN
+           INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+           INSERT INTO messages_fts (rowid, content) VALUES (new.rowid, new.content);
+       END""",
+)
+
+
+def _message_search(conn: sqlite3.Connection):
+    """Full-text index and its triggers, if SQLite supports FTS5."""
+    try:
+        conn.execute(MESSAGE_SEARCH_SCHEMA[0])
+    except sqlite3.OperationalError as e:
+        print(f"[DB] Full-text search unavailable ({e})")
+        return
+    for statement in MESSAGE_SEARCH_SCHEMA[1:]:
+        conn.execute(statement)
+
+    # Everything already stored is left to the backfill
+    conn.execute(
+        """INSERT OR IGNORE INTO search_index_state (id, indexed_through, backfill_target)
+           SELECT 1, 0, COALESCE(MAX(rowid), 0) FROM messages"""
+    )
+
+
+def _conversation_keyset_index(conn: sqlite3.Connection):
+    """Index for listing conversations newest first, keyed on (updated_at, id)."""
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_conversations_updated ON conversations(updated_at, id)"
+    )
+
+
+# Databases up to this size are VACUUMed right away to switch auto_vacuum
+# mode; larger ones wait for `jarvis maintenance --full-vacuum`
+AUTO_VACUUM_CONVERT_LIMIT = 64 * 1024 * 1024
+
+
+def _incremental_auto_vacuum(conn: sqlite3.Connection):
+    """Track free pages so they can be returned to the OS incrementally.
+
+    Changing auto_vacuum on an existing database only takes effect after
+    a full VACUUM, which rewrites the whole file, so big databases are
+    left for an explicit maintenance run.
+    """
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    if page_count * page_size <= AUTO_VACUUM_CONVERT_LIMIT:
+        conn.execute("VACUUM")
+    else:
+        print("[DB] Run `jarvis maintenance --full-vacuum` to enable incremental vacuuming")
+
+
+def _tool_usage_metrics(conn: sqlite3.Connection):
+    """Latency, argument size and error type for each tool call."""
+    add_column(conn, "tool_usage", "duration_ms", "REAL")
+    add_column(conn, "tool_usage", "args_size", "INTEGER")
+    add_column(conn, "tool_usage", "error", "TEXT")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tool_usage_used ON tool_usage(used_at)")
+
+
+# Upper bounds (ms) of the cumulative latency histogram in the rollups:
+# lat_le_<bound> counts the calls that took at most <bound> ms
+TOOL_ROLLUP_BOUNDS_MS = (
+    1, 2, 3, 5, 7, 10, 15, 20, 30, 50, 70, 100, 150, 200, 300, 500, 700,
+    1000, 1500, 2000, 3000, 5000, 7000, 10000, 15000, 20000, 30000, 60000,
+)
+
+
+def _tool_usage_rollups(conn: sqlite3.Connection):
+    """Minute/hour/day aggregates of tool_usage and their watermarks."""
+    histogram = ",\n".join(
+        f"lat_le_{bound} INTEGER NOT NULL DEFAULT 0" for bound in TOOL_ROLLUP_BOUNDS_MS
+    )
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS tool_usage_rollups (
+            granularity TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            tool_name TEXT NOT NULL,
+            calls INTEGER NOT NULL DEFAULT 0,
+            errors INTEGER NOT NULL DEFAULT 0,
+            timed_calls INTEGER NOT NULL DEFAULT 0,
+            total_ms REAL NOT NULL DEFAULT 0,
+            max_ms REAL,
+            args_bytes INTEGER NOT NULL DEFAULT 0,
+            {histogram},
+            PRIMARY KEY (granularity, bucket, tool_name)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS rollup_watermarks (
+            name TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+    """)
+
+
+MIGRATIONS: tuple[Migration, ...] = (
+    Migration(1, "initial schema", _initial_schema),
+    Migration(2, "conversation message stats", _conversation_stats, transactional=False),
+    Migration(3, "per-conversation message sequence", _message_seq, transactional=False),
+    Migration(4, "unique tool call responses", _tool_call_index),
+    Migration(5, "full-text message search", _message_search),
+    Migration(6, "conversation listing index", _conversation_keyset_index),
+    Migration(7, "incremental auto_vacuum", _incremental_auto_vacuum, transactional=False),
+    Migration(8, "tool call metrics", _tool_usage_metrics),
+    Migration(9, "tool usage rollups", _tool_usage_rollups),
+)
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def get_version(conn: sqlite3.Connection) -> int:
+    """Schema version stored in the database header."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def _set_version(conn: sqlite3.Connection, version: int):
+    # PRAGMA doesn't take parameters; version is always an int from MIGRATIONS
+    conn.execute(f"PRAGMA user_version = {int(version)}")
+
+
+def migrate(conn: sqlite3.Connection, migrations: Sequence[Migration] = MIGRATIONS) -> list[Migration]:
+    """Bring the database up to the latest schema version.
+
+    Safe to call from several processes at once: the version is re-read
+    under the write lock before each migration.
+
+    Args:
+        conn: Connection to migrate (must not be inside a transaction)
+        migrations: Migrations in version order
+
+    Returns:
+        Migrations that were applied (empty if already up to date)
+    """
+    start_version = get_version(conn)
+    if start_version >= migrations[-1].version:
+        return []
+
+    applied = []
+    for migration in migrations:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if get_version(conn) >= migration.version:
+                conn.commit()
+                continue
+            if migration.transactional:
+                migration.upgrade(conn)
+            else:
+                conn.commit()
+                migration.upgrade(conn)
+                conn.execute("BEGIN IMMEDIATE")
+            _set_version(conn, migration.version)
+            conn.commit()
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        applied.append(migration)
+
+    if applied:
+        print(f"[DB] Schema migrated from v{start_version} to v{applied[-1].version}")
+    return applied
@@ -0,0 +1,329 @@
+"""JARVIS - Retention, cold archival and space reclamation.
+
+Deleting a conversation only archives it, and nothing ever leaves the
+main database, so it keeps growing and falls out of the page cache.
+run_maintenance() applies the retention policy from config:
+
+1. Conversations matching the policy (archived ones, ones idle for
+   archive_after_days, and the oldest ones while the data exceeds
+   max_hot_mb) are moved with their messages to a separate cold
+   database file, attached for the duration of the run.
+2. The full-text index is optimized and the freed pages are returned to
+   the OS with incremental vacuum (migration 7 enables it), followed by
+   a WAL checkpoint so the files really shrink.
+
+Moves are two-phase per batch: copy into the cold file and commit, then
+delete from the main file and commit. SQLite doesn't make transactions
+across attached WAL databases atomic, so this order means a crash can
+leave a conversation in both files (the next run finishes the move) but
+never in neither.
+"""
+
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional
+
+from .config import DATA_DIR, RetentionConfig, get_config
+from .database import (
+    EXPORT_COLUMNS,
+    get_connection,
+    get_db_path,
+    message_search_available,
+    refresh_conversation_stats,
+)
+
+# Conversations moved per transaction pair
+MOVE_BATCH = 100
+
+# The size policy leaves conversations touched this recently alone
+SIZE_POLICY_MIN_IDLE = "-1 day"
+
+# Rough per-message and per-conversation overhead (rows, indexes) used to
+# estimate what moving a conversation frees
+MESSAGE_OVERHEAD = 200
+CONVERSATION_OVERHEAD = 200
+
+CONVERSATION_COLUMNS = (
+    "id", "title", "created_at", "updated_at", "archived", "message_count", "last_message_at",
+)
+MESSAGE_COLUMNS = EXPORT_COLUMNS["messages"]
+
+COLD_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS cold.conversations (
+        id TEXT PRIMARY KEY,
+        title TEXT,
+        created_at DATETIME,
+        updated_at DATETIME,
+        archived BOOLEAN DEFAULT FALSE,
+        message_count INTEGER NOT NULL DEFAULT 0,
+        last_message_at DATETIME,
+        moved_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE IF NOT EXISTS cold.messages (
+        id TEXT PRIMARY KEY,
+        conversation_id TEXT NOT NULL,
+        role TEXT NOT NULL,
+        content TEXT NOT NULL,
+        message_type TEXT DEFAULT 'text',
+        tool_name TEXT,
+        tool_args TEXT,
+        tool_call_id TEXT,
+        metadata TEXT,
+        created_at DATETIME,
+        seq INTEGER
+    )""",
+    "CREATE INDEX IF NOT EXISTS cold.idx_cold_messages_conversation ON messages(conversation_id, seq)",
+)
+
+
+@dataclass
+class MaintenanceReport:
+    cold_db: Path
+    conversations_moved: int = 0
+    messages_moved: int = 0
+    bytes_before: int = 0  # Main database file plus its WAL
+    bytes_after: int = 0
+    reclaimable_bytes: int = 0  # Free pages left that only a full vacuum returns
+    candidates: list[str] = field(default_factory=list)  # Conversation IDs (dry run)
+
+    @property
+    def bytes_reclaimed(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+
+def get_cold_db_path(config: Optional[RetentionConfig] = None) -> Path:
+    """Cold database file from config (relative paths are under the project root)."""
+    config = config or get_config().retention
+    path = Path(config.cold_db)
+    if not path.is_absolute():
+        path = DATA_DIR.parent / path
+    return path
+
+
+def database_file_size() -> int:
+    """Bytes used on disk by the main database and its WAL."""
+    path = get_db_path()
+    wal = path.with_name(path.name + "-wal")
+    return sum(p.stat().st_size for p in (path, wal) if p.exists())
+
+
+@contextmanager
+def attach_cold(conn: sqlite3.Connection, path: Path) -> Iterator[sqlite3.Connection]:
+    """Attach the cold database as "cold" (created if missing) for a block."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn.execute("ATTACH DATABASE ? AS cold", (str(path),))
+    try:
+        for statement in COLD_SCHEMA:
+            conn.execute(statement)
+        conn.commit()
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        conn.execute("DETACH DATABASE cold")
+
+
+def select_for_cold(conn: sqlite3.Connection, config: RetentionConfig) -> list[str]:
+    """IDs of the conversations the retention policy moves, oldest first."""
+    selected: dict[str, None] = {}
+    if config.move_archived:
+        for row in conn.execute(
+            "SELECT id FROM conversations WHERE archived = TRUE ORDER BY updated_at, id"
+        ):
+            selected[row[0]] = None
+
+    if config.archive_after_days > 0:
+        for row in conn.execute(
+            "SELECT id FROM conversations WHERE updated_at < datetime('now', ?) ORDER BY updated_at, id",
+            (f"-{int(config.archive_after_days)} days",)
+        ):
+            selected[row[0]] = None
+
+    if config.max_hot_mb > 0:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        used_pages = (
+            conn.execute("PRAGMA page_count").fetchone()[0]
+            - conn.execute("PRAGMA freelist_count").fetchone()[0]
+        )
+        used = used_pages * page_size
+        excess = used - int(config.max_hot_mb * 1024 * 1024)
+        if excess > 0:
+            # Content bytes underestimate what a conversation occupies
+            # (search index, other indexes), so scale the estimates until
+            # they add up to the whole file
+            estimate_sql = """SELECT SUM(LENGTH(CAST(content AS BLOB))) + COUNT(*) * ?
+                              FROM messages m WHERE m.conversation_id = c.id"""
+            total = conn.execute(
+                f"SELECT SUM(? + COALESCE(({estimate_sql}), 0)) FROM conversations c",
+                (CONVERSATION_OVERHEAD, MESSAGE_OVERHEAD)
+            ).fetchone()[0] or 1
+            scale = max(1.0, used / total)
+
+            rows = conn.execute(
+                f"""SELECT c.id, ? + COALESCE(({estimate_sql}), 0) AS bytes,
+                           c.updated_at < datetime('now', ?) AS idle
+                    FROM conversations c
+                    ORDER BY c.updated_at, c.id""",
+                (CONVERSATION_OVERHEAD, MESSAGE_OVERHEAD, SIZE_POLICY_MIN_IDLE)
+            ).fetchall()
+            # Conversations the other policies already move count towards it
+            excess -= sum(size for conv_id, size, _ in rows if conv_id in selected) * scale
+            for conv_id, size, idle in rows:
+                if excess <= 0:
+                    break
+                if idle and conv_id not in selected:
+                    excess -= size * scale
+                    selected[conv_id] = None
+
+    return list(selected)
+
+
+def _move_batch(conn: sqlite3.Connection, conversation_ids: list[str]) -> int:
+    """Move conversations and their messages to cold (see module docstring).
+
+    Returns:
+        Number of messages moved
+    """
+    placeholders = ", ".join("?" * len(conversation_ids))
+    conv_columns = ", ".join(CONVERSATION_COLUMNS)
+    msg_columns = ", ".join(MESSAGE_COLUMNS)
+
+    conn.execute("BEGIN IMMEDIATE")
+    conn.execute(
+        f"""INSERT INTO cold.conversations ({conv_columns})
+            SELECT {conv_columns} FROM main.conversations WHERE id IN ({placeholders})
+            ON CONFLICT DO NOTHING""",
+        conversation_ids
+    )
+    conn.execute(
+        f"""INSERT INTO cold.messages ({msg_columns})
+            SELECT {msg_columns} FROM main.messages WHERE conversation_id IN ({placeholders})
+            ON CONFLICT DO NOTHING""",
+        conversation_ids
+    )
+    conn.commit()
+
+    conn.execute("BEGIN IMMEDIATE")
+    moved = conn.execute(
+        f"DELETE FROM main.messages WHERE conversation_id IN ({placeholders})", conversation_ids
+    ).rowcount
+    # Summaries point at main-file rowids; they are rebuilt if a conversation comes back
+    conn.execute(
+        f"DELETE FROM main.conversation_summaries WHERE conversation_id IN ({placeholders})",
+        conversation_ids
+    )
+    conn.execute(f"DELETE FROM main.conversations WHERE id IN ({placeholders})", conversation_ids)
+    conn.commit()
+    return moved
+
+
+def _reclaim_space(conn: sqlite3.Connection, full_vacuum: bool) -> int:
+    """Optimize the search index and return free pages to the OS.
+
+    Returns:
+        Bytes in free pages still inside the file (only a full vacuum
+        returns those when auto_vacuum isn't incremental yet)
+    """
+    if message_search_available():
+        conn.execute("INSERT INTO messages_fts (messages_fts) VALUES ('optimize')")
+        conn.commit()
+
+    incremental = conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    if full_vacuum:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+    elif incremental:
+        # Frees one page per VM step, and execute() only steps once;
+        # executescript() runs it to completion
+        conn.executescript("PRAGMA incremental_vacuum;")
+    # In WAL mode the file only shrinks once the WAL is checkpointed
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    return conn.execute("PRAGMA freelist_count").fetchone()[0] * page_size
+
+
+def run_maintenance(
+    config: Optional[RetentionConfig] = None,
+    dry_run: bool = False,
+    full_vacuum: bool = False,
+    batch_size: int = MOVE_BATCH,
+) -> MaintenanceReport:
+    """Apply the retention policy and reclaim space (blocking).
+
+    Args:
+        config: Retention policy (default: from config)
+        dry_run: Only report which conversations would move
+        full_vacuum: Rewrite the whole file with VACUUM (returns all free
+            space, and switches older databases to incremental vacuum)
+        batch_size: Conversations moved per transaction pair
+
+    Returns:
+        What was moved and how many bytes the main database shrank by
+    """
+    config = config or get_config().retention
+    report = MaintenanceReport(cold_db=get_cold_db_path(config), bytes_before=database_file_size())
+
+    with get_connection() as conn:
+        candidates = select_for_cold(conn, config)
+        if dry_run:
+            report.candidates = candidates
+            report.bytes_after = report.bytes_before
+            return report
+
+        if candidates:
+            with attach_cold(conn, report.cold_db):
+                for start in range(0, len(candidates), batch_size):
+                    batch = candidates[start:start + batch_size]
+                    report.messages_moved += _move_batch(conn, batch)
+                    report.conversations_moved += len(batch)
+
+        report.reclaimable_bytes = _reclaim_space(conn, full_vacuum)
+
+    report.bytes_after = database_file_size()
+    return report
+
+
+def restore_conversation(conversation_id: str, config: Optional[RetentionConfig] = None) -> bool:
+    """Move a conversation back from the cold database (unarchived).
+
+    Returns:
+        False if the cold database doesn't have it
+    """
+    path = get_cold_db_path(config)
+    if not path.exists():
+        return False
+
+    conv_columns = ", ".join(CONVERSATION_COLUMNS)
+    msg_columns = ", ".join(MESSAGE_COLUMNS)
+    with get_connection() as conn, attach_cold(conn, path):
+        conn.execute("BEGIN IMMEDIATE")
+        restored = conn.execute(
+            f"""INSERT INTO main.conversations ({conv_columns})
+                SELECT {conv_columns} FROM cold.conversations WHERE id = ?
+                ON CONFLICT DO NOTHING""",
+            (conversation_id,)
+        ).rowcount
+        if not restored and not conn.execute(
+            "SELECT 1 FROM main.conversations WHERE id = ?", (conversation_id,)
+        ).fetchone():
+            conn.rollback()
+            return False
+        conn.execute(
+            f"""INSERT INTO main.messages ({msg_columns})
+                SELECT {msg_columns} FROM cold.messages WHERE conversation_id = ?
+                ON CONFLICT DO NOTHING""",
+            (conversation_id,)
+        )
+        conn.execute("UPDATE main.conversations SET archived = FALSE WHERE id = ?", (conversation_id,))
+        conn.commit()
+
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM cold.messages WHERE conversation_id = ?", (conversation_id,))
+        conn.execute("DELETE FROM cold.conversations WHERE id = ?", (conversation_id,))
+        conn.commit()
+
+    refresh_conversation_stats([conversation_id])
+    return True
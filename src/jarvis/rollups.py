@@ -0,0 +1,299 @@
+"""JARVIS - Minute/hour/day rollups of the tool usage analytics.
+
+Raw tool_usage rows grow with every tool call, and computing stats by
+scanning them gets slower the longer the assistant runs. roll_up() folds
+them into tool_usage_rollups, one row per tool per bucket:
+
+    raw rows -> minute buckets -> hour buckets -> day buckets
+
+Each stage is incremental from a watermark in rollup_watermarks: raw
+rows by id (ids are AUTOINCREMENT, never reused), coarser levels by
+bucket start. A bucket is only rolled up a level once it closed
+ROLLUP_GRACE ago, so records that reach the write-behind queue a little
+late are folded normally; later ones are added to the closed levels
+directly. Counts and the cumulative latency histogram
+(migration 9) are plain sums, so buckets merge by addition; percentiles
+are estimated from the merged histogram.
+
+Once rolled up, raw rows and fine buckets are pruned after their
+retention period, and the stats read only the rollup table.
+"""
+
+import math
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from .database import get_connection
+from .migrations import TOOL_ROLLUP_BOUNDS_MS
+
+# Level -> strftime format of a bucket's start (UTC, like CURRENT_TIMESTAMP)
+BUCKET_FORMATS = {
+    "minute": "%Y-%m-%d %H:%M:00",
+    "hour": "%Y-%m-%d %H:00:00",
+    "day": "%Y-%m-%d 00:00:00",
+}
+
+# How long after a bucket closes it is rolled up into the next level
+ROLLUP_GRACE = timedelta(minutes=5)
+
+# Raw rows waiting longer than this mean the background roll-up isn't running
+ROLLUP_MAX_LAG = timedelta(minutes=2)
+
+# How long rows are kept once rolled up (day buckets are kept forever)
+RAW_RETENTION = timedelta(days=1)
+MINUTE_RETENTION = timedelta(days=2)
+HOUR_RETENTION = timedelta(days=90)
+
+HISTOGRAM_COLUMNS = tuple(f"lat_le_{bound}" for bound in TOOL_ROLLUP_BOUNDS_MS)
+SUM_COLUMNS = ("calls", "errors", "timed_calls", "total_ms", "args_bytes") + HISTOGRAM_COLUMNS
+
+_INSERT = f"""INSERT INTO tool_usage_rollups
+    (granularity, bucket, tool_name, {", ".join(SUM_COLUMNS)}, max_ms)"""
+
+_UPSERT = "ON CONFLICT (granularity, bucket, tool_name) DO UPDATE SET " + ", ".join(
+    [f"{column} = {column} + excluded.{column}" for column in SUM_COLUMNS]
+    + ["max_ms = COALESCE(MAX(max_ms, excluded.max_ms), max_ms, excluded.max_ms)"]
+)
+
+
+@dataclass
+class RollupReport:
+    raw_rows: int = 0  # Raw rows folded into minute buckets
+    buckets: int = 0  # Minute and hour buckets folded into the next level
+    pruned: int = 0  # Raw rows and buckets deleted after their retention
+
+
+def _bucket(moment: datetime, granularity: str) -> str:
+    return moment.strftime(BUCKET_FORMATS[granularity])
+
+
+def _get_watermark(conn: sqlite3.Connection, name: str) -> Optional[str]:
+    row = conn.execute("SELECT value FROM rollup_watermarks WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else None
+
+
+def _set_watermark(conn: sqlite3.Connection, name: str, value: str):
+    conn.execute(
+        """INSERT INTO rollup_watermarks (name, value) VALUES (?, ?)
+           ON CONFLICT(name) DO UPDATE SET value = excluded.value""",
+        (name, value)
+    )
+
+
+def _roll_raw(conn: sqlite3.Connection) -> int:
+    """Fold raw rows above the "raw" watermark (an id) into minute buckets.
+
+    Rows that arrive after their hour (or day) was already rolled up are
+    also added to that level directly, since the minute buckets before
+    the level's watermark are never folded again.
+    """
+    last_id = int(_get_watermark(conn, "raw") or 0)
+    max_id = conn.execute("SELECT MAX(id) FROM tool_usage").fetchone()[0] or 0
+    if max_id <= last_id:
+        return 0
+
+    histogram = ", ".join(f"TOTAL(duration_ms <= {bound})" for bound in TOOL_ROLLUP_BOUNDS_MS)
+    for level in BUCKET_FORMATS:
+        # Every row goes to minute buckets ("~" sorts after any timestamp)
+        before = "~" if level == "minute" else _get_watermark(conn, level)
+        if before is None:
+            continue
+        conn.execute(
+            f"""{_INSERT}
+                SELECT ?, strftime('{BUCKET_FORMATS[level]}', used_at), tool_name,
+                       COUNT(*), TOTAL(success = 0), COUNT(duration_ms), TOTAL(duration_ms),
+                       TOTAL(args_size), {histogram}, MAX(duration_ms)
+                FROM tool_usage WHERE id > ? AND id <= ? AND used_at < ?
+                GROUP BY 2, 3
+                {_UPSERT}""",
+            (level, last_id, max_id, before)
+        )
+    _set_watermark(conn, "raw", str(max_id))
+    return max_id - last_id
+
+
+def _roll_level(conn: sqlite3.Connection, source: str, target: str, now: datetime) -> int:
+    """Fold closed `source` buckets into `target` buckets.
+
+    The watermark named after the target level is the start of the first
+    target bucket not rolled up yet.
+    """
+    start = _get_watermark(conn, target) or ""
+    cutoff = _bucket(now - ROLLUP_GRACE, target)
+    if cutoff <= start:
+        return 0
+
+    sums = ", ".join(f"TOTAL({column})" for column in SUM_COLUMNS)
+    folded = conn.execute(
+        "SELECT COUNT(*) FROM tool_usage_rollups WHERE granularity = ? AND bucket >= ? AND bucket < ?",
+        (source, start, cutoff)
+    ).fetchone()[0]
+    conn.execute(
+        f"""{_INSERT}
+            SELECT ?, strftime('{BUCKET_FORMATS[target]}', bucket), tool_name, {sums}, MAX(max_ms)
+            FROM tool_usage_rollups
+            WHERE granularity = ? AND bucket >= ? AND bucket < ?
+            GROUP BY 2, 3
+            {_UPSERT}""",
+        (target, source, start, cutoff)
+    )
+    _set_watermark(conn, target, cutoff)
+    return folded
+
+
+def _prune(conn: sqlite3.Connection, now: datetime) -> int:
+    """Delete rolled-up rows older than their retention."""
+    pruned = 0
+    raw_watermark = _get_watermark(conn, "raw")
+    if raw_watermark is not None:
+        pruned += conn.execute(
+            "DELETE FROM tool_usage WHERE id <= ? AND used_at < ?",
+            (int(raw_watermark), (now - RAW_RETENTION).strftime("%Y-%m-%d %H:%M:%S"))
+        ).rowcount
+
+    for granularity, next_level, retention in (
+        ("minute", "hour", MINUTE_RETENTION),
+        ("hour", "day", HOUR_RETENTION),
+    ):
+        watermark = _get_watermark(conn, next_level)
+        if watermark is None:
+            continue
+        # Never drop buckets the next level doesn't contain yet
+        before = min(watermark, _bucket(now - retention, granularity))
+        pruned += conn.execute(
+            "DELETE FROM tool_usage_rollups WHERE granularity = ? AND bucket < ?",
+            (granularity, before)
+        ).rowcount
+    return pruned
+
+
+def roll_up(now: Optional[datetime] = None) -> RollupReport:
+    """Bring the rollups up to date and prune what they replace (blocking).
+
+    Safe to call from several threads or processes: the whole pass is
+    one write transaction.
+
+    Args:
+        now: Current UTC time (default: now)
+    """
+    now = now or datetime.now(timezone.utc)
+    report = RollupReport()
+    with get_connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            report.raw_rows = _roll_raw(conn)
+            report.buckets += _roll_level(conn, "minute", "hour", now)
+            report.buckets += _roll_level(conn, "hour", "day", now)
+            report.pruned = _prune(conn, now)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    return report
+
+
+def rollup_behind(max_lag: timedelta = ROLLUP_MAX_LAG, now: Optional[datetime] = None) -> bool:
+    """Whether raw rows older than max_lag are still waiting to be rolled up.
+
+    The analytics writer rolls up every minute while it runs; this is
+    true when it doesn't (e.g. the calls were recorded by another
+    process) or has fallen behind.
+    """
+    now = now or datetime.now(timezone.utc)
+    with get_connection() as conn:
+        last_id = int(_get_watermark(conn, "raw") or 0)
+        oldest = conn.execute("SELECT MIN(used_at) FROM tool_usage WHERE id > ?", (last_id,)).fetchone()[0]
+    return oldest is not None and oldest < (now - max_lag).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def stats_granularity(since_hours: Optional[float]) -> str:
+    """Coarsest level that still resolves a window (and is still kept)."""
+    if since_hours is not None and timedelta(hours=since_hours) <= MINUTE_RETENTION:
+        return "minute"
+    if since_hours is not None and timedelta(hours=since_hours) <= HOUR_RETENTION:
+        return "hour"
+    return "day"
+
+
+def _percentile(row: sqlite3.Row, fraction: float) -> Optional[float]:
+    """Estimate a latency percentile from the cumulative histogram.
+
+    Interpolates linearly inside the histogram bin holding the rank; the
+    result never exceeds the slowest call seen.
+    """
+    timed = row["timed_calls"]
+    if not timed:
+        return None
+    rank = max(1, math.ceil(fraction * timed))
+    lower, below = 0.0, 0
+    for bound, column in zip(TOOL_ROLLUP_BOUNDS_MS, HISTOGRAM_COLUMNS):
+        count = row[column]
+        if count >= rank:
+            estimate = lower + (bound - lower) * (rank - below) / (count - below)
+            return min(estimate, row["max_ms"]) if row["max_ms"] is not None else estimate
+        lower, below = bound, count
+    return row["max_ms"]
+
+
+def get_tool_stats(since_hours: Optional[float] = None, now: Optional[datetime] = None) -> list[dict]:
+    """Per-tool call counts, error rate and latency from the rollups.
+
+    Reads buckets of stats_granularity(since_hours), plus the finer
+    buckets not rolled up to that level yet. The window starts at the
+    beginning of the bucket containing `now - since_hours`. Call
+    roll_up() first to include the latest raw rows.
+
+    Args:
+        since_hours: Only count calls from the last N hours (None: all)
+        now: Current UTC time (default: now)
+
+    Returns:
+        Dicts with tool_name, calls, errors, error_rate, p50_ms, p95_ms,
+        avg_ms, max_ms and avg_args_bytes, busiest tool first (latency
+        fields are None for tools without timed calls)
+    """
+    now = now or datetime.now(timezone.utc)
+    granularity = stats_granularity(since_hours)
+    levels = list(BUCKET_FORMATS)
+    sums = ", ".join(f"TOTAL({column}) AS {column}" for column in SUM_COLUMNS)
+
+    with get_connection() as conn:
+        conditions, params = [], []
+        for level in levels[:levels.index(granularity) + 1]:
+            start = ""
+            if since_hours is not None:
+                start = _bucket(now - timedelta(hours=since_hours), granularity)
+            if level != granularity:
+                # Only the part the next level up doesn't cover yet
+                next_level = levels[levels.index(level) + 1]
+                start = max(start, _get_watermark(conn, next_level) or "")
+            conditions.append("(granularity = ? AND bucket >= ?)")
+            params += [level, start]
+
+        rows = conn.execute(
+            f"""SELECT tool_name, {sums}, MAX(max_ms) AS max_ms
+                FROM tool_usage_rollups
+                WHERE {" OR ".join(conditions)}
+                GROUP BY tool_name
+                ORDER BY calls DESC, tool_name""",
+            params
+        ).fetchall()
+
+    stats = []
+    for row in rows:
+        calls = int(row["calls"])
+        timed = row["timed_calls"]
+        stats.append({
+            "tool_name": row["tool_name"],
+            "calls": calls,
+            "errors": int(row["errors"]),
+            "error_rate": row["errors"] / calls if calls else 0.0,
+            "p50_ms": _percentile(row, 0.50),
+            "p95_ms": _percentile(row, 0.95),
+            "avg_ms": row["total_ms"] / timed if timed else None,
+            "max_ms": row["max_ms"],
+            "avg_args_bytes": row["args_bytes"] / calls if calls else 0.0,
+        })
+    return stats
@@ -0,0 +1,176 @@
+"""JARVIS - Streaming NDJSON export and import of the conversation store.
+
+An export is one JSON object per line. The first line is a header; each
+conversation is followed by its messages, then come user facts and
+reminders:
+
+    {"type": "header", "format": "jarvis-ndjson", "version": 1, ...}
+    {"type": "conversation", "id": "...", "title": "...", ...}
+    {"type": "message", "conversation_id": "...", "seq": 1, ...}
+    {"type": "user_fact", ...}
+    {"type": "reminder", ...}
+
+Both directions are generator pipelines over keyset-paged reads and
+batched inserts, so memory use doesn't grow with the size of the
+history. Import keeps existing rows, so it can be re-run after an
+interruption.
+"""
+
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterable, Iterator, Optional, Union
+
+from . import database, migrations
+
+FORMAT = "jarvis-ndjson"
+FORMAT_VERSION = 1
+
+# Record type -> table
+RECORD_TABLES = {
+    "conversation": "conversations",
+    "message": "messages",
+    "user_fact": "user_facts",
+    "reminder": "reminders",
+}
+
+# Records inserted per import transaction
+IMPORT_BATCH = 1000
+
+
+def _line(record_type: str, row: dict) -> str:
+    return json.dumps({"type": record_type, **row}, ensure_ascii=False, default=str) + "\n"
+
+
+def export_lines(chunk_size: int = database.EXPORT_CHUNK) -> Iterator[str]:
+    """Yield the whole store as NDJSON lines (newline-terminated).
+
+    Conversations and messages are read in (conversation) id order and
+    merged, so each conversation is written just before its messages
+    without a query per conversation.
+
+    Args:
+        chunk_size: Rows read per query
+    """
+    with database.get_connection() as conn:
+        schema_version = migrations.get_version(conn)
+    yield _line("header", {
+        "format": FORMAT,
+        "version": FORMAT_VERSION,
+        "schema_version": schema_version,
+        "exported_at": datetime.now().isoformat(timespec="seconds"),
+    })
+
+    messages = database.iter_table_rows("messages", "conversation_id, seq", chunk_size)
+    message = next(messages, None)
+    for conversation in database.iter_table_rows("conversations", "id", chunk_size):
+        # Messages whose conversation no longer exists sort before it; drop them
+        while message is not None and message["conversation_id"] < conversation["id"]:
+            message = next(messages, None)
+        yield _line("conversation", conversation)
+        while message is not None and message["conversation_id"] == conversation["id"]:
+            yield _line("message", message)
+            message = next(messages, None)
+
+    for fact in database.iter_table_rows("user_facts", "id", chunk_size):
+        yield _line("user_fact", fact)
+    for reminder in database.iter_table_rows("reminders", "id", chunk_size):
+        yield _line("reminder", reminder)
+
+
+def parse_line(line: Union[str, bytes], line_number: int) -> Optional[dict]:
+    """Decode one NDJSON line (None for blank lines).
+
+    Raises:
+        ValueError: If the line isn't a JSON object with a known type, or
+            is a header for an unsupported format
+    """
+    if isinstance(line, bytes):
+        line = line.decode("utf-8")
+    line = line.strip()
+    if not line:
+        return None
+
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Line {line_number}: invalid JSON ({e.msg})") from None
+    if not isinstance(record, dict):
+        raise ValueError(f"Line {line_number}: expected a JSON object")
+
+    record_type = record.get("type")
+    if record_type == "header":
+        if record.get("format") != FORMAT or record.get("version", 0) > FORMAT_VERSION:
+            raise ValueError(
+                f"Line {line_number}: unsupported export format "
+                f"{record.get('format')!r} version {record.get('version')!r}"
+            )
+    elif record_type not in RECORD_TABLES:
+        raise ValueError(f"Line {line_number}: unknown record type {record_type!r}")
+    return record
+
+
+@dataclass
+class ImportStats:
+    read: dict[str, int] = field(default_factory=dict)  # Records per table in the input
+    inserted: dict[str, int] = field(default_factory=dict)  # New rows per table
+    skipped: dict[str, int] = field(default_factory=dict)  # New rows not inserted (duplicate tool responses)
+
+    def add(self, inserted: dict[str, int], skipped: dict[str, int]):
+        for table, count in inserted.items():
+            self.inserted[table] = self.inserted.get(table, 0) + count
+        for table, count in skipped.items():
+            self.skipped[table] = self.skipped.get(table, 0) + count
+
+
+class Importer:
+    """Collects parsed records into batches for database.import_rows().
+
+    Feed records with add(); when it returns True a batch is full and
+    take_batch() should be written (on a database thread, for async
+    callers) before adding more.
+    """
+
+    def __init__(self, batch_size: int = IMPORT_BATCH):
+        self.batch_size = batch_size
+        self.stats = ImportStats()
+        self._batch: dict[str, list[dict]] = {}
+        self._pending = 0
+
+    def add(self, record: dict) -> bool:
+        """Queue a record from parse_line(); returns True when a batch is full."""
+        table = RECORD_TABLES.get(record["type"])
+        if table is None:
+            return False
+        self._batch.setdefault(table, []).append(record)
+        self.stats.read[table] = self.stats.read.get(table, 0) + 1
+        self._pending += 1
+        return self._pending >= self.batch_size
+
+    def take_batch(self) -> dict[str, list[dict]]:
+        """Return the queued records and start a new batch."""
+        batch, self._batch, self._pending = self._batch, {}, 0
+        return batch
+
+    def write_batch(self, batch: dict[str, list[dict]]):
+        """Insert a batch from take_batch() (blocking)."""
+        if batch:
+            self.stats.add(*database.import_rows(batch))
+
+
+def import_lines(lines: Iterable[Union[str, bytes]], batch_size: int = IMPORT_BATCH) -> ImportStats:
+    """Import NDJSON lines from export_lines() into the store.
+
+    Each batch is committed separately; a failure leaves earlier batches
+    in place, and re-running the import skips them.
+
+    Raises:
+        ValueError: On a malformed line (see parse_line)
+    """
+    importer = Importer(batch_size)
+    for line_number, line in enumerate(lines, 1):
+        record = parse_line(line, line_number)
+        if record is not None and importer.add(record):
+            importer.write_batch(importer.take_batch())
+    importer.write_batch(importer.take_batch())
+    return importer.stats
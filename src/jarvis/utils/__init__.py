@@ -9,6 +9,7 @@ from .errors import (
     ToolError,
     MCPError,
     NetworkError,
+    BusyError,
     handle_errors,
     handle_errors_async,
     format_error_for_user,
@@ -25,6 +26,7 @@ __all__ = [
     "ToolError",
     "MCPError",
     "NetworkError",
+    "BusyError",
     "handle_errors",
     "handle_errors_async",
     "format_error_for_user",
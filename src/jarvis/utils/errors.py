@@ -1,6 +1,7 @@
 """JARVIS - Error handling utilities."""
 
 import functools
+import os
 import traceback
 from typing import Callable, TypeVar, Any
 
@@ -67,6 +68,13 @@ class NetworkError(JarvisError):
         return f"Network error: {self.message}. Check your internet connection."
 
 
+class BusyError(JarvisError):
+    """Too many requests waiting for the agent."""
+
+    def user_message(self) -> str:
+        return f"JARVIS is busy: {self.message}. Try again shortly."
+
+
 def handle_errors(
     default_return: Any = None,
     error_prefix: str = "Error",
@@ -197,9 +205,14 @@ def check_ollama_running() -> bool:
     Returns:
         True if Ollama is accessible
     """
+    # Same host the Ollama client uses (OLLAMA_HOST, e.g. a benchmark server)
+    host = os.getenv("OLLAMA_HOST", "http://localhost:11434").rstrip("/")
+    if "://" not in host:
+        host = f"http://{host}"
+
     try:
         import httpx
-        response = httpx.get("http://localhost:11434/api/tags", timeout=2.0)
+        response = httpx.get(f"{host}/api/tags", timeout=2.0)
         return response.status_code == 200
     except Exception:
         return False
@@ -0,0 +1,23 @@
+"""Shared fixtures: every test gets its own SQLite database file."""
+
+import pytest
+
+from jarvis import analytics, database
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Point jarvis.database at an empty database in tmp_path.
+
+    Yields the database path. The schema is created on first use, like a
+    fresh install.
+    """
+    path = tmp_path / "jarvis.db"
+    monkeypatch.setattr(database, "DB_PATH", path)
+    yield path
+    # Tool calls made by the test are written to its database, not the next one's
+    analytics.flush_tool_usage()
+    # A migration may have started the full-text backfill on this file
+    if database._backfill_thread is not None:
+        database._backfill_thread.join()
+    database.close_connections()
@@ -0,0 +1,118 @@
+"""Message storage: tool response dedupe, seq ordering and keyset pages."""
+
+from jarvis import database
+
+
+def test_duplicate_tool_response_is_stored_once(db):
+    conv = database.create_conversation("t")
+    ids = database.add_messages(conv, [
+        {"role": "user", "content": "weather?"},
+        {"role": "tool", "content": "sunny", "tool_call_id": "call_1", "tool_name": "web_search"},
+        {"role": "tool", "content": "sunny", "tool_call_id": "call_1", "tool_name": "web_search"},
+    ])
+
+    assert ids[0] is not None and ids[1] is not None
+    assert ids[2] is None
+    assert database.add_message(conv, "tool", "sunny", tool_call_id="call_1") is None
+    assert [m.content for m in database.get_messages(conv)] == ["weather?", "sunny"]
+    assert database.get_conversation(conv).message_count == 2
+
+
+def test_same_tool_call_id_in_another_conversation_is_kept(db):
+    first = database.create_conversation("a")
+    second = database.create_conversation("b")
+    assert database.add_message(first, "tool", "r", tool_call_id="call_1") is not None
+    assert database.add_message(second, "tool", "r", tool_call_id="call_1") is not None
+
+
+def test_tool_messages_without_call_id_are_not_deduplicated(db):
+    conv = database.create_conversation("t")
+    ids = database.add_messages(conv, [
+        {"role": "tool", "content": "r"},
+        {"role": "tool", "content": "r", "tool_call_id": ""},
+        {"role": "tool", "content": "r", "tool_call_id": ""},
+    ])
+    assert None not in ids
+
+
+def test_seq_follows_insertion_order(db):
+    conv = database.create_conversation("t")
+    database.add_message(conv, "user", "m0")
+    database.add_messages(conv, [{"role": "assistant", "content": f"m{i}"} for i in range(1, 4)])
+    database.add_message(conv, "user", "m4")
+
+    messages = database.get_messages(conv)
+    assert [m.content for m in messages] == [f"m{i}" for i in range(5)]
+    assert [m.seq for m in messages] == [1, 2, 3, 4, 5]
+
+
+def test_seq_skips_no_number_for_a_deduplicated_message(db):
+    conv = database.create_conversation("t")
+    database.add_message(conv, "tool", "r", tool_call_id="call_1")
+    database.add_message(conv, "tool", "r", tool_call_id="call_1")
+    database.add_message(conv, "user", "next")
+    assert [m.seq for m in database.get_messages(conv)] == [1, 2]
+
+
+def test_message_pages_cover_the_conversation_once(db):
+    conv = database.create_conversation("t")
+    database.add_messages(conv, [{"role": "user", "content": f"m{i}"} for i in range(10)])
+
+    newest = database.get_messages_page(conv, limit=4)
+    assert [m.content for m in newest.messages] == ["m6", "m7", "m8", "m9"]
+    assert newest.has_more
+
+    seen = newest.messages
+    page = newest
+    while page.has_more:
+        page = database.get_messages_page(conv, limit=4, before=seen[0].seq)
+        seen = page.messages + seen
+    assert [m.content for m in seen] == [f"m{i}" for i in range(10)]
+    assert len(page.messages) == 2
+
+    newer = database.get_messages_page(conv, limit=4, after=seen[3].seq)
+    assert [m.content for m in newer.messages] == ["m4", "m5", "m6", "m7"]
+    assert newer.has_more
+
+    last = database.get_messages_page(conv, limit=4, after=seen[5].seq)
+    assert [m.content for m in last.messages] == ["m6", "m7", "m8", "m9"]
+    assert not last.has_more
+
+
+def test_exact_page_boundary_has_no_more(db):
+    conv = database.create_conversation("t")
+    database.add_messages(conv, [{"role": "user", "content": f"m{i}"} for i in range(4)])
+
+    page = database.get_messages_page(conv, limit=4)
+    assert len(page.messages) == 4
+    assert not page.has_more
+    assert database.get_messages_page(conv, limit=4, before=page.messages[0].seq).messages == []
+
+
+def test_conversation_pages_cover_every_conversation_once(db):
+    # Created within the same second: the id breaks updated_at ties
+    convs = [database.create_conversation(f"c{i}") for i in range(7)]
+    database.archive_conversation(convs[0])
+
+    first = database.list_conversations_page(limit=3)
+    assert first.has_more
+    seen = list(first.conversations)
+    page = first
+    while page.has_more:
+        last = seen[-1]
+        page = database.list_conversations_page(limit=3, before=(last.updated_at, last.id))
+        seen.extend(page.conversations)
+
+    ids = [c.id for c in seen]
+    assert sorted(ids) == sorted(convs[1:])
+    assert len(set(ids)) == len(ids)
+    assert [(c.updated_at, c.id) for c in seen] == sorted(((c.updated_at, c.id) for c in seen), reverse=True)
+
+    # Paging back towards newer conversations returns the previous page
+    anchor = seen[3]
+    newer = database.list_conversations_page(limit=3, after=(anchor.updated_at, anchor.id))
+    assert [c.id for c in newer.conversations] == ids[:3]
+    assert not newer.has_more
+
+    with_archived = database.list_conversations_page(limit=10, include_archived=True)
+    assert len(with_archived.conversations) == 7
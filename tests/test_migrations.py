@@ -0,0 +1,89 @@
+"""Upgrading a pre-migration (version 0) database to the current schema."""
+
+import sqlite3
+
+from jarvis import database, migrations
+
+
+def _index_names(conn: sqlite3.Connection) -> set[str]:
+    return {row[1] for row in conn.execute("PRAGMA index_list(messages)")}
+
+
+def _make_v0_database(path):
+    """A database as written before versioned migrations, with two copies of a tool response."""
+    conn = sqlite3.connect(path)
+    migrations._initial_schema(conn)
+    conn.executemany(
+        "INSERT INTO conversations (id, title, updated_at) VALUES (?, ?, ?)",
+        [("a", "first", "2024-01-01 10:00:00"), ("b", "second", "2024-01-02 10:00:00")],
+    )
+    conn.executemany(
+        """INSERT INTO messages (id, conversation_id, role, content, tool_call_id, created_at)
+           VALUES (?, ?, ?, ?, ?, ?)""",
+        [
+            ("m1", "a", "user", "what's the weather", None, "2024-01-01 10:00:00"),
+            ("m2", "a", "assistant", "", None, "2024-01-01 10:00:01"),
+            ("m3", "a", "tool", "sunny", "call_1", "2024-01-01 10:00:02"),
+            ("m4", "a", "assistant", "It's sunny.", None, "2024-01-01 10:00:03"),
+            # Re-persisted on the next turn
+            ("m5", "a", "tool", "sunny", "call_1", "2024-01-01 10:05:00"),
+            ("m6", "b", "user", "hello", None, "2024-01-02 10:00:00"),
+            ("m7", "a", "user", "thanks", None, "2024-01-01 10:05:01"),
+        ],
+    )
+    conn.commit()
+    assert migrations.get_version(conn) == 0
+    conn.close()
+
+
+def test_v0_database_is_migrated_to_the_latest_version(db):
+    _make_v0_database(db)
+
+    database.init_db()
+
+    assert database.get_schema_version() == migrations.LATEST_VERSION
+    first = database.get_conversation("a")
+    assert first.message_count == 6
+    assert first.last_message_at is not None
+    assert database.get_conversation("b").message_count == 1
+    # Numbered by created_at within each conversation
+    assert [(m.id, m.seq) for m in database.get_messages("a")] == [
+        ("m1", 1), ("m2", 2), ("m3", 3), ("m4", 4), ("m5", 5), ("m7", 6),
+    ]
+    assert [m.seq for m in database.get_messages("b")] == [1]
+
+    with database.get_connection() as conn:
+        indexes = _index_names(conn)
+    assert "idx_messages_conversation" not in indexes
+    # The duplicate response keeps the unique index from being created ...
+    assert "idx_messages_tool_call" not in indexes
+
+
+def test_compact_removes_duplicates_left_by_the_migration(db):
+    _make_v0_database(db)
+    database.init_db()
+
+    assert database.compact_duplicate_tool_messages() == 1
+
+    assert [m.id for m in database.get_messages("a")] == ["m1", "m2", "m3", "m4", "m7"]
+    assert database.get_conversation("a").message_count == 5
+    with database.get_connection() as conn:
+        assert "idx_messages_tool_call" in _index_names(conn)
+    # ... and from now on the same response is stored once
+    assert database.add_message("a", "tool", "sunny", tool_call_id="call_1") is None
+
+
+def test_v0_messages_are_searchable_after_the_backfill(db):
+    _make_v0_database(db)
+    database.init_db()
+    database.backfill_message_search()
+
+    hits = database.search_messages("weather")
+    assert [hit.message.id for hit in hits] == ["m1"]
+
+
+def test_migrating_twice_is_a_no_op(db):
+    database.init_db()
+    with database.get_connection() as conn:
+        assert migrations.migrate(conn) == []
+        assert migrations.get_version(conn) == migrations.LATEST_VERSION
@@ -0,0 +1,114 @@
+"""Tool usage rollups agree with the raw rows they replace."""
+
+import random
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from jarvis import database, rollups
+
+NOW = datetime(2026, 3, 10, 12, 30, 15, tzinfo=timezone.utc)
+
+
+def _event(tool: str, at: datetime, success: bool = True, duration_ms: float = 10.0) -> dict:
+    return {
+        "tool_name": tool,
+        "query": None,
+        "success": success,
+        "duration_ms": duration_ms,
+        "args_size": 20,
+        "error": None if success else "ValueError",
+        "used_at": at.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def _random_events(count: int, start: datetime, end: datetime, seed: int = 1) -> list[dict]:
+    rng = random.Random(seed)
+    span = (end - start).total_seconds()
+    return [
+        _event(
+            rng.choice(["calculator", "web_search", "note_save"]),
+            start + timedelta(seconds=rng.uniform(0, span)),
+            success=rng.random() > 0.2,
+            duration_ms=rng.uniform(1, 3000),
+        )
+        for _ in range(count)
+    ]
+
+
+def _totals(events: list[dict], since: datetime = datetime.min.replace(tzinfo=timezone.utc)) -> dict:
+    cutoff = since.strftime("%Y-%m-%d %H:%M:%S")
+    calls, errors = Counter(), Counter()
+    for event in events:
+        if event["used_at"] >= cutoff:
+            calls[event["tool_name"]] += 1
+            errors[event["tool_name"]] += not event["success"]
+    return {tool: (calls[tool], errors[tool]) for tool in calls}
+
+
+def _stats(since_hours=None) -> dict:
+    return {
+        row["tool_name"]: (row["calls"], row["errors"])
+        for row in rollups.get_tool_stats(since_hours, now=NOW)
+    }
+
+
+def test_rollup_totals_match_the_raw_rows(db):
+    # Old enough to reach the day level and have their raw rows pruned
+    events = _random_events(500, NOW - timedelta(days=5), NOW)
+    database.log_tool_usages(events)
+
+    report = rollups.roll_up(now=NOW)
+
+    assert report.raw_rows == 500
+    assert report.pruned > 0
+    assert _stats() == _totals(events)
+
+
+def test_windowed_totals_match_the_raw_rows(db):
+    # Whole hours, so the window starts on a bucket boundary
+    events = _random_events(300, NOW - timedelta(hours=30), NOW)
+    database.log_tool_usages(events)
+    rollups.roll_up(now=NOW)
+
+    window_start = (NOW - timedelta(hours=6)).replace(second=0)
+    assert _stats(6) == _totals(events, since=window_start)
+
+
+def test_late_rows_are_added_to_levels_already_rolled_up(db):
+    events = _random_events(200, NOW - timedelta(days=3), NOW - timedelta(hours=2))
+    database.log_tool_usages(events)
+    rollups.roll_up(now=NOW)
+
+    # Recorded late, for buckets whose hour and day were already folded
+    late = [
+        _event("calculator", NOW - timedelta(days=2, hours=5)),
+        _event("web_search", NOW - timedelta(hours=3), success=False),
+        _event("new_tool", NOW - timedelta(days=1, hours=1)),
+    ]
+    database.log_tool_usages(late)
+    report = rollups.roll_up(now=NOW)
+
+    assert report.raw_rows == 3
+    assert _stats() == _totals(events + late)
+
+
+def test_rolling_up_again_changes_nothing(db):
+    events = _random_events(100, NOW - timedelta(days=2), NOW)
+    database.log_tool_usages(events)
+    rollups.roll_up(now=NOW)
+    first = rollups.get_tool_stats(now=NOW)
+
+    report = rollups.roll_up(now=NOW)
+
+    assert report.raw_rows == 0
+    assert rollups.get_tool_stats(now=NOW) == first
+
+
+def test_rollup_behind_only_for_rows_older_than_the_lag(db):
+    assert not rollups.rollup_behind(now=NOW)
+    database.log_tool_usages([_event("calculator", NOW - timedelta(seconds=30))])
+    assert not rollups.rollup_behind(now=NOW)
+    assert rollups.rollup_behind(now=NOW + timedelta(minutes=5))
+
+    rollups.roll_up(now=NOW)
+    assert not rollups.rollup_behind(now=NOW + timedelta(minutes=5))
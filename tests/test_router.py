@@ -0,0 +1,127 @@
+"""Intent router: which commands skip the LLM, and with what arguments."""
+
+import pytest
+from langchain_core.tools import tool
+
+from jarvis import analytics, database
+from jarvis.agent.router import IntentRouter, IntentRule, PatternRule
+
+
+@pytest.fixture
+def router():
+    return IntentRouter(min_confidence=0.85)
+
+
+@pytest.mark.parametrize("query, expression", [
+    ("what is 15*7", "15*7"),
+    ("What's 15 * 7?", "15 * 7"),
+    ("calculate (2+3)/4", "(2+3)/4"),
+    ("15 times 7", "15 * 7"),
+    ("how much is 100 divided by 4", "100 / 4"),
+    ("12 - 5", "12 - 5"),
+    ("what is 10-15", "10-15"),
+])
+def test_calculator(router, query, expression):
+    found = router.match(query)
+    assert found is not None and found.tool_name == "calculator"
+    assert found.args == {"expression": expression}
+
+
+@pytest.mark.parametrize("query, message, when", [
+    ("remind me in 10m to stretch", "stretch", "10m"),
+    ("remind me to call mom in 2 hours", "call mom", "2h"),
+    ("Remind me in 1 hour and 30 minutes to Check The Oven", "Check The Oven", "1h30m"),
+])
+def test_reminder_set(router, query, message, when):
+    found = router.match(query)
+    assert found is not None and found.tool_name == "reminder_set"
+    assert found.args == {"message": message, "time_from_now": when}
+
+
+@pytest.mark.parametrize("query", ["list my reminders", "show reminders", "what are my reminders"])
+def test_reminder_list(router, query):
+    found = router.match(query)
+    assert found is not None and found.tool_name == "reminder_list"
+    assert found.args == {}
+
+
+@pytest.mark.parametrize("query, content", [
+    ("save a note: buy groceries tomorrow", "buy groceries tomorrow"),
+    ("take a note that the wifi password changed", "the wifi password changed"),
+    ("make a note, Call Mom", "Call Mom"),
+    ("add a note saying the car is in bay 4", "the car is in bay 4"),
+])
+def test_note_save(router, query, content):
+    found = router.match(query)
+    assert found is not None and found.tool_name == "note_save"
+    assert found.args == {"content": content}
+
+
+@pytest.mark.parametrize("query", [
+    # Numbers that aren't arithmetic
+    "call 555-1234",
+    "555-1234",
+    "2024-10-16",
+    "3/4",
+    "what is 2**100000",
+    # Ordinary speech around "note"
+    "take note of this",
+    "add a note to my calendar",
+    "save a note: hi",
+    # Reminders the rule can't parse cleanly
+    "remind me about the meeting",
+    # Anything else
+    "tell me a joke",
+    "what is the capital of france",
+    "",
+])
+def test_goes_to_the_llm(router, query):
+    assert router.match(query) is None
+
+
+def test_below_min_confidence_goes_to_the_llm():
+    # Spoken operators without a question: 0.9 - 0.1
+    assert IntentRouter(min_confidence=0.85).match("fifteen plus 7") is None
+    assert IntentRouter(min_confidence=0.95).match("15 times 7") is None
+
+
+def test_rules_for_missing_tools_are_ignored():
+    assert IntentRouter(tools=[]).match("what is 15*7") is None
+
+
+def test_custom_rule():
+    router = IntentRouter(min_confidence=0.85)
+    router.add_rule(PatternRule(
+        name="search_notes",
+        tool_name="note_search",
+        patterns=[r"search my notes for (?P<query>.+)"],
+    ))
+    found = router.match("search my notes for Groceries")
+    assert found.tool_name == "note_search"
+    assert found.args == {"query": "Groceries"}
+
+
+def test_intent_rule_is_abstract():
+    with pytest.raises(TypeError):
+        IntentRule()
+
+
+def test_routed_call_produces_a_tool_exchange(router, db):
+    messages = router.route("what is 15*7")
+    assert [m.type for m in messages] == ["ai", "tool", "ai"]
+    assert messages[0].tool_calls[0]["id"] == messages[1].tool_call_id
+    assert messages[1].content == "105"
+    assert messages[2].content == "15*7 is 105."
+
+
+def test_failing_tool_falls_back_and_is_recorded(db):
+    @tool
+    def calculator(expression: str) -> str:
+        """Evaluate a math expression."""
+        raise ValueError("broken")
+
+    assert IntentRouter(tools=[calculator], min_confidence=0.85).route("what is 15*7") is None
+    assert analytics.flush_tool_usage()
+    with database.get_connection() as conn:
+        rows = conn.execute("SELECT tool_name, success, error FROM tool_usage").fetchall()
+    assert [tuple(row) for row in rows] == [("calculator", 0, "ValueError")]
@@ -0,0 +1,75 @@
+"""NDJSON export and import."""
+
+from jarvis import database, transfer
+
+
+def _fill():
+    conv = database.create_conversation("trip")
+    database.add_messages(conv, [
+        {"role": "user", "content": "weather in paris"},
+        {"role": "assistant", "content": "", "tool_args": '{"query": "paris"}'},
+        {"role": "tool", "content": "rain", "tool_call_id": "call_1", "tool_name": "web_search"},
+        {"role": "assistant", "content": "Rain."},
+    ])
+    other = database.create_conversation("math")
+    database.add_message(other, "user", "15 * 7")
+    database.set_user_fact("preference", "units", "metric")
+    return conv, other
+
+
+def test_reimporting_an_export_inserts_nothing(db):
+    _fill()
+    lines = list(transfer.export_lines())
+
+    stats = transfer.import_lines(lines)
+
+    assert stats.read == {"conversations": 2, "messages": 5, "user_facts": 1}
+    assert sum(stats.inserted.values()) == 0
+    assert sum(stats.skipped.values()) == 0
+
+
+def test_export_round_trips_into_an_empty_database(db, tmp_path, monkeypatch):
+    conv, _ = _fill()
+    lines = list(transfer.export_lines())
+    before = [(m.id, m.seq, m.content, m.tool_call_id) for m in database.get_messages(conv)]
+
+    database.close_connections()
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "copy.db")
+    stats = transfer.import_lines(lines, batch_size=2)
+
+    assert stats.inserted == {"conversations": 2, "messages": 5, "user_facts": 1}
+    assert [(m.id, m.seq, m.content, m.tool_call_id) for m in database.get_messages(conv)] == before
+    assert database.get_conversation(conv).message_count == 4
+    assert sum(transfer.import_lines(lines).inserted.values()) == 0
+
+
+def test_import_moves_messages_whose_seq_is_taken(db):
+    conv = database.create_conversation("t")
+    database.add_messages(conv, [{"role": "user", "content": f"local{i}"} for i in range(3)])
+    imported = [
+        {"id": "x1", "conversation_id": conv, "role": "user", "content": "imported1", "seq": 2},
+        {"id": "x2", "conversation_id": conv, "role": "user", "content": "imported2", "seq": 9},
+        {"id": "x3", "conversation_id": conv, "role": "user", "content": "imported3"},
+    ]
+
+    inserted, skipped = database.import_rows({"messages": imported})
+
+    assert inserted == {"messages": 3}
+    assert skipped == {}
+    seqs = {m.id: m.seq for m in database.get_messages(conv)}
+    assert seqs["x1"] == 4  # Taken by local1: appended
+    assert seqs["x2"] == 9  # Free: kept
+    assert seqs["x3"] == 10  # Missing: appended
+    assert len(set(seqs.values())) == len(seqs)
+
+
+def test_import_skips_a_second_response_to_a_stored_tool_call(db):
+    conv = database.create_conversation("t")
+    database.add_message(conv, "tool", "r", tool_call_id="call_1")
+    duplicate = {"id": "dup", "conversation_id": conv, "role": "tool", "content": "r", "tool_call_id": "call_1"}
+
+    inserted, skipped = database.import_rows({"messages": [duplicate]})
+
+    assert inserted == {"messages": 0}
+    assert skipped == {"messages": 1}
+    assert len(database.get_messages(conv)) == 1